@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+흐림 판단 벤치마크 스크립트
+
+고정된 seed로 만든 RAW 크기(기본 6000x4000)의 합성 이미지 또는 RAW 파일 fixture로
+detect_main_object, detect_faces, 전체 Laplacian, 선명도 지표별 격자 점수(metric_*), score_image,
+(fixture인 경우) 디코딩 시간을 측정합니다.
+결과를 JSON으로 저장해 두고 --compare로 비교하면 성능 회귀를 수치로 확인할 수 있습니다.
+
+사용법:
+    python benchmark.py
+    python benchmark.py --size 3000x2000 --count 4 --repeat 5
+    python benchmark.py --fixtures ./fixtures --decode half
+    python benchmark.py --json baseline.json
+    python benchmark.py --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from blur_detection import (
+    DEFAULT_DETECT_MAX_SIDE,
+    DEFAULT_GRID_SIZE,
+    FACE_DETECTION_AVAILABLE,
+    decode_raw,
+    detect_main_object,
+    laplacian_variance,
+    score_image,
+    to_gray,
+)
+from profiling import percentile
+from scanner import iter_raw_files
+from sharpness import METRICS, tile_metrics
+
+if FACE_DETECTION_AVAILABLE:
+    from face_detection import detect_faces
+
+
+def make_synthetic_image(width, height, seed, blurred=False):
+    """
+    큰 구조(저해상도 노이즈 확대)와 세부 질감(고주파 노이즈)을 합친 합성 RGB 이미지를 만듭니다.
+
+    Args:
+        width (int): 이미지 너비
+        height (int): 이미지 높이
+        seed (int): 난수 seed (같은 seed면 같은 이미지)
+        blurred (bool): 가우시안 블러로 흔들린 사진처럼 만들지 여부
+
+    Returns:
+        numpy.ndarray: RGB 이미지 (uint8)
+    """
+    rng = np.random.default_rng(seed)
+    scene = rng.integers(0, 255, (max(2, height // 200), max(2, width // 200), 3), dtype=np.uint8)
+    scene = cv2.resize(scene, (width, height), interpolation=cv2.INTER_CUBIC)
+    detail = rng.integers(0, 48, (height, width, 3), dtype=np.uint8)
+    image = cv2.add(scene, detail)
+    if blurred:
+        image = cv2.GaussianBlur(image, (0, 0), 6)
+    return image
+
+
+def time_call(func, repeat):
+    """func()를 repeat번 실행한 경과 시간 목록(초)을 반환합니다."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def benchmark_image(rgb, args, timings):
+    """이미지 하나에 대해 함수별 시간을 측정하여 timings에 더합니다."""
+    face_max_side = args.face_max_side or None
+    gray = to_gray(rgb)
+
+    cases = {
+        "detect_main_object": lambda: detect_main_object(rgb, args.grid),
+        "full_laplacian": lambda: laplacian_variance(to_gray(rgb)),
+        "score_image": lambda: score_image(rgb, args.threshold, args.grid, face_max_side),
+    }
+    for name in METRICS:
+        cases[f"metric_{name}"] = lambda name=name: tile_metrics(gray, args.grid, [name])
+    if FACE_DETECTION_AVAILABLE:
+        cases["detect_faces"] = lambda: detect_faces(rgb, max_side=face_max_side)
+
+    # 흐림 판단 함수의 진행 메시지는 출력하지 않음
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, func in cases.items():
+            func()  # 워밍업 (캐스케이드 로드 등)
+            timings.setdefault(name, []).extend(time_call(func, args.repeat))
+
+
+def summarize(timings):
+    """함수별 p50/p95/최소 시간(ms)을 계산합니다."""
+    summary = {}
+    for name, values in timings.items():
+        values = sorted(values)
+        summary[name] = {
+            "n": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "min_ms": values[0] * 1000,
+        }
+    return summary
+
+
+def compare(summary, baseline, tolerance):
+    """
+    기준 결과보다 p50이 tolerance 비율 이상 느려진 항목을 출력합니다.
+
+    Returns:
+        bool: 회귀가 없으면 True
+    """
+    ok = True
+    print(f"\n===== 기준 결과와 비교 (허용 {tolerance:.0%}) =====")
+    for name, stats in summary.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = stats["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        status = "OK"
+        if change > tolerance:
+            status = "회귀"
+            ok = False
+        print(f"  {name:<20} {base['p50_ms']:>9.1f}ms → {stats['p50_ms']:>9.1f}ms ({change:+.1%}) {status}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="흐림 판단 벤치마크")
+    parser.add_argument("--size", default="6000x4000", help="합성 이미지 크기 WxH (기본값: 6000x4000)")
+    parser.add_argument("--count", type=int, default=4, help="합성 이미지 수 - 절반은 흐린 이미지 (기본값: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="이미지마다 반복 횟수 (기본값: 3)")
+    parser.add_argument("--seed", type=int, default=1234, help="합성 이미지 seed (기본값: 1234)")
+    parser.add_argument("--fixtures", default=None, help="합성 이미지 대신 사용할 RAW 파일 폴더")
+    parser.add_argument("--decode", choices=["full", "half", "thumb"], default="full",
+                        help="fixture 디코딩 방식 (기본값: full)")
+    parser.add_argument("--grid", type=int, default=DEFAULT_GRID_SIZE, help=f"격자 크기 (기본값: {DEFAULT_GRID_SIZE})")
+    parser.add_argument("--face-max-side", type=int, default=DEFAULT_DETECT_MAX_SIDE,
+                        help=f"얼굴 감지용 축소 이미지의 긴 변 크기, 0이면 원본 (기본값: {DEFAULT_DETECT_MAX_SIDE})")
+    parser.add_argument("--threshold", type=float, default=70.0, help="흐림 판단 기준값 (기본값: 70.0)")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--compare", default=None, help="비교할 기준 결과 JSON 파일 경로")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용하는 p50 증가 비율 (기본값: 0.2)")
+    args = parser.parse_args()
+
+    print(f"Python {platform.python_version()}, numpy {np.__version__}, OpenCV {cv2.__version__} "
+          f"(스레드 {cv2.getNumThreads()}), {platform.machine()}")
+
+    timings = {}
+    if args.fixtures:
+        paths = list(iter_raw_files(args.fixtures))
+        if not paths:
+            print(f"No RAW files found in {args.fixtures}")
+            return 1
+        print(f"fixture {len(paths)}개, 디코딩 방식 {args.decode}, 반복 {args.repeat}회")
+        for path in paths:
+            timings.setdefault(f"decode_{args.decode}", []).extend(
+                time_call(lambda: decode_raw(path, args.decode), args.repeat))
+            benchmark_image(decode_raw(path, args.decode), args, timings)
+    else:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+        print(f"합성 이미지 {args.count}개 ({width}x{height}), seed {args.seed}, 반복 {args.repeat}회")
+        for i in range(args.count):
+            rgb = make_synthetic_image(width, height, args.seed + i, blurred=i % 2 == 1)
+            benchmark_image(rgb, args, timings)
+
+    summary = summarize(timings)
+    print(f"\n  {'function':<20} {'n':>4} {'p50':>10} {'p95':>10} {'min':>10}")
+    for name, stats in summary.items():
+        print(f"  {name:<20} {stats['n']:>4} {stats['p50_ms']:>8.1f}ms {stats['p95_ms']:>8.1f}ms "
+              f"{stats['min_ms']:>8.1f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": summary}, f, indent=2, ensure_ascii=False)
+        print(f"\n결과를 저장했습니다: {os.path.abspath(args.json)}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if not compare(summary, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RAW 디코딩 및 흐림 판단 모듈
+
+main.py의 무거운 초기화(NLTK, transformers, XMP) 없이 import 할 수 있으므로
+프로세스 풀의 워커에서도 그대로 사용할 수 있습니다.
+"""
+
+import time
+
+import cv2
+import numpy as np
+import rawpy
+
+from defaults import DEFAULT_DETECT_MAX_SIDE, DEFAULT_GRID_SIZE, FACE_THRESHOLD_SCALE, MAX_GRID_SIZE, MIN_GRID_SIZE
+from profiling import Profiler, peak_rss_mb, profiled
+from sharpness import (
+    DEFAULT_METRIC,
+    laplacian_variance,
+    metric_names,
+    region_sharpness,
+    tile_metrics,
+)
+
+# 얼굴 감지 모듈 가져오기
+try:
+    from face_detection import detect_faces
+    FACE_DETECTION_AVAILABLE = True
+except ImportError:
+    FACE_DETECTION_AVAILABLE = False
+
+# 점수 계산 방식이 바뀌면 증가시킵니다 (캐시된 점수 무효화용)
+SCORE_VERSION = 1
+
+
+def to_gray(image):
+    """
+    RGB 이미지를 uint8 그레이스케일로 변환합니다. 이미 그레이스케일이면 그대로 반환합니다.
+
+    Args:
+        image: RGB 또는 그레이스케일 이미지
+
+    Returns:
+        numpy.ndarray: 그레이스케일 이미지
+    """
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim > 2 else image
+
+
+def center_weights(grid_size=DEFAULT_GRID_SIZE):
+    """
+    격자 중심에서 멀어질수록 작아지는 가중치 1 / (1 + 거리)를 계산합니다.
+
+    Args:
+        grid_size: 격자 한 변의 셀 수
+
+    Returns:
+        numpy.ndarray: (grid_size, grid_size) 크기의 가중치
+    """
+    center = grid_size // 2
+    rows, cols = np.indices((grid_size, grid_size))
+    dist = np.sqrt((rows - center) ** 2 + (cols - center) ** 2)
+    return 1 / (1 + dist)
+
+
+def weighted_main_object(cell_scores, grid_size=DEFAULT_GRID_SIZE):
+    """
+    셀별 선명도 점수에 중심 가중치를 곱한 뒤, 상위 25% 셀을 주요 객체 영역으로 보고
+    그 평균을 선명도 점수로 계산합니다.
+
+    Args:
+        cell_scores: (grid_size, grid_size) 크기의 셀별 선명도 점수
+        grid_size: 격자 한 변의 셀 수
+
+    Returns:
+        tuple: (grid_size x grid_size 주요 객체 셀 여부, 선명도 점수)
+    """
+    # 중심부 영역에 가중치 부여 (중심에 가까울수록 주요 객체일 가능성 높음)
+    weighted_scores = cell_scores * center_weights(grid_size)
+
+    # 상위 25% 점수를 가진 셀을 주요 객체 영역으로 간주
+    threshold = np.percentile(weighted_scores, 75)
+    main_object_cells = weighted_scores >= threshold
+
+    # 주요 객체 영역의 점수 평균 계산
+    return main_object_cells, float(np.mean(weighted_scores[main_object_cells]))
+
+
+def score_main_object(image, grid_size=DEFAULT_GRID_SIZE, metric=DEFAULT_METRIC):
+    """
+    주요 객체 영역의 선명도 점수를 계산합니다. (픽셀 크기 마스크를 만들지 않음)
+
+    Args:
+        image: 분석할 이미지 (RGB 또는 그레이스케일)
+        grid_size: 격자 한 변의 셀 수 (MIN_GRID_SIZE ~ MAX_GRID_SIZE, 기본값: 5)
+        metric (str): 선명도 지표 ("laplacian", "tenengrad", "fft")
+
+    Returns:
+        tuple: (grid_size x grid_size 주요 객체 셀 여부, 선명도 점수)
+    """
+    cell_scores = tile_metrics(to_gray(image), grid_size, [metric])[metric]
+    return weighted_main_object(cell_scores, grid_size)
+
+
+def detect_main_object(image, grid_size=DEFAULT_GRID_SIZE, metric=DEFAULT_METRIC):
+    """
+    이미지에서 주요 객체 영역을 감지합니다.
+    간단한 방법으로 이미지를 격자로 나누고, 각 영역의 Laplacian 분산 값이 가장 높은 영역을
+    주요 객체 영역으로 간주합니다.
+
+    Args:
+        image: 분석할 이미지
+        grid_size: 격자 한 변의 셀 수 (MIN_GRID_SIZE ~ MAX_GRID_SIZE, 기본값: 5)
+        metric (str): 선명도 지표 ("laplacian", "tenengrad", "fft")
+
+    Returns:
+        tuple: 주요 객체 영역의 마스크, 선명도 점수
+    """
+    height, width = image.shape[:2]
+    main_object_cells, score = score_main_object(image, grid_size, metric)
+
+    # 주요 객체 마스크 생성 (셀 단위 마스크를 픽셀 크기로 확장)
+    cell_h, cell_w = height // grid_size, width // grid_size
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cell_mask = np.broadcast_to(
+        (main_object_cells * np.uint8(255))[:, None, :, None],
+        (grid_size, cell_h, grid_size, cell_w),
+    )
+    mask[:grid_size * cell_h, :grid_size * cell_w] = cell_mask.reshape(grid_size * cell_h, grid_size * cell_w)
+
+    return mask, score
+
+
+def is_main_object_blurry(image, blur_threshold=70.0, grid_size=DEFAULT_GRID_SIZE,
+                          face_max_side=DEFAULT_DETECT_MAX_SIDE, profiler=None, metric=DEFAULT_METRIC, metrics=None,
+                          face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    주요 객체의 흐림 여부를 판단합니다.
+    사람이 주요 객체인 경우에는 얼굴이 흔들렸는지를 우선적으로 확인합니다.
+
+    판단은 metric 지표로 하고, metrics에 지정한 지표도 같은 그레이스케일 이미지와 같은 영역(얼굴 또는 격자)에서
+    함께 계산하여 metric_scores에 담습니다. (나중에 디코딩 없이 지표를 바꿔 재분류할 수 있음)
+
+    Args:
+        image: 분석할 이미지 (RGB 또는 그레이스케일 - 그레이스케일로 한 번만 변환하여 모든 판단에 사용)
+        blur_threshold: 흐림 판단 임계값 (metric 지표 기준)
+        grid_size: 주요 객체 감지용 격자 한 변의 셀 수
+        face_max_side: 얼굴 감지용 축소 이미지의 긴 변 크기 (None이면 원본 해상도)
+        profiler (Profiler): 단계별 시간 측정기 (None이면 측정하지 않음)
+        metric (str): 판단에 사용할 선명도 지표
+        metrics (list): 함께 계산하여 기록할 선명도 지표 목록
+        face_threshold_scale (float): 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        tuple: (is_blurry, main_object_score, faces, face_scores, metric_scores, face_metric_scores)
+            - 흐림 여부, 선명도 점수, 감지된 얼굴 좌표 목록, 각 얼굴의 선명도 점수 목록,
+              지표별 선명도 점수 dict, 지표별 얼굴 점수 목록 dict (얼굴이 없으면 빈 dict)
+    """
+    gray = to_gray(image)
+    names = metric_names(metric, metrics)
+
+    # 얼굴 감지 기능이 사용 가능한 경우
+    faces = []
+    if FACE_DETECTION_AVAILABLE:
+        # 얼굴 감지
+        with profiled(profiler, "faces"):
+            faces = [tuple(int(v) for v in face) for face in detect_faces(gray, max_side=face_max_side)]
+
+    # 얼굴이 감지된 경우
+    if faces:
+        print(f"사람 얼굴이 {len(faces)}개 감지되었습니다.")
+
+        # 얼굴 영역의 선명도 분석 (지표별 얼굴 점수의 평균)
+        with profiled(profiler, "faces"):
+            per_metric = {name: [region_sharpness(gray[y:y + h, x:x + w], name) for (x, y, w, h) in faces]
+                          for name in names}
+        metric_scores = {name: float(np.mean(values)) for name, values in per_metric.items()}
+        face_scores = per_metric[metric]
+        face_score = metric_scores[metric]
+        for score in face_scores:
+            print(f"얼굴 영역 선명도: {score:.2f}")
+
+        face_blur_threshold = effective_threshold(True, blur_threshold, face_threshold_scale)
+        print(f"얼굴 선명도: {face_score:.2f}, 얼굴 흐림 임계값: {face_blur_threshold:.2f}")
+
+        # 얼굴이 흐릿하면 전체 이미지가 흐릿한 것으로 판단
+        if face_score < face_blur_threshold:
+            print("얼굴이 흐릿하여 흔들린 사진으로 판단합니다.")
+            return True, face_score, faces, face_scores, metric_scores, per_metric
+        else:
+            print("얼굴이 선명하여 정상 사진으로 판단합니다.")
+            return False, face_score, faces, face_scores, metric_scores, per_metric
+
+    # 얼굴 감지 불가능하거나 얼굴이 감지되지 않은 경우: 일반적인 흐림 판단
+    with profiled(profiler, "main_object"):
+        cell_scores = tile_metrics(gray, grid_size, names)
+        metric_scores = {name: weighted_main_object(cells, grid_size)[1] for name, cells in cell_scores.items()}
+    score = metric_scores[metric]
+    print(f"주요 객체 선명도: {score:.2f}, 일반 흐림 임계값: {blur_threshold:.2f}")
+
+    # 주요 객체 영역이 임계값보다 낮으면 흐림으로 판단
+    is_blurry = score < blur_threshold
+
+    return is_blurry, score, [], [], metric_scores, {}
+
+
+def classify_score(main_object_score, has_faces, blur_threshold=70.0, face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    저장된 선명도 점수만으로 흐림 여부를 다시 판단합니다.
+    is_main_object_blurry와 같은 기준(얼굴이 있으면 face_threshold_scale배 임계값)을 사용하므로
+    디코딩 없이 임계값만 바꿔 재분류할 수 있습니다.
+
+    Args:
+        main_object_score: 선명도 점수 (얼굴이 있으면 얼굴 선명도 점수)
+        has_faces: 얼굴 감지 여부
+        blur_threshold: 흐림 판단 임계값
+        face_threshold_scale: 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        bool: 흐림 여부
+    """
+    return main_object_score < effective_threshold(has_faces, blur_threshold, face_threshold_scale)
+
+
+def effective_threshold(has_faces, blur_threshold=70.0, face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    실제 흐림 판단에 쓰는 임계값 (얼굴이 있으면 blur_threshold * face_threshold_scale)
+
+    Args:
+        has_faces: 얼굴 감지 여부
+        blur_threshold: 흐림 판단 임계값
+        face_threshold_scale: 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        float: 임계값
+    """
+    return blur_threshold * face_threshold_scale if has_faces else blur_threshold
+
+
+def needs_full_recheck(main_object_score, has_faces, blur_threshold=70.0, recheck_band=0.25,
+                       face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    빠른 디코딩 점수가 실제 임계값(effective_threshold) 주변 ±recheck_band 비율 안에 있어
+    전체 해상도로 다시 판단해야 하는지 확인합니다. (score_decoded와 ScoreCache.lookup에서 함께 사용)
+
+    Args:
+        main_object_score: 선명도 점수 (얼굴이 있으면 얼굴 선명도 점수)
+        has_faces: 얼굴 감지 여부
+        blur_threshold: 흐림 판단 임계값
+        recheck_band: 전체 해상도 재판단을 수행할 임계값 대비 비율
+        face_threshold_scale: 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        bool: 전체 해상도 재판단이 필요하면 True
+    """
+    threshold = effective_threshold(has_faces, blur_threshold, face_threshold_scale)
+    return abs(main_object_score - threshold) <= threshold * recheck_band
+
+
+def decode_raw(image_path, decode_mode="full"):
+    """
+    RAW 파일을 RGB 이미지로 디코딩합니다.
+
+    Args:
+        image_path (str): RAW 파일 경로
+        decode_mode (str): 디코딩 방식
+            - "full": 전체 해상도 디모자이크 (가장 느림)
+            - "half": rawpy의 half_size 디모자이크 (약 1/4 픽셀 수)
+            - "thumb": RAW에 내장된 JPEG 미리보기 추출 (가장 빠름)
+
+    Returns:
+        numpy.ndarray: RGB 이미지 (uint8)
+    """
+    with rawpy.imread(image_path) as raw:
+        if decode_mode == "half":
+            return raw.postprocess(half_size=True)
+
+        if decode_mode == "thumb":
+            thumb = raw.extract_thumb()
+            if thumb.format == rawpy.ThumbFormat.JPEG:
+                bgr = cv2.imdecode(np.frombuffer(thumb.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if bgr is None:
+                    raise ValueError("내장 미리보기 JPEG를 디코딩할 수 없습니다.")
+                return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            return thumb.data
+
+        return raw.postprocess()
+
+
+def image_dhash(gray, hash_size=8):
+    """
+    연사/중복 사진 묶음에 사용할 difference hash(dHash)를 계산합니다.
+    (hash_size+1) x hash_size로 축소한 뒤 가로로 이웃한 픽셀의 밝기 비교 결과를 비트로 사용합니다.
+
+    Args:
+        gray: 그레이스케일 이미지
+        hash_size (int): 해시 한 변의 크기 (비트 수 = hash_size^2)
+
+    Returns:
+        str: 16진수 해시 문자열 (hash_size=8이면 16자리)
+    """
+    # 전체 해상도를 INTER_AREA로 바로 줄이면 느리므로 먼저 간격을 두고 샘플링
+    step = max(1, min(gray.shape[:2]) // (hash_size * 32))
+    small = cv2.resize(gray[::step, ::step], (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+
+def score_image(rgb, blur_threshold=100.0, grid_size=DEFAULT_GRID_SIZE, face_max_side=DEFAULT_DETECT_MAX_SIDE,
+                profiler=None, metric=DEFAULT_METRIC, metrics=None, face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    디코딩된 RGB 이미지의 흐림 여부와 선명도 점수를 계산합니다.
+
+    Args:
+        rgb: 분석할 RGB 이미지
+        blur_threshold (float): 흐림 판단 기준값
+        grid_size (int): 주요 객체 감지용 격자 한 변의 셀 수
+        face_max_side (int): 얼굴 감지용 축소 이미지의 긴 변 크기 (None이면 원본 해상도)
+        profiler (Profiler): 단계별 시간 측정기 (None이면 측정하지 않음)
+        metric (str): 판단에 사용할 선명도 지표
+        metrics (list): 함께 계산하여 기록할 선명도 지표 목록
+        face_threshold_scale (float): 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        dict: 처리 결과 (is_blurry, tags, lap_var, main_object_score, faces, face_scores, metric_scores,
+              face_metric_scores, dhash, frame_pixels)
+    """
+    # 그레이스케일 변환은 한 번만 수행하고 모든 판단(얼굴, 주요 객체, 전체 Laplacian, dHash)에서 공유
+    with profiled(profiler, "gray"):
+        gray = to_gray(rgb)
+
+    # 향상된 흐림 판단 - 주요 객체 중심으로 분석
+    is_blurry, main_object_score, faces, face_scores, metric_scores, face_metric_scores = is_main_object_blurry(
+        gray, blur_threshold, grid_size, face_max_side, profiler, metric, metrics, face_threshold_scale)
+
+    # 전체 이미지에 대한 Laplacian 분산도 계산 (참고용)
+    with profiled(profiler, "laplacian"):
+        laplacian_var = laplacian_variance(gray)
+        dhash = image_dhash(gray)
+    del gray
+
+    return {
+        "is_blurry": bool(is_blurry),
+        "tags": [],
+        "lap_var": float(laplacian_var),
+        "main_object_score": float(main_object_score),
+        "faces": faces,
+        "face_scores": face_scores,
+        "metric_scores": metric_scores,
+        "face_metric_scores": face_metric_scores,
+        "dhash": dhash,
+        "frame_pixels": rgb.shape[0] * rgb.shape[1],
+    }
+
+
+def decode_for_scoring(image_path, decode_mode="full"):
+    """
+    흐림 판단용으로 RAW 파일을 디코딩합니다.
+    빠른 디코딩에 실패하면(내장 미리보기가 없는 경우 등) 전체 해상도로 처리합니다.
+
+    Args:
+        image_path (str): ARW 파일 경로
+        decode_mode (str): 디코딩 방식 ("full", "half", "thumb")
+
+    Returns:
+        tuple: (RGB 이미지, 실제 사용한 디코딩 방식) - 디코딩 실패 시 (None, None)
+    """
+    if decode_mode != "full":
+        try:
+            return decode_raw(image_path, decode_mode), decode_mode
+        except Exception as e:
+            print(f"{image_path}: 빠른 디코딩({decode_mode}) 실패, 전체 해상도로 처리합니다: {str(e)}")
+
+    try:
+        return decode_raw(image_path, "full"), "full"
+    except Exception as e:
+        print(f"Error processing {image_path}: {str(e)}")
+        return None, None
+
+
+def score_decoded(image_path, rgb, blur_threshold=100.0, decode_mode="full", recheck_band=0.25,
+                  grid_size=DEFAULT_GRID_SIZE, face_max_side=DEFAULT_DETECT_MAX_SIDE, profiler=None,
+                  metric=DEFAULT_METRIC, metrics=None, face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    decode_for_scoring으로 디코딩한 이미지의 흐림 여부와 선명도 점수를 계산합니다.
+
+    빠른 디코딩("half", "thumb") 이미지의 점수가 임계값 주변(임계값 * (1 ± recheck_band))
+    구간에 들어오는 애매한 경우에만 전체 해상도로 다시 디코딩하여 판단합니다.
+    얼굴이 감지되면 classify_score와 같이 blur_threshold * face_threshold_scale을 기준으로 합니다.
+
+    Args:
+        image_path (str): ARW 파일 경로
+        rgb: 디코딩된 RGB 이미지
+        blur_threshold (float): 흐림 판단 기준값
+        decode_mode (str): rgb를 만들 때 사용한 디코딩 방식 ("full", "half", "thumb")
+        recheck_band (float): 전체 해상도 재판단을 수행할 임계값 대비 비율
+        grid_size (int): 주요 객체 감지용 격자 한 변의 셀 수
+        face_max_side (int): 얼굴 감지용 축소 이미지의 긴 변 크기 (None이면 원본 해상도)
+        profiler (Profiler): 단계별 시간 측정기 (None이면 측정하지 않음)
+        metric (str): 판단에 사용할 선명도 지표
+        metrics (list): 함께 계산하여 기록할 선명도 지표 목록
+        face_threshold_scale (float): 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        tuple: (결과 dict, RGB 이미지) - 재디코딩 실패 시 (None, None)
+        결과 dict의 decode_seconds는 재디코딩 시간(없으면 0), score_seconds는 흐림 판단 시간입니다.
+    """
+    started = time.perf_counter()
+    result = score_image(rgb, blur_threshold, grid_size, face_max_side, profiler, metric, metrics,
+                         face_threshold_scale)
+    score_seconds = time.perf_counter() - started
+    decode_seconds = 0.0
+
+    if decode_mode != "full":
+        if not needs_full_recheck(result["main_object_score"], len(result["faces"]) > 0, blur_threshold,
+                                  recheck_band, face_threshold_scale):
+            result.update(decode_mode=decode_mode, decode_seconds=decode_seconds, score_seconds=score_seconds)
+            return result, rgb
+
+        print(f"{image_path}: 점수가 임계값 근처라 전체 해상도로 다시 판단합니다.")
+        del rgb
+        started = time.perf_counter()
+        with profiled(profiler, "decode"):
+            rgb, decode_mode = decode_for_scoring(image_path, "full")
+        decode_seconds = time.perf_counter() - started
+        if rgb is None:
+            return None, None
+        started = time.perf_counter()
+        result = score_image(rgb, blur_threshold, grid_size, face_max_side, profiler, metric, metrics,
+                             face_threshold_scale)
+        score_seconds += time.perf_counter() - started
+
+    result.update(decode_mode="full", decode_seconds=decode_seconds, score_seconds=score_seconds)
+    return result, rgb
+
+
+def score_arw(image_path, blur_threshold=100.0, decode_mode="full", recheck_band=0.25,
+              grid_size=DEFAULT_GRID_SIZE, face_max_side=DEFAULT_DETECT_MAX_SIDE, profiler=None,
+              metric=DEFAULT_METRIC, metrics=None, face_threshold_scale=FACE_THRESHOLD_SCALE):
+    """
+    ARW 파일을 디코딩하여 흐림 여부와 선명도 점수를 계산합니다.
+
+    decode_mode가 "half" 또는 "thumb"이면 먼저 빠른 디코딩으로 점수를 계산하고,
+    애매한 경우에만 전체 해상도로 다시 판단합니다. (score_decoded 참고)
+
+    Args:
+        image_path (str): ARW 파일 경로
+        blur_threshold (float): 흐림 판단 기준값
+        decode_mode (str): 디코딩 방식 ("full", "half", "thumb")
+        recheck_band (float): 전체 해상도 재판단을 수행할 임계값 대비 비율
+        grid_size (int): 주요 객체 감지용 격자 한 변의 셀 수
+        face_max_side (int): 얼굴 감지용 축소 이미지의 긴 변 크기 (None이면 원본 해상도)
+        profiler (Profiler): 단계별 시간 측정기 (None이면 측정하지 않음)
+        metric (str): 판단에 사용할 선명도 지표
+        metrics (list): 함께 계산하여 기록할 선명도 지표 목록
+        face_threshold_scale (float): 얼굴 영역에 적용할 임계값 배율
+
+    Returns:
+        tuple: (결과 dict, RGB 이미지) - 디코딩 실패 시 (None, None)
+    """
+    # 1. ARW → RGB
+    started = time.perf_counter()
+    with profiled(profiler, "decode"):
+        rgb, used_mode = decode_for_scoring(image_path, decode_mode)
+    decode_seconds = time.perf_counter() - started
+    if rgb is None:
+        return None, None
+
+    # 2. 흐림 판단
+    result, rgb = score_decoded(image_path, rgb, blur_threshold, used_mode, recheck_band, grid_size, face_max_side,
+                                profiler, metric, metrics, face_threshold_scale)
+    if result is not None:
+        result["decode_seconds"] += decode_seconds
+    return result, rgb
+
+
+def make_caption_preview(rgb, size):
+    """
+    캡션 모델 입력 크기로 축소한 이미지를 만듭니다.
+    전체 해상도 RGB 배열 대신 이 작은 이미지만 보관/전송하여 메모리 사용량을 줄입니다.
+
+    Args:
+        rgb: RGB 이미지
+        size (tuple): (width, height)
+
+    Returns:
+        numpy.ndarray: 축소된 RGB 이미지
+    """
+    return cv2.resize(rgb, tuple(size), interpolation=cv2.INTER_AREA)
+
+
+def score_arw_worker(image_path, blur_threshold=100.0, preview_size=None, profile=False, **score_options):
+    """
+    프로세스 풀 워커에서 실행되는 score_arw 래퍼입니다.
+
+    RGB 배열은 프로세스 간 전송 비용이 크므로, 태그 생성이 필요한 선명한 사진
+    (preview_size 지정)인 경우에만 캡션 모델 입력 크기로 축소하여 부모 프로세스로 돌려줍니다.
+
+    Args:
+        image_path (str): ARW 파일 경로
+        blur_threshold (float): 흐림 판단 기준값
+        preview_size (tuple): 캡션용 축소 이미지 크기 (width, height), None이면 반환하지 않음
+        profile (bool): 단계별 시간과 peak RSS를 result["profile"], result["peak_rss_mb"]에 기록
+        **score_options: score_arw에 전달할 옵션
+            (decode_mode, recheck_band, grid_size, face_max_side, metric, metrics, face_threshold_scale)
+
+    Returns:
+        tuple: (결과 dict, 캡션용 축소 이미지 또는 None)
+    """
+    profiler = Profiler() if profile else None
+    result, rgb = score_arw(image_path, blur_threshold, profiler=profiler, **score_options)
+    if result is not None and profiler is not None:
+        result["profile"] = profiler.as_dict()
+        result["peak_rss_mb"] = peak_rss_mb()
+    preview = None
+    if result is not None and not result["is_blurry"] and preview_size is not None:
+        preview = make_caption_preview(rgb, preview_size)
+    # 캡션 단계로 넘어가기 전에 전체 해상도 이미지 해제
+    del rgb
+    return result, preview
+
+
+def decode_preview_worker(image_path, decode_mode="full", preview_size=None):
+    """
+    캐시된 점수를 사용해 흐림 판단을 건너뛴 사진의 캡션용 축소 이미지를 만듭니다.
+
+    Args:
+        image_path (str): ARW 파일 경로
+        decode_mode (str): 디코딩 방식 ("full", "half", "thumb")
+        preview_size (tuple): 캡션용 축소 이미지 크기 (width, height)
+
+    Returns:
+        numpy.ndarray: 캡션용 축소 이미지 (디코딩 실패 시 None)
+    """
+    try:
+        return make_caption_preview(decode_raw(image_path, decode_mode), preview_size)
+    except Exception as e:
+        print(f"Error processing {image_path}: {str(e)}")
+        return None
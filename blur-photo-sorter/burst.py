@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+연사(burst) / 중복 사진 묶음 모듈
+
+흐림 판단 때 계산한 dHash(blur_detection.image_dhash)와 촬영 시각으로
+시간 간격(time_window) 안에서 해밍 거리가 max_distance 이하인 사진을 하나의 연사 묶음으로 모읍니다.
+묶음마다 가장 선명한 사진(keeper)만 남기고 캡션도 keeper만 생성하도록 하여
+스포츠 촬영처럼 비슷한 사진이 많은 경우 BLIP 호출 수를 크게 줄입니다.
+"""
+
+import os
+
+# dHash 64비트 중 이 개수 이하로 다르면 같은 장면으로 판단
+DEFAULT_MAX_DISTANCE = 10
+
+# 이 시간(초) 안에 촬영된 사진만 같은 연사 묶음이 될 수 있음
+DEFAULT_TIME_WINDOW = 2.0
+
+
+def hamming_distance(a, b):
+    """두 정수 해시의 해밍 거리(다른 비트 수)를 계산합니다."""
+    return bin(a ^ b).count("1")
+
+
+def capture_time(image_path):
+    """
+    촬영 시각을 반환합니다.
+    카메라가 메모리 카드에 기록한 파일 수정 시각을 사용합니다. (복사할 때 수정 시각이 보존되어야 함)
+
+    Args:
+        image_path (str): 이미지 파일 경로
+
+    Returns:
+        float: 촬영 시각 (epoch 초)
+    """
+    return os.stat(image_path).st_mtime
+
+
+class BKTree:
+    """
+    해밍 거리 기반 BK-tree.
+    search(value, radius)는 거리 radius 이하인 항목만 찾으며, 삼각 부등식으로 대부분의 노드를 건너뜁니다.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        """
+        해시와 항목을 추가합니다.
+
+        Args:
+            value (int): 해시 값
+            item: 함께 저장할 항목
+        """
+        self.size += 1
+        node = [value, [item], {}]
+        if self.root is None:
+            self.root = node
+            return
+
+        current = self.root
+        while True:
+            distance = hamming_distance(value, current[0])
+            if distance == 0:
+                current[1].append(item)
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value, radius):
+        """
+        거리 radius 이하인 항목을 찾습니다.
+
+        Args:
+            value (int): 찾을 해시 값
+            radius (int): 최대 해밍 거리
+
+        Returns:
+            list: (거리, 항목) 목록
+        """
+        found = []
+        if self.root is None:
+            return found
+
+        stack = [self.root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= radius:
+                found.extend((distance, item) for item in items)
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class Burst:
+    """연사 묶음 하나. frames는 (항목, 촬영 시각, 해시, 선명도 점수) 목록입니다."""
+
+    def __init__(self, group=None):
+        self.group = group
+        self.frames = []
+        self.first_time = None
+        self.last_time = None
+
+    def add(self, item, taken_at, value, score):
+        self.frames.append((item, taken_at, value, score))
+        self.first_time = taken_at if self.first_time is None else min(self.first_time, taken_at)
+        self.last_time = taken_at if self.last_time is None else max(self.last_time, taken_at)
+
+    def split(self):
+        """
+        가장 선명한 사진과 나머지 사진으로 나눕니다.
+
+        Returns:
+            tuple: (keeper 항목, 나머지 항목 목록)
+        """
+        keeper = max(self.frames, key=lambda frame: frame[3])
+        others = [frame[0] for frame in self.frames if frame is not keeper]
+        return keeper[0], others
+
+
+class BurstGrouper:
+    """
+    촬영 시각 순서로 들어오는 사진을 연사 묶음으로 모으는 스트리밍 그룹화기.
+
+    add()로 사진을 하나씩 넣으면, 새 사진의 촬영 시각에서 time_window보다 멀어진 묶음은
+    더 이상 사진이 추가될 수 없으므로 닫아서 반환합니다. 남은 묶음은 flush()로 받습니다.
+    열린 묶음의 사진만 BK-tree에 넣어 두므로 검색 비용은 전체 사진 수와 무관합니다.
+
+    사진은 group(폴더)마다 촬영 시각 순서로 들어와야 하며, 같은 group의 사진끼리만 묶습니다.
+    scanner.iter_raw_files(sort_by_time=True)는 폴더 안에서만 정렬하므로 폴더 사이에서는 시각이
+    거꾸로 갈 수 있는데, 다른 group의 사진은 촬영 시각이 앞으로 time_window보다 멀어진 경우에만
+    묶음을 닫아 아직 사진이 남은 묶음을 일찍 닫지 않습니다.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, time_window=DEFAULT_TIME_WINDOW):
+        """
+        Args:
+            max_distance (int): 같은 묶음으로 판단할 최대 해밍 거리
+            time_window (float): 같은 묶음으로 판단할 최대 촬영 시각 차이 (초)
+        """
+        self.max_distance = max_distance
+        self.time_window = time_window
+        self.open_bursts = []
+        self.tree = BKTree()
+        self.frames = 0
+        self.bursts = 0
+
+    def _close_expired(self, taken_at, group):
+        closed, still_open = [], []
+        for burst in self.open_bursts:
+            expired = taken_at - burst.last_time > self.time_window or \
+                (burst.group == group and burst.first_time - taken_at > self.time_window)
+            (closed if expired else still_open).append(burst)
+        if closed:
+            self.open_bursts = still_open
+            # BK-tree는 삭제를 지원하지 않으므로 열린 묶음의 사진으로 다시 만든다
+            self.tree = BKTree()
+            for burst in self.open_bursts:
+                for _, frame_time, value, _ in burst.frames:
+                    self.tree.add(value, (burst, frame_time))
+        return closed
+
+    def add(self, item, taken_at, dhash, score, group=None):
+        """
+        사진 하나를 묶음에 추가합니다.
+
+        Args:
+            item: 묶음과 함께 돌려받을 항목
+            taken_at (float): 촬영 시각 (초)
+            dhash (str): 16진수 dHash
+            score (float): 선명도 점수 (가장 높은 사진이 keeper)
+            group: 같은 값끼리만 묶을 그룹 (예: 폴더 경로, None이면 모두 한 그룹)
+
+        Returns:
+            list: 이번 호출로 닫힌 Burst 목록
+        """
+        closed = self._close_expired(taken_at, group)
+        value = int(dhash, 16)
+
+        # 같은 그룹에서 시간 간격 안에 있는 가장 비슷한 사진의 묶음에 합류
+        best = None
+        for distance, (burst, frame_time) in self.tree.search(value, self.max_distance):
+            if burst.group == group and abs(taken_at - frame_time) <= self.time_window \
+                    and (best is None or distance < best[0]):
+                best = (distance, burst)
+
+        if best is None:
+            burst = Burst(group)
+            self.open_bursts.append(burst)
+            self.bursts += 1
+        else:
+            burst = best[1]
+        burst.add(item, taken_at, value, score)
+        self.tree.add(value, (burst, taken_at))
+        self.frames += 1
+        return closed
+
+    def flush(self):
+        """
+        열려 있는 모든 묶음을 닫습니다.
+
+        Returns:
+            list: Burst 목록
+        """
+        closed, self.open_bursts = self.open_bursts, []
+        self.tree = BKTree()
+        return closed
+
+
+def resolve_burst(burst):
+    """
+    닫힌 연사 묶음에서 keeper를 고르고, 나머지 사진의 결과에 keeper 경로를 표시합니다.
+    묶음 항목은 (파일 경로, 캐시 키, 처리 결과, 캡션용 축소 이미지) 형식이어야 합니다.
+
+    Args:
+        burst (Burst): 닫힌 연사 묶음
+
+    Returns:
+        tuple: (keeper 항목, 나머지 항목 목록) - 나머지 항목의 result["burst_keeper"]에 keeper 경로 저장
+    """
+    keeper, others = burst.split()
+    for item in others:
+        item[2]["burst_keeper"] = keeper[0]
+    return keeper, others
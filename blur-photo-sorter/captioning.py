@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BLIP 캡션 생성 및 태그 추출 모듈
+
+선명한 사진을 모아 BlipForConditionalGeneration.generate를 배치 단위로 실행합니다.
+transformers, NLTK, BLIP 가중치는 처음 캡션을 생성할 때 로드하므로
+모든 사진이 흐리거나 태그를 만들지 않는 경우에는 로드하지 않습니다.
+"""
+
+import time
+from functools import lru_cache
+
+DEFAULT_CAPTION_MODEL = "Salesforce/blip-image-captioning-base"
+
+DEFAULT_BATCH_SIZE = 8
+
+# 캡션에서 추출할 최대 태그 수
+MAX_TAGS = 5
+
+# 프로세서 설정에서 입력 크기를 알 수 없을 때 사용할 기본값 (BLIP base)
+DEFAULT_INPUT_SIZE = (384, 384)
+
+# NLTK 불용어에 추가로 제거할 수 있는 일반적인 단어들
+ADDITIONAL_STOPWORDS = {'of', 'with', 'in', 'on', 'at', 'from', 'to', 'for'}
+
+# NLTK를 사용할 수 없을 때의 기본 불용어 목록
+DEFAULT_STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'but', 'if', 'because', 'as', 'what',
+                     'which', 'this', 'that', 'these', 'those', 'then', 'just', 'so', 'than',
+                     'such', 'when', 'who', 'how', 'where', 'why', 'of', 'with', 'in', 'on',
+                     'at', 'from', 'to', 'for'}
+
+
+@lru_cache(maxsize=None)
+def load_stopwords():
+    """
+    영어 불용어 목록을 로드합니다. (처음 호출할 때 한 번만 로드)
+    NLTK stopwords 데이터가 로컬에 없을 때만 다운로드를 시도합니다.
+
+    Returns:
+        frozenset: 불용어 목록
+    """
+    try:
+        from nltk.corpus import stopwords
+    except ImportError:
+        print("NLTK 라이브러리를 가져올 수 없습니다. 기본 불용어 목록을 사용합니다.")
+        return frozenset(DEFAULT_STOPWORDS)
+
+    try:
+        words = set(stopwords.words('english'))
+    except LookupError:
+        try:
+            import nltk
+            print("NLTK 데이터 다운로드 중...")
+            nltk.download('stopwords', quiet=True)
+            words = set(stopwords.words('english'))
+        except Exception as e:
+            print(f"경고: NLTK stopwords 데이터를 로드할 수 없습니다: {str(e)}")
+            return frozenset(DEFAULT_STOPWORDS)
+
+    words.update(ADDITIONAL_STOPWORDS)
+    return frozenset(words)
+
+
+def load_model(model_name=DEFAULT_CAPTION_MODEL):
+    """
+    이미지 태깅을 위한 모델과 프로세서를 로드합니다.
+
+    Args:
+        model_name (str): Hugging Face 모델 이름
+
+    Returns:
+        tuple: (model, processor) - 로드에 실패하면 (None, None)
+    """
+    try:
+        from transformers import BlipProcessor, BlipForConditionalGeneration
+    except ImportError:
+        print("transformers 라이브러리를 가져올 수 없습니다. 태그 생성 기능이 비활성화됩니다.")
+        return None, None
+
+    try:
+        processor = BlipProcessor.from_pretrained(model_name)
+        model = BlipForConditionalGeneration.from_pretrained(model_name)
+        return model, processor
+    except Exception as e:
+        print(f"Warning: Failed to load image tagging model: {str(e)}")
+        print("Will proceed without tagging functionality.")
+        return None, None
+
+
+def processor_input_size(processor):
+    """
+    BLIP 프로세서가 모델 입력으로 리사이즈하는 이미지 크기를 구합니다.
+
+    Args:
+        processor: BlipProcessor
+
+    Returns:
+        tuple: (width, height)
+    """
+    size = getattr(getattr(processor, "image_processor", None), "size", None)
+    if isinstance(size, dict) and "width" in size and "height" in size:
+        return size["width"], size["height"]
+    return DEFAULT_INPUT_SIZE
+
+
+def caption_to_tags(caption, stopwords=None, max_tags=MAX_TAGS):
+    """
+    캡션에서 불용어를 제외한 단어를 태그로 추출합니다.
+
+    Args:
+        caption (str): 생성된 캡션
+        stopwords (set): 제외할 불용어 목록 (기본값: load_stopwords())
+        max_tags (int): 최대 태그 수
+
+    Returns:
+        list: 태그 목록
+    """
+    if stopwords is None:
+        stopwords = load_stopwords()
+
+    words = caption.lower().split()
+    filtered_words = [word for word in words if word not in stopwords and len(word) > 1]
+    tags = filtered_words[:max_tags]
+
+    if not tags:  # 필터링 후 태그가 없으면 기본 단어 사용
+        tags = words[:max_tags]
+    return tags
+
+
+class BatchCaptioner:
+    """
+    선명한 사진의 캡션을 배치 단위로 생성합니다.
+
+    add()로 프로세서 입력 크기로 축소된 이미지를 모으다가 batch_size가 차면
+    한 번의 generate 호출로 캡션을 만들고, 남은 이미지는 flush()로 처리합니다.
+    model/processor를 전달하지 않으면 첫 배치를 처리할 때 model_name의 모델을 로드합니다.
+    """
+
+    def __init__(self, model=None, processor=None, batch_size=DEFAULT_BATCH_SIZE, model_name=DEFAULT_CAPTION_MODEL):
+        """
+        Args:
+            model: BlipForConditionalGeneration (None이면 처음 사용할 때 로드)
+            processor: BlipProcessor (None이면 처음 사용할 때 로드)
+            batch_size (int): 한 번에 캡션을 생성할 이미지 수
+            model_name (str): 지연 로드할 Hugging Face 모델 이름
+        """
+        self.model = model
+        self.processor = processor
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.input_size = processor_input_size(processor) if processor is not None else DEFAULT_INPUT_SIZE
+        self.pending = []
+        self._load_failed = False
+        # --profile용 배치별 (경과 시간, CPU 시간, 이미지 수) - 모델 로드 시간은 제외
+        self.timings = []
+
+    def _ensure_model(self):
+        """모델이 아직 없으면 로드합니다. 로드에 실패하면 다시 시도하지 않습니다."""
+        if self.model is None or self.processor is None:
+            if self._load_failed:
+                return False
+            print(f"캡션 모델을 로드합니다: {self.model_name}")
+            self.model, self.processor = load_model(self.model_name)
+            if self.model is None or self.processor is None:
+                self._load_failed = True
+                return False
+        return True
+
+    def add(self, key, preview):
+        """
+        캡션 생성 대기열에 이미지를 추가합니다.
+
+        Args:
+            key: 결과와 함께 돌려받을 식별자 (예: 파일 경로)
+            preview: input_size로 축소된 RGB 이미지 (numpy 배열)
+
+        Returns:
+            list: 배치가 가득 차서 처리된 (key, caption) 목록 (아직 처리되지 않았으면 빈 목록)
+        """
+        self.pending.append((key, preview))
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        대기 중인 이미지의 캡션을 한 번에 생성합니다.
+
+        Returns:
+            list: (key, caption) 목록 - 캡션 생성에 실패하면 caption은 None
+        """
+        if not self.pending:
+            return []
+
+        batch, self.pending = self.pending, []
+        keys = [key for key, _ in batch]
+        if not self._ensure_model():
+            return [(key, None) for key in keys]
+
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            from PIL import Image
+            images = [Image.fromarray(preview) for _, preview in batch]
+            inputs = self.processor(images=images, return_tensors="pt")
+            out = self.model.generate(**inputs)
+            captions = self.processor.batch_decode(out, skip_special_tokens=True)
+        except Exception as e:
+            print(f"캡션 생성 중 오류 발생 ({len(batch)}개): {str(e)}")
+            return [(key, None) for key in keys]
+        finally:
+            self.timings.append((time.perf_counter() - wall, time.thread_time() - cpu, len(batch)))
+
+        return list(zip(keys, captions))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CLI 시작 시간 점검 스크립트
+
+- `main.py --help`
+- 빈 폴더에 대한 `main.py --no-tag` 실행
+
+을 각각 새 프로세스로 여러 번 실행하여 중앙값이 예산(초)을 넘으면 실패(exit 1)합니다.
+--no-tag 실행에서는 NLTK, transformers, torch가 import되지 않았는지도 확인하고,
+--help 실행에서는 여기에 더해 cv2, numpy, rawpy, PIL도 import되지 않았는지 확인합니다.
+
+사용법:
+    python check_startup.py
+    python check_startup.py --repeat 10 --help-budget 0.5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(HERE, "main.py")
+
+DEFAULT_HELP_BUDGET = 1.0
+DEFAULT_NO_TAG_BUDGET = 2.0
+
+# --no-tag 실행에서 로드되면 안 되는 모듈
+HEAVY_MODULES = ("nltk", "transformers", "torch")
+
+# --help 실행에서 로드되면 안 되는 모듈 (이미지 처리 모듈은 인자 확인 뒤에 로드)
+HELP_HEAVY_MODULES = ("cv2", "numpy", "rawpy", "PIL") + HEAVY_MODULES
+
+# main()을 실행한 뒤 로드된 무거운 모듈을 stderr 마지막 줄로 출력하는 코드
+_RUNNER = """
+import runpy, sys
+sys.argv = ["main.py"] + sys.argv[1:]
+try:
+    runpy.run_path({main!r}, run_name="__main__")
+except SystemExit:
+    pass
+print("LOADED=" + ",".join(m for m in {modules!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def time_command(command, repeat):
+    """
+    명령을 repeat번 실행하여 실행 시간 목록과 마지막 실행 결과를 반환합니다.
+
+    Returns:
+        tuple: (실행 시간 목록(초), subprocess.CompletedProcess)
+    """
+    timings = []
+    completed = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=HERE, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+    return timings, completed
+
+
+def report(name, timings, budget):
+    """측정 결과를 출력하고 예산 이내인지 반환합니다."""
+    median = statistics.median(timings)
+    ok = median <= budget
+    status = "OK" if ok else "초과"
+    print(f"{name}: 중앙값 {median:.3f}s, 최소 {min(timings):.3f}s, 최대 {max(timings):.3f}s "
+          f"(예산 {budget:.2f}s) - {status}")
+    return ok
+
+
+def check_loaded(name, completed):
+    """_RUNNER가 출력한 마지막 줄을 확인하여 무거운 모듈이 로드되지 않았는지 반환합니다."""
+    loaded = completed.stderr.strip().splitlines()[-1].split("=", 1)[1]
+    if loaded:
+        print(f"{name} 실행에서 무거운 모듈이 로드되었습니다: {loaded}")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="blur-photo-sorter CLI 시작 시간 점검")
+    parser.add_argument("--repeat", type=int, default=5, help="명령별 실행 횟수 (기본값: 5)")
+    parser.add_argument("--help-budget", type=float, default=DEFAULT_HELP_BUDGET,
+                        help=f"--help 예산(초) (기본값: {DEFAULT_HELP_BUDGET})")
+    parser.add_argument("--no-tag-budget", type=float, default=DEFAULT_NO_TAG_BUDGET,
+                        help=f"빈 폴더 --no-tag 실행 예산(초) (기본값: {DEFAULT_NO_TAG_BUDGET})")
+    args = parser.parse_args()
+
+    ok = True
+
+    # 1. --help
+    runner = _RUNNER.format(main=MAIN_PATH, modules=HELP_HEAVY_MODULES)
+    timings, completed = time_command([sys.executable, "-c", runner, "--help"], args.repeat)
+    if completed.returncode != 0:
+        print(f"--help 실행 실패:\n{completed.stderr}")
+        return 1
+    ok &= report("--help", timings, args.help_budget)
+    ok &= check_loaded("--help", completed)
+
+    # 2. 빈 폴더에 대한 --no-tag 실행
+    with tempfile.TemporaryDirectory() as src:
+        runner = _RUNNER.format(main=MAIN_PATH, modules=HEAVY_MODULES)
+        timings, completed = time_command([sys.executable, "-c", runner, "--src", src, "--no-tag", "--no-cache"],
+                                          args.repeat)
+    if completed.returncode != 0:
+        print(f"--no-tag 실행 실패:\n{completed.stderr}")
+        return 1
+    ok &= report("--no-tag (빈 폴더)", timings, args.no_tag_budget)
+    ok &= check_loaded("--no-tag", completed)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+명령행 인자 기본값 모듈
+
+main.py의 인자 정의(--help)에 필요한 기본값만 모아 두었습니다.
+cv2, numpy, rawpy를 import 하지 않으므로 --help는 이 모듈만으로 출력할 수 있고,
+흐림 판단 모듈(sharpness, blur_detection, face_detection, score_cache)은 여기의 값을 가져다 씁니다.
+"""
+
+# 선명도 지표 (sharpness 모듈 참고)
+METRICS = ("laplacian", "tenengrad", "fft")
+DEFAULT_METRIC = "laplacian"
+
+# 지표별 기본 흐림 판단 임계값
+# benchmark.py 합성 이미지에 가우시안 블러를 단계별로 적용했을 때 laplacian 70과 같은 블러 정도(sigma 약 0.6)의 값
+# 실제 사진에서는 --report로 점수 분포를 확인하여 --threshold로 조정하세요
+DEFAULT_THRESHOLDS = {"laplacian": 70.0, "tenengrad": 380.0, "fft": 7.0}
+
+# 얼굴 영역은 중요하므로, 일반 기준보다 더 엄격한 임계값(기본 1.3배) 적용 (--face-threshold-scale)
+FACE_THRESHOLD_SCALE = 1.3
+
+# 주요 객체 감지용 격자 크기 (grid_size x grid_size)
+DEFAULT_GRID_SIZE = 5
+MIN_GRID_SIZE = 5
+MAX_GRID_SIZE = 64
+
+# 얼굴 감지는 긴 변이 이 크기(픽셀)가 되도록 축소한 이미지에서 수행합니다
+DEFAULT_DETECT_MAX_SIDE = 1600
+
+DEFAULT_CACHE_NAME = ".blur_scores.sqlite"
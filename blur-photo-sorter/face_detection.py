@@ -5,26 +5,87 @@
 얼굴 감지 및 선명도 분석을 위한 유틸리티 모듈
 """
 
+import threading
+
 import cv2
 import numpy as np
 
-def detect_faces(image, cascade_path=None):
+from defaults import DEFAULT_DETECT_MAX_SIDE
+
+# OpenCV의 얼굴 감지기를 위한 기본 경로 설정
+DEFAULT_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
+# 원본 해상도 기준 최소 얼굴 크기 (픽셀)
+MIN_FACE_SIZE = 30
+
+# 캐스케이드 레지스트리 (XML 파싱은 프로세스/스레드마다 경로별로 한 번만 수행)
+# CascadeClassifier는 여러 스레드에서 동시에 사용하면 안전하지 않으므로 스레드별로 보관합니다
+_cascades = threading.local()
+
+
+def get_cascade(cascade_path=None):
+    """
+    Haar 캐스케이드를 로드합니다. 한 번 로드한 캐스케이드는 재사용합니다.
+
+    Args:
+        cascade_path: Haar 캐스케이드 XML 파일 경로 (기본값: OpenCV 내장 경로)
+
+    Returns:
+        cv2.CascadeClassifier: 로드된 캐스케이드
+    """
+    if cascade_path is None:
+        cascade_path = DEFAULT_CASCADE_PATH
+
+    registry = getattr(_cascades, "registry", None)
+    if registry is None:
+        registry = _cascades.registry = {}
+
+    cascade = registry.get(cascade_path)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(cascade_path)
+        if cascade.empty():
+            raise ValueError(f"캐스케이드 파일을 로드할 수 없습니다: {cascade_path}")
+        registry[cascade_path] = cascade
+    return cascade
+
+
+def min_face_size(scale, window=(24, 24)):
+    """
+    축소한 감지용 이미지에서 사용할 최소 얼굴 크기를 계산합니다.
+
+    MIN_FACE_SIZE를 축소 비율만큼 줄이되, 캐스케이드의 기본 감지 창(window)보다 작게 하지 않습니다.
+    감지 창보다 작은 값은 최소 크기 제한이 없는 것과 같아 작은 무늬가 얼굴로 감지되기 쉽고,
+    얼굴로 감지되면 더 엄격한 얼굴 임계값이 적용되기 때문입니다.
+    (6000px 사진을 1600px로 축소하면 원본 기준 약 90px보다 작은 얼굴은 감지하지 않음)
+
+    Args:
+        scale (float): 감지용 이미지의 축소 비율 (1.0이면 원본 해상도)
+        window (tuple): 캐스케이드의 기본 감지 창 크기 (w, h)
+
+    Returns:
+        tuple: detectMultiScale의 minSize (w, h)
+    """
+    return (max(window[0], round(MIN_FACE_SIZE * scale)), max(window[1], round(MIN_FACE_SIZE * scale)))
+
+
+def detect_faces(image, cascade_path=None, max_side=DEFAULT_DETECT_MAX_SIDE):
     """
     이미지에서 얼굴을 감지합니다.
 
+    큰 이미지는 긴 변이 max_side가 되도록 축소한 그레이스케일 이미지에서 감지한 뒤,
+    얼굴 좌표를 원본 해상도로 되돌려 반환합니다.
+
     Args:
-        image: 분석할 RGB 이미지
+        image: 분석할 RGB 이미지 (이미 변환한 그레이스케일 이미지를 넘기면 변환을 생략)
         cascade_path: Haar 캐스케이드 XML 파일 경로 (기본값: OpenCV 내장 경로)
+        max_side: 감지에 사용할 이미지의 긴 변 최대 크기 (None이면 원본 해상도에서 감지)
 
     Returns:
         list: 감지된 얼굴의 좌표 (x, y, w, h) 리스트
     """
     try:
         # 얼굴 감지기 로드
-        if cascade_path is None:
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-
-        face_cascade = cv2.CascadeClassifier(cascade_path)
+        face_cascade = get_cascade(cascade_path)
 
         # 이미지가 RGB 형식이면 그레이스케일로 변환
         if len(image.shape) > 2:
@@ -32,14 +93,27 @@ def detect_faces(image, cascade_path=None):
         else:
             gray = image
 
-        # 얼굴 감지 수행
+        # 감지용 축소 이미지 생성
+        height, width = gray.shape[:2]
+        scale = 1.0
+        if max_side and max(height, width) > max_side:
+            scale = max_side / max(height, width)
+            gray = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+        # 얼굴 감지 수행 (최소 얼굴 크기도 같은 비율로 축소하되 감지 창보다 작게 하지 않음)
         faces = face_cascade.detectMultiScale(
             gray,
             scaleFactor=1.1,
             minNeighbors=5,
-            minSize=(30, 30)
+            minSize=min_face_size(scale, tuple(face_cascade.getOriginalWindowSize()))
         )
 
+        # 원본 해상도 좌표로 변환
+        if len(faces) > 0 and scale != 1.0:
+            faces = np.round(np.asarray(faces, dtype=np.float64) / scale).astype(np.int32)
+            faces[:, 2] = np.minimum(faces[:, 2], width - faces[:, 0])
+            faces[:, 3] = np.minimum(faces[:, 3], height - faces[:, 1])
+
         if len(faces) > 0:
             print(f"{len(faces)}개의 얼굴이 감지되었습니다.")
         return faces
@@ -54,7 +128,7 @@ def analyze_face_sharpness(image, faces, face_blur_threshold=100.0):
     감지된 얼굴 영역의 선명도를 분석합니다.
 
     Args:
-        image: 원본 이미지
+        image: 원본 이미지 (RGB 또는 그레이스케일)
         faces: 감지된 얼굴의 좌표 리스트 [(x, y, w, h), ...]
         face_blur_threshold: 얼굴 흐림 판단 임계값
 
@@ -103,17 +177,19 @@ def is_face_image_blurry(image, general_blur_threshold=70.0, face_blur_threshold
     Returns:
         tuple: (is_blurry, sharpness_score, has_faces, face_score)
     """
+    # 그레이스케일 변환은 한 번만 수행
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if len(image.shape) > 2 else image
+
     # 얼굴 감지
-    faces = detect_faces(image)
+    faces = detect_faces(gray)
     has_faces = len(faces) > 0
 
     # 일반적인 흐림 판단
-    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if len(image.shape) > 2 else image
     general_sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
 
     if has_faces:
         # 얼굴이 감지된 경우, 얼굴 영역의 선명도 분석
-        is_face_blurry, face_score, _ = analyze_face_sharpness(image, faces, face_blur_threshold)
+        is_face_blurry, face_score, _ = analyze_face_sharpness(gray, faces, face_blur_threshold)
 
         # 얼굴이 흐릿하면 전체 이미지가 흐릿한 것으로 판단
         return is_face_blurry, general_sharpness, has_faces, face_score
@@ -1,391 +1,662 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import argparse
+import itertools
 import os
 import shutil
+import signal
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+
+from burst import DEFAULT_MAX_DISTANCE, DEFAULT_TIME_WINDOW, BurstGrouper, capture_time, resolve_burst
+from captioning import DEFAULT_BATCH_SIZE, BatchCaptioner, caption_to_tags
+from defaults import (
+    DEFAULT_CACHE_NAME,
+    DEFAULT_DETECT_MAX_SIDE,
+    DEFAULT_GRID_SIZE,
+    DEFAULT_METRIC,
+    DEFAULT_THRESHOLDS,
+    FACE_THRESHOLD_SCALE,
+    MAX_GRID_SIZE,
+    METRICS,
+    MIN_GRID_SIZE,
+)
+from profiling import ProfileReport
+from scanner import DEFAULT_RAW_EXTENSIONS, iter_prefetched, iter_raw_files, parse_extensions
+from watcher import (
+    DEFAULT_CHECKPOINT_NAME,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_SETTLE_SECONDS,
+    FolderWatcher,
+    ThroughputMeter,
+    WatchCheckpoint,
+)
+from xmp_writer import SidecarWriter, write_sidecar
 
-import cv2
-import nltk
-import numpy as np
-import rawpy
-from PIL import Image
 
-
-# todo: xmp 생성이 안되는 이슈가 있음
 # todo: 사람 얼굴 흐림 판단이 잘 안됨 - 실제로 실행해보기...
 
-# 얼굴 감지 모듈 가져오기
-try:
-    from face_detection import detect_faces, analyze_face_sharpness
-    FACE_DETECTION_AVAILABLE = True
-    print("얼굴 감지 기능이 활성화되었습니다.")
-except ImportError:
-    print("얼굴 감지 모듈을 가져올 수 없습니다. 얼굴 감지 기능 비활성화.")
-    FACE_DETECTION_AVAILABLE = False
-
-# XMP 라이브러리 로딩 시도 - 실패해도 프로그램은 계속 실행
-XMP_AVAILABLE = False
-
-# OpenCV의 얼굴 감지기를 위한 기본 경로 설정
-FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-
-try:
-    import libxmp
-    from libxmp import XMPFiles, consts
-    XMP_AVAILABLE = True
-    print("XMP 메타데이터 태그 기능이 활성화되었습니다.")
-except Exception as e:
-    print(f"XMP 라이브러리를 로드할 수 없습니다: {str(e)}")
-    print("XMP 태그 기능이 비활성화됩니다. 태그는 생성되지만 XMP 파일은 만들어지지 않습니다.")
-    print("XMP 태그 기능을 사용하려면 다음 명령어로 Exempi 라이브러리를 설치하세요:")
-    print("  brew install exempi")
-    print("  pip install python-xmp-toolkit")
-
-# NLTK 불용어 데이터 다운로드 시도
-try:
-    print("NLTK 데이터 다운로드 중...")
-    nltk.download('stopwords', quiet=False)
-except Exception as e:
-    print(f"NLTK 데이터 다운로드 실패: {str(e)}")
-
-try:
-    from transformers import BlipProcessor, BlipForConditionalGeneration
-except ImportError:
-    print("transformers 라이브러리를 가져올 수 없습니다. 태그 생성 기능이 비활성화됩니다.")
-    BlipProcessor = None
-    BlipForConditionalGeneration = None
-
-try:
-    from nltk.corpus import stopwords
-    # 영어 불용어 목록 로드 시도
-    try:
-        STOPWORDS = set(stopwords.words('english'))
-        # 추가로 제거할 수 있는 일반적인 단어들
-        ADDITIONAL_STOPWORDS = {'of', 'with', 'in', 'on', 'at', 'from', 'to', 'for'}
-        STOPWORDS.update(ADDITIONAL_STOPWORDS)
-    except LookupError:
-        print("경고: NLTK stopwords 데이터를 로드할 수 없습니다.")
-        # 기본 불용어 목록 제공
-        STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'but', 'if', 'because', 'as', 'what',
-                    'which', 'this', 'that', 'these', 'those', 'then', 'just', 'so', 'than',
-                    'such', 'when', 'who', 'how', 'where', 'why', 'of', 'with', 'in', 'on',
-                    'at', 'from', 'to', 'for'}
-except ImportError:
-    print("NLTK 라이브러리를 가져올 수 없습니다. 기본 불용어 목록을 사용합니다.")
-    STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'but', 'if', 'because', 'as', 'what',
-                'which', 'this', 'that', 'these', 'those', 'then', 'just', 'so', 'than',
-                'such', 'when', 'who', 'how', 'where', 'why', 'of', 'with', 'in', 'on',
-                'at', 'from', 'to', 'for'}
-
-
-def detect_main_object(image):
+# NLTK, transformers, BLIP 모델은 처음 태그를 만들 때 로드한다 (captioning.py 참고)
+# cv2, numpy, rawpy를 쓰는 모듈(blur_detection, pipeline, report, score_cache, sharpness)도
+# --help가 이들을 불러오지 않도록 사용하는 함수 안에서 import 한다 (check_startup.py로 확인)
+
+
+def save_xmp_tags(image_path, tags):
     """
-    이미지에서 주요 객체 영역을 감지합니다.
-    간단한 방법으로 이미지를 격자로 나누고, 각 영역의 Laplacian 분산 값이 가장 높은 영역을
-    주요 객체 영역으로 간주합니다.
+    이미지 파일에 대한 XMP 사이드카 파일을 생성하고 태그를 저장합니다.
+    원본 RAW 파일은 수정하지 않습니다.
 
     Args:
-        image: 분석할 이미지
-
-    Returns:
-        tuple: 주요 객체 영역의 마스크, 선명도 점수
+        image_path: 원본 이미지 파일 경로
+        tags: 저장할 태그 목록
     """
-    height, width = image.shape[:2]
-    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if len(image.shape) > 2 else image
-
-    # 이미지를 5x5 그리드로 나눕니다
-    grid_h, grid_w = 5, 5
-    cell_h, cell_w = height // grid_h, width // grid_w
-
-    # 각 셀의 Laplacian 분산 계산
-    cell_scores = np.zeros((grid_h, grid_w))
-    for i in range(grid_h):
-        for j in range(grid_w):
-            y1, y2 = i * cell_h, (i + 1) * cell_h
-            x1, x2 = j * cell_w, (j + 1) * cell_w
-
-            # 이미지 크기에 맞게 조정
-            y2 = min(y2, height)
-            x2 = min(x2, width)
-
-            cell = gray[y1:y2, x1:x2]
-            lap_var = cv2.Laplacian(cell, cv2.CV_64F).var()
-            cell_scores[i, j] = lap_var
-
-    # 중심부 영역에 가중치 부여 (중심에 가까울수록 주요 객체일 가능성 높음)
-    center_weight = np.zeros((grid_h, grid_w))
-    center_y, center_x = grid_h // 2, grid_w // 2
-    for i in range(grid_h):
-        for j in range(grid_w):
-            # 중심으로부터의 거리 계산
-            dist = np.sqrt((i - center_y)**2 + (j - center_x)**2)
-            # 거리에 반비례하는 가중치 (거리가 멀수록 가중치 감소)
-            center_weight[i, j] = 1 / (1 + dist)
-
-    # 분산 점수와 중심 가중치를 결합
-    weighted_scores = cell_scores * center_weight
-
-    # 상위 25% 점수를 가진 셀을 주요 객체 영역으로 간주
-    threshold = np.percentile(weighted_scores, 75)
-    main_object_cells = weighted_scores >= threshold
-
-    # 주요 객체 마스크 생성
-    mask = np.zeros((height, width), dtype=np.uint8)
-    for i in range(grid_h):
-        for j in range(grid_w):
-            if main_object_cells[i, j]:
-                y1, y2 = i * cell_h, (i + 1) * cell_h
-                x1, x2 = j * cell_w, (j + 1) * cell_w
-
-                # 이미지 크기에 맞게 조정
-                y2 = min(y2, height)
-                x2 = min(x2, width)
-
-                mask[y1:y2, x1:x2] = 255
-
-    # 주요 객체 영역의 Laplacian 분산 평균 계산
-    main_object_score = np.mean(weighted_scores[main_object_cells])
-
-    return mask, main_object_score
-
-
-def is_main_object_blurry(image, blur_threshold=70.0):
+    try:
+        xmp_path = write_sidecar(image_path, tags)
+        print(f"XMP 태그가 저장되었습니다: {xmp_path}")
+        return True
+    except Exception as e:
+        print(f"XMP 태그 저장 중 오류 발생: {str(e)}")
+        return False
+
+
+def apply_caption(image_path, caption, xmp_writer=None):
     """
-    주요 객체의 흐림 여부를 판단합니다.
-    사람이 주요 객체인 경우에는 얼굴이 흔들렸는지를 우선적으로 확인합니다.
+    생성된 캡션에서 태그를 추출하고 XMP 파일로 저장합니다.
 
     Args:
-        image: 분석할 이미지
-        blur_threshold: 흐림 판단 임계값
+        image_path (str): ARW 파일 경로
+        caption (str): 생성된 캡션 (생성 실패 시 None)
+        xmp_writer (SidecarWriter): 백그라운드 사이드카 작성기 (None이면 바로 저장)
 
     Returns:
-        tuple: (is_blurry, main_object_score) - 흐림 여부와 선명도 점수
+        list: 생성된 태그 목록
     """
-    # 얼굴 감지 기능이 사용 가능한 경우
-    if FACE_DETECTION_AVAILABLE:
-        # 얼굴 감지
-        faces = detect_faces(image)
+    if caption is None:
+        print(f"Error generating tags for {image_path}")
+        return []
 
-        # 얼굴이 감지된 경우
-        if len(faces) > 0:
-            print(f"사람 얼굴이 {len(faces)}개 감지되었습니다.")
+    tags = caption_to_tags(caption)
+    print(f"Caption: '{caption}', Tags: {tags}")
 
-            # 얼굴 영역의 선명도 분석
-            # 얼굴 영역은 중요하므로, 일반 기준보다 더 엄격한 임계값(1.3배) 적용
-            face_blur_threshold = blur_threshold * 1.3
-            # 함수가 3개의 값을 반환하므로 언패킹 방식 수정
-            is_face_blurry, face_score, _ = analyze_face_sharpness(image, faces, face_blur_threshold)
+    # 태그를 XMP 파일로 저장
+    if tags:
+        if xmp_writer is not None:
+            xmp_writer.submit(image_path, tags)
+        else:
+            save_xmp_tags(image_path, tags)
+    return tags
 
-            print(f"얼굴 선명도: {face_score:.2f}, 얼굴 흐림 임계값: {face_blur_threshold:.2f}")
 
-            # 얼굴이 흐릿하면 전체 이미지가 흐릿한 것으로 판단
-            if is_face_blurry:
-                print("얼굴이 흐릿하여 흔들린 사진으로 판단합니다.")
-                return True, face_score
-            else:
-                print("얼굴이 선명하여 정상 사진으로 판단합니다.")
-                return False, face_score
+def needs_caption(result, preview_size):
+    """흔들리지 않았고 아직 태그가 없는 사진만 캡션을 생성합니다."""
+    return preview_size is not None and not result["is_blurry"] and not result["tags"]
 
-    # 얼굴 감지 불가능하거나 얼굴이 감지되지 않은 경우: 일반적인 흐림 판단
-    mask, main_object_score = detect_main_object(image)
-    print(f"주요 객체 선명도: {main_object_score:.2f}, 일반 흐림 임계값: {blur_threshold:.2f}")
 
-    # 주요 객체 영역이 임계값보다 낮으면 흐림으로 판단
-    is_blurry = main_object_score < blur_threshold
+def score_file(image_path, blur_threshold=100.0, cache=None, score_options=None, preview_size=None, profile=False):
+    """
+    ARW 파일의 흐림 정도를 측정합니다. (캐시 조회 → 디코딩/흐림 판단 → 캐시 저장)
+    캡션이 필요한 선명한 사진이면 캡션 모델 입력 크기로 축소한 이미지도 함께 반환하고,
+    전체 해상도 RGB 배열은 바로 해제합니다.
 
-    return is_blurry, main_object_score
+    Args:
+        image_path (str): ARW 파일 경로
+        blur_threshold (float): 흐림 판단 기준값
+        cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+        score_options (dict): score_arw에 전달할 옵션 (decode_mode, recheck_band, grid_size, face_max_side, metric 등)
+        preview_size (tuple): 캡션용 축소 이미지 크기 (width, height), None이면 캡션을 생성하지 않음
+        profile (bool): 단계별 시간과 peak RSS 기록 여부
 
+    Returns:
+        tuple: (캐시 키, 처리 결과, 캡션용 축소 이미지) - 디코딩 실패 시 처리 결과는 None
+    """
+    from blur_detection import decode_preview_worker, score_arw_worker
+    from score_cache import lookup_cached_result
+
+    score_options = score_options or {}
+
+    # 1. 캐시된 점수가 있으면 디코딩 없이 재분류
+    file_key, result = lookup_cached_result(cache, image_path, blur_threshold, score_options)
+    if result is not None:
+        preview = None
+        if needs_caption(result, preview_size):
+            preview = decode_preview_worker(image_path, result["decode_mode"], preview_size)
+        return file_key, result, preview
+
+    # 2. ARW 디코딩 및 흐림 판단
+    result, preview = score_arw_worker(image_path, blur_threshold, preview_size, profile, **score_options)
+    if result is None:
+        return file_key, None, None
+    if cache is not None and file_key is not None:
+        cache.store(file_key, image_path, result, score_options)
+    return file_key, result, preview
+
+
+def iter_parallel_results(paths, blur_threshold, workers, cache=None, score_options=None, preview_size=None,
+                          profile=False, max_memory_mb=None):
+    """
+    디코딩과 흐림 판단을 프로세스 풀로 분산 처리하고, 결과를 입력 순서대로 반환합니다.
+    캐시 조회/저장은 부모 프로세스에서 수행합니다.
 
-def save_xmp_tags(image_path, tags):
+    메모리 사용량을 제한하기 위해 동시에 제출하는 작업 수를 workers의 2배로 제한하고,
+    max_memory_mb를 지정하면 디코딩 이미지의 추정 메모리 합이 그 안에 들도록 더 줄입니다.
+    Args:
+        paths: ARW 파일 경로 목록 (iterable)
+        blur_threshold (float): 흐림 판단 기준값
+        workers (int): 워커 프로세스 수
+        cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+        score_options (dict): score_arw에 전달할 옵션 (decode_mode, recheck_band, grid_size, face_max_side, metric 등)
+        preview_size (tuple): 캡션용 축소 이미지 크기 (width, height), None이면 캡션을 생성하지 않음
+        profile (bool): 단계별 시간과 peak RSS 기록 여부
+        max_memory_mb (float): 동시에 처리하는 디코딩 이미지에 사용할 최대 메모리 (MB, None이면 제한하지 않음)
+
+    Yields:
+        tuple: (파일 경로, 캐시 키, 처리 결과 또는 None, 캡션용 축소 이미지 또는 None)
     """
-    이미지 파일에 대한 XMP 사이드카 파일을 생성하고 태그를 저장합니다.
+    from blur_detection import decode_preview_worker, score_arw_worker
+    from pipeline import FrameBudget
+    from score_cache import lookup_cached_result
+
+    score_options = score_options or {}
+    score = partial(score_arw_worker, blur_threshold=blur_threshold, preview_size=preview_size, profile=profile,
+                    **score_options)
+    budget = FrameBudget(workers * 2, max_memory_mb, score_options.get("decode_mode", "full"))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        path_iter = iter(paths)
+
+        def submit(path):
+            file_key, cached = lookup_cached_result(cache, path, blur_threshold, score_options)
+            if cached is None:
+                future = executor.submit(score, path)
+            elif needs_caption(cached, preview_size):
+                # 점수는 캐시에 있지만 캡션용 이미지가 필요한 경우 디코딩만 워커에 맡긴다
+                future = executor.submit(decode_preview_worker, path, cached["decode_mode"], preview_size)
+            else:
+                future = Future()
+                future.set_result(None)
+            pending.append((path, file_key, cached, future))
+
+        def fill():
+            # 한도 안에서 작업을 채워 워커가 쉬지 않도록 한다
+            while len(pending) < budget.limit:
+                next_path = next(path_iter, None)
+                if next_path is None:
+                    return
+                submit(next_path)
+
+        fill()
+        while pending:
+            path, file_key, cached, future = pending.popleft()
+            # 하나를 꺼낼 때마다 다음 작업을 제출
+            fill()
+
+            if cached is not None:
+                yield path, file_key, cached, future.result()
+                continue
+
+            result, preview = future.result()
+            if result is not None:
+                budget.observe(result.get("frame_pixels"))
+            if result is not None and cache is not None and file_key is not None:
+                cache.store(file_key, path, result, score_options)
+            yield path, file_key, result, preview
+
+
+def finish_file(full_path, file_key, result, deleted_folder, cache=None, score_options=None, src_root=None,
+                duplicates_folder=None, xmp_writer=None):
+    """
+    처리 결과를 파일에 반영하고 출력합니다.
+    흐린 사진은 deleted 폴더로, 연사 묶음에서 keeper가 아닌 사진(result["burst_keeper"])은
+    duplicates 폴더로 옮기고, 캡션이 생성된 선명한 사진(result["caption"])은
+    태그를 XMP로 저장한 뒤 캐시에도 반영합니다.
 
     Args:
-        image_path: 원본 이미지 파일 경로
-        tags: 저장할 태그 목록
+        full_path (str): ARW 파일 경로
+        file_key (str): 캐시 키 (캐시를 사용하지 않으면 None)
+        result (dict): 처리 결과
+        deleted_folder (str): 흐린 사진을 옮길 폴더
+        cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+        score_options (dict): score_arw에 전달한 옵션
+        src_root (str): 소스 폴더 - 지정하면 하위 폴더 구조를 유지한 채 deleted 폴더로 옮김
+                        (서로 다른 폴더의 같은 파일명이 덮어쓰이지 않도록)
+        duplicates_folder (str): 연사 묶음의 나머지 사진을 옮길 폴더
+        xmp_writer (SidecarWriter): 백그라운드 사이드카 작성기 (None이면 바로 저장)
     """
-    if not XMP_AVAILABLE:
-        print(f"XMP 라이브러리가 없어 태그를 저장할 수 없습니다: {image_path}")
-        return False
+    from report import destination_path
 
-    try:
-        # XMP 파일 경로 생성 (원본 파일명.xmp)
-        xmp_path = f"{image_path}.xmp"
-
-        # XMP 파일 생성
-        xmpfile = XMPFiles(file_path=image_path, open_forupdate=True)
-
-        # 기존 XMP 메타데이터 가져오기 또는 새로 생성
-        xmp = xmpfile.get_xmp() if xmpfile.get_xmp() else libxmp.XMPMeta()
-
-        # 태그를 DC(Dublin Core) 주제로 저장
-        for i, tag in enumerate(tags):
-            xmp.append_array_item(libxmp.consts.XMP_NS_DC, 'subject', tag, {})
-
-        # Microsoft Photo 태그 네임스페이스에도 저장
-        for i, tag in enumerate(tags):
-            xmp.append_array_item(libxmp.consts.XMP_NS_Microsoft, 'LastKeywordXMP', tag, {})
-
-        # Adobe Lightroom 키워드에도 저장
-        if tags:
-            # 키워드 배열로 함께 저장
-            keywords_str = ", ".join(tags)
-            xmp.set_property(libxmp.consts.XMP_NS_Lightroom, 'hierarchicalSubject', keywords_str)
-
-        # 변경사항 저장
-        if xmpfile.can_put_xmp(xmp):
-            xmpfile.put_xmp(xmp)
-            xmpfile.close_file()
-
-            # 사이드카 파일로 저장
-            xmp.serialize_and_save(xmp_path)
-            print(f"XMP 태그가 저장되었습니다: {xmp_path}")
-            return True
-        else:
-            print(f"XMP 태그를 저장할 수 없습니다: {image_path}")
-            return False
+    filename = os.path.basename(full_path)
+    target = destination_path(full_path, result, deleted_folder, duplicates_folder, src_root)
+    if target is not None:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(full_path, target)
 
-    except Exception as e:
-        print(f"XMP 태그 저장 중 오류 발생: {str(e)}")
-        return False
+    if result["is_blurry"]:
+        print(f"🌫️  {filename}: Blurry image moved (Sharpness: {result['lap_var']:.2f})")
+        return
+
+    if target is not None:
+        keeper = os.path.basename(result["burst_keeper"])
+        print(f"🔁 {filename}: Burst duplicate of {keeper} moved (Sharpness: {result['lap_var']:.2f})")
+        return
+
+    if "caption" in result:
+        result["tags"] = apply_caption(full_path, result["caption"], xmp_writer)
+        if cache is not None and file_key is not None and result["tags"]:
+            cache.store(file_key, full_path, result, score_options)
 
+    tags_str = ", ".join(result['tags'])
+    print(f"✅ {filename}: {tags_str} (Sharpness: {result['lap_var']:.2f})")
 
-def process_arw(image_path, blur_threshold=100.0, model=None, processor=None):
+
+def process_arw(image_path, blur_threshold=100.0, model=None, processor=None, cache=None, score_options=None):
     """
-    ARW 파일을 처리하여 흐림 정도를 측정하고 태그를 생성합니다.
+    ARW 파일 하나를 처리하여 흐림 정도를 측정하고 태그를 생성합니다.
+    (여러 파일은 main()에서 캡션을 배치로 모아 처리합니다)
 
     Args:
         image_path (str): ARW 파일 경로
         blur_threshold (float): 흐림 판단 기준값
-        model: 이미지 태깅에 사용할 모델
-        processor: 이미지 전처리기
+        model: 이미지 태깅에 사용할 모델 (None이면 캡션이 필요할 때 로드)
+        processor: 이미지 전처리기 (None이면 캡션이 필요할 때 로드)
+        cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+        score_options (dict): score_arw에 전달할 옵션 (decode_mode, recheck_band, grid_size, face_max_side, metric 등)
 
     Returns:
         dict: 처리 결과 (is_blurry, tags, lap_var)
     """
-    # 1. ARW → RGB
-    try:
-        with rawpy.imread(image_path) as raw:
-            rgb = raw.postprocess()
-    except Exception as e:
-        print(f"Error processing {image_path}: {str(e)}")
-        return None
+    captioner = BatchCaptioner(model, processor, batch_size=1)
+    preview_size = captioner.input_size
 
-    # 2. 향상된 흐림 판단 - 주요 객체 중심으로 분석
-    is_blurry, main_object_score = is_main_object_blurry(rgb, blur_threshold)
+    file_key, result, preview = score_file(image_path, blur_threshold, cache, score_options, preview_size)
+    if result is None or preview is None:
+        return result
 
-    # 전체 이미지에 대한 Laplacian 분산도 계산 (참고용)
-    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
-    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    for _, caption in captioner.add(image_path, preview):
+        result["tags"] = apply_caption(image_path, caption)
+    if cache is not None and file_key is not None and result["tags"]:
+        cache.store(file_key, image_path, result, score_options)
+    return result
 
-    # 3. 흔들리지 않은 사진에 대해서만 태그 생성
-    tags = []
-    if not is_blurry and model is not None and processor is not None:
-        try:
-            image_pil = Image.fromarray(rgb)
-            inputs = processor(image_pil, return_tensors="pt")
-            out = model.generate(**inputs)
-            caption = processor.decode(out[0], skip_special_tokens=True)
 
-            # 불용어를 제외한 태그 생성
-            words = caption.lower().split()
-            filtered_words = [word for word in words if word not in STOPWORDS and len(word) > 1]
-            tags = filtered_words[:5]  # 최대 5개 태그 추출
+def run_batches(paths, blur_threshold, workers, write_result, cache=None, score_options=None, captioner=None,
+                grouper=None, profile=False, max_memory_mb=None):
+    """
+    파일을 순서대로(workers > 1이면 프로세스 풀로) 처리하고, 선명한 사진의 캡션은 배치로 생성합니다.
+    grouper를 지정하면 선명한 사진을 연사 묶음으로 모아 묶음마다 가장 선명한 사진만 캡션을 생성합니다.
 
-            if not tags:  # 필터링 후 태그가 없으면 기본 단어 사용
-                tags = words[:5]
+    Args:
+        paths: ARW 파일 경로 목록 (iterable)
+        blur_threshold (float): 흐림 판단 기준값
+        workers (int): 워커 프로세스 수 (1이면 순차 처리)
+        write_result: 처리 결과를 반영할 함수 (finish_file)
+        cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+        score_options (dict): score_arw에 전달할 옵션
+        captioner (BatchCaptioner): 캡션 생성기 (None이면 캡션을 생성하지 않음)
+        grouper (BurstGrouper): 연사 묶음 그룹화기 (None이면 묶지 않음)
+        profile (bool): 단계별 시간과 peak RSS 기록 여부
+        max_memory_mb (float): 병렬 처리 시 디코딩 이미지에 사용할 최대 메모리 (MB, None이면 제한하지 않음)
 
-            print(f"Caption: '{caption}', Tags: {tags}")
+    Returns:
+        tuple: (처리한 파일 수, 흐린 사진 수)
+    """
+    preview_size = captioner.input_size if captioner else None
+    if workers > 1:
+        print(f"{workers}개의 워커 프로세스로 병렬 처리합니다.")
+        results = iter_parallel_results(paths, blur_threshold, workers, cache, score_options, preview_size, profile,
+                                        max_memory_mb)
+    else:
+        results = ((path,) + score_file(path, blur_threshold, cache, score_options, preview_size, profile)
+                   for path in paths)
+
+    def write_captions(done):
+        for (full_path, file_key, result), caption in done:
+            result["caption"] = caption
+            write_result(full_path, file_key, result)
+
+    def emit(item):
+        full_path, file_key, result, preview = item
+        if preview is not None:
+            write_captions(captioner.add((full_path, file_key, result), preview))
+        else:
+            write_result(full_path, file_key, result)
 
-            # 4. 태그를 XMP 파일로 저장
-            if tags:
-                save_xmp_tags(image_path, tags)
+    def emit_bursts(bursts):
+        # keeper만 캡션을 생성하고 나머지는 바로 반영
+        for burst in bursts:
+            keeper, others = resolve_burst(burst)
+            for full_path, file_key, result, _ in others:
+                write_result(full_path, file_key, result)
+            emit(keeper)
 
-        except Exception as e:
-            print(f"Error generating tags for {image_path}: {str(e)}")
-    else:
-        if is_blurry:
-            print(f"{image_path}는 흔들린 이미지로 태그를 생성하지 않습니다.")
-        elif model is None:
-            print(f"태깅 모델이 로드되지 않아 태그를 생성할 수 없습니다.")
-
-    return {
-        "is_blurry": is_blurry,
-        "tags": tags,
-        "lap_var": laplacian_var,
-        "main_object_score": main_object_score
-    }
+    processed = 0
+    blurry = 0
+    for item in results:
+        full_path, file_key, result, _ = item
+        if result is None:
+            continue
+
+        processed += 1
+        if result["is_blurry"]:
+            blurry += 1
+
+        if grouper is not None and not result["is_blurry"] and result.get("dhash") is not None:
+            emit_bursts(grouper.add(item, capture_time(full_path), result["dhash"], result["main_object_score"],
+                                    os.path.dirname(full_path)))
+        else:
+            emit(item)
+
+    # 남은 연사 묶음과 캡션 배치 처리
+    if grouper is not None:
+        emit_bursts(grouper.flush())
+    if captioner is not None:
+        write_captions(captioner.flush())
 
+    return processed, blurry
 
-def load_model():
+
+def run_watch(watcher, process, checkpoint, stop_event, meter=None):
     """
-    이미지 태깅을 위한 모델과 프로세서를 로드합니다.
+    폴더를 감시하면서 다 쓰인 파일 묶음을 process로 처리합니다. stop_event가 설정되면 종료합니다.
+    캡션 모델, 캐시, XMP 작성기는 process가 묶음마다 다시 사용하므로 처음 한 번만 로드됩니다.
+
+    Args:
+        watcher (FolderWatcher): 폴더 감시기
+        process: 파일 경로 목록을 처리하고 (처리한 파일 수, 흐린 사진 수)를 반환하는 함수
+        checkpoint (WatchCheckpoint): 처리를 마친 파일 기록 (이미 처리한 파일은 건너뜀)
+        stop_event (threading.Event): 감시를 멈출 때 설정하는 이벤트
+        meter (ThroughputMeter): 처리량 집계기 (None이면 새로 만듦, Ctrl+C로 중단해도 호출한 쪽에서 확인 가능)
+
+    Returns:
+        ThroughputMeter: 누적 처리량
     """
-    try:
-        processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-        return model, processor
-    except Exception as e:
-        print(f"Warning: Failed to load image tagging model: {str(e)}")
-        print("Will proceed without tagging functionality.")
-        return None, None
+    meter = meter or ThroughputMeter()
+    for batch in watcher.batches(stop_event):
+        paths = [path for path in batch if not checkpoint.is_done(path)]
+        if not paths:
+            continue
+        print(f"\n[watch] 새 파일 {len(paths)}개를 처리합니다.")
+        processed, blurry = process(paths)
+        meter.record(processed, blurry)
+        print(meter.summary(watcher.pending_count))
+    return meter
 
 
 def main():
     parser = argparse.ArgumentParser(description="ARW 파일 처리 및 태깅 프로그램")
     parser.add_argument("--src", default="./raw_photos", help="처리할 RAW 파일이 있는 소스 폴더 경로 (기본값: ./raw_photos)")
-    parser.add_argument("--threshold", type=float, default=70.0, help="흐림 판단 기준값 (기본값: 70.0)")
+    parser.add_argument("--ext", default=",".join(DEFAULT_RAW_EXTENSIONS),
+                        help=f"처리할 RAW 확장자, 쉼표로 구분 (기본값: {','.join(DEFAULT_RAW_EXTENSIONS)})")
+    parser.add_argument("--include", action="append", default=None, metavar="GLOB",
+                        help="이 glob 패턴과 일치하는 파일만 처리 (src 기준 상대 경로 또는 파일명, 여러 번 지정 가능)")
+    parser.add_argument("--exclude", action="append", default=None, metavar="GLOB",
+                        help="이 glob 패턴과 일치하는 파일/폴더는 제외 (여러 번 지정 가능)")
+    parser.add_argument("--no-recursive", action="store_true", help="하위 폴더를 탐색하지 않음")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="흐림 판단 기준값 (기본값: 지표별 - "
+                             + ", ".join(f"{name} {value:g}" for name, value in DEFAULT_THRESHOLDS.items()) + ")")
+    parser.add_argument("--metric", choices=METRICS, default=DEFAULT_METRIC,
+                        help="흐림 판단에 사용할 선명도 지표 - laplacian: Laplacian 분산, tenengrad: Sobel 기울기 에너지, "
+                             f"fft: 고주파 에너지 비율(%%) (기본값: {DEFAULT_METRIC})")
+    parser.add_argument("--metrics", default="",
+                        help="같은 그레이스케일 이미지에서 함께 계산하여 캐시/리포트에 기록할 지표, 쉼표로 구분 "
+                             "(기록해 두면 다음 실행에서 디코딩 없이 --metric을 바꿔 재분류 가능)")
+    parser.add_argument("--face-threshold-scale", type=float, default=FACE_THRESHOLD_SCALE,
+                        help=f"얼굴 영역에 적용할 임계값 배율 (기본값: {FACE_THRESHOLD_SCALE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="디코딩/흐림 판단에 사용할 워커 프로세스 수 (기본값: 1, 순차 처리)")
+    parser.add_argument("--decode", choices=["full", "half", "thumb"], default="full",
+                        help="흐림 판단용 디코딩 방식 - full: 전체 해상도, half: half_size 디모자이크, "
+                             "thumb: 내장 JPEG 미리보기 (기본값: full)")
+    parser.add_argument("--recheck-band", type=float, default=0.25,
+                        help="빠른 디코딩 점수가 임계값 ±(임계값 x 비율) 안에 들면 전체 해상도로 재판단 (기본값: 0.25)")
+    parser.add_argument("--grid", type=int, default=DEFAULT_GRID_SIZE,
+                        help=f"주요 객체 감지용 격자 크기 N (NxN, {MIN_GRID_SIZE}~{MAX_GRID_SIZE}, 기본값: {DEFAULT_GRID_SIZE})")
+    parser.add_argument("--face-max-side", type=int, default=DEFAULT_DETECT_MAX_SIDE,
+                        help=f"얼굴 감지용 축소 이미지의 긴 변 크기, 0이면 원본 해상도 (기본값: {DEFAULT_DETECT_MAX_SIDE})")
+    parser.add_argument("--caption-batch", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"한 번에 캡션을 생성할 선명한 사진 수 (기본값: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="디코딩(프로세스 --workers개) → 흐림 판단(스레드) → 캡션 → 쓰기 단계를 동시에 실행")
+    parser.add_argument("--score-threads", type=int, default=2,
+                        help="파이프라인 모드의 흐림 판단 스레드 수 (기본값: 2)")
+    parser.add_argument("--max-frames", type=int, default=None,
+                        help="파이프라인 모드에서 동시에 메모리에 올릴 디코딩 이미지 수 (기본값: workers + score-threads)")
+    parser.add_argument("--max-memory-mb", type=float, default=None,
+                        help="동시에 처리하는 디코딩 이미지에 사용할 최대 메모리(MB) - 이미지 크기로 추정하여 "
+                             "처리 중인 이미지 수를 줄임 (기본값: 제한 없음)")
+    parser.add_argument("--cache", default=None,
+                        help=f"점수 캐시 SQLite 파일 경로 (기본값: <src>/{DEFAULT_CACHE_NAME})")
+    parser.add_argument("--no-cache", action="store_true", help="점수 캐시를 사용하지 않음")
+    parser.add_argument("--no-tag", action="store_true",
+                        help="흐림 판단과 파일 이동만 수행 (NLTK, transformers, 캡션 모델을 로드하지 않음)")
+    parser.add_argument("--burst", action="store_true",
+                        help="비슷한 연사 사진을 묶어 가장 선명한 사진만 남기고(나머지는 duplicates 폴더로 이동) 캡션 생성")
+    parser.add_argument("--burst-distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f"같은 연사로 판단할 dHash 최대 해밍 거리, 0~64 (기본값: {DEFAULT_MAX_DISTANCE})")
+    parser.add_argument("--burst-window", type=float, default=DEFAULT_TIME_WINDOW,
+                        help=f"같은 연사로 판단할 최대 촬영 시각 차이(초) (기본값: {DEFAULT_TIME_WINDOW})")
+    parser.add_argument("--profile", action="store_true",
+                        help="파일별 단계(decode, gray, faces, main_object, laplacian, caption, xmp, write) 시간과 "
+                             "peak RSS를 측정하여 p50/p95 요약 출력")
+    parser.add_argument("--report", default=None, metavar="OUT.{csv,jsonl,parquet}",
+                        help="파일을 옮기거나 XMP를 쓰지 않고 파일별 점수/판단/소요 시간을 리포트 파일로 기록 "
+                             "(parquet은 pyarrow 필요)")
+    parser.add_argument("--watch", action="store_true",
+                        help="종료(Ctrl+C, SIGTERM)할 때까지 src 폴더를 감시하면서 다 쓰인 새 RAW 파일을 처리")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help=f"감시 모드에서 파일 크기/수정 시각이 이 시간(초) 동안 바뀌지 않으면 다 쓰인 것으로 판단 "
+                             f"(기본값: {DEFAULT_SETTLE_SECONDS})")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"감시 모드에서 준비된 파일 확인 주기(초), polling 모드에서는 폴더 탐색 주기 "
+                             f"(기본값: {DEFAULT_POLL_INTERVAL})")
+    parser.add_argument("--poll", action="store_true",
+                        help="감시 모드에서 inotify 대신 주기적인 폴더 탐색 사용 (네트워크 공유 폴더 등)")
+    parser.add_argument("--checkpoint", default=None,
+                        help=f"감시 모드에서 처리를 마친 파일 기록 경로 - 다시 시작하면 이어서 처리 "
+                             f"(기본값: <src>/{DEFAULT_CHECKPOINT_NAME})")
     args = parser.parse_args()
 
+    # 인자 확인이 끝난 뒤에 cv2, numpy, rawpy를 쓰는 모듈을 불러온다
+    from blur_detection import FACE_DETECTION_AVAILABLE
+    from pipeline import Pipeline
+    from report import open_report, report_format
+    from score_cache import ScoreCache
+    from sharpness import parse_metrics
+
+    # 얼굴 감지 모듈 상태 출력
+    if FACE_DETECTION_AVAILABLE:
+        print("얼굴 감지 기능이 활성화되었습니다.")
+    else:
+        print("얼굴 감지 모듈을 가져올 수 없습니다. 얼굴 감지 기능 비활성화.")
+
+    if not MIN_GRID_SIZE <= args.grid <= MAX_GRID_SIZE:
+        parser.error(f"--grid는 {MIN_GRID_SIZE}~{MAX_GRID_SIZE} 범위여야 합니다.")
+    if not 0 <= args.burst_distance <= 64:
+        parser.error("--burst-distance는 0~64 범위여야 합니다.")
+    try:
+        metrics = parse_metrics(args.metrics)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.threshold is None:
+        args.threshold = DEFAULT_THRESHOLDS[args.metric]
+    if args.face_threshold_scale <= 0:
+        parser.error("--face-threshold-scale은 0보다 커야 합니다.")
+    extensions = parse_extensions(args.ext)
+    if not extensions:
+        parser.error("--ext에 하나 이상의 확장자를 지정해야 합니다.")
+    if args.max_memory_mb is not None and args.max_memory_mb <= 0:
+        parser.error("--max-memory-mb는 0보다 커야 합니다.")
+    if args.report and report_format(args.report) is None:
+        parser.error("--report 파일 확장자는 .csv, .jsonl, .parquet 중 하나여야 합니다.")
+    if args.settle < 0 or args.watch_interval <= 0:
+        parser.error("--settle은 0 이상, --watch-interval은 0보다 커야 합니다.")
+
     # 소스 폴더 확인
     if not os.path.exists(args.src):
         print(f"Error: Source folder '{args.src}' does not exist.")
         return 1
 
-    # src 폴더 아래에 deleted 폴더 경로 생성
+    # src 폴더 아래에 deleted, duplicates 폴더 경로 생성
     deleted_folder = os.path.join(args.src, "deleted")
+    duplicates_folder = os.path.join(args.src, "duplicates")
 
-    # 삭제된 이미지를 저장할 폴더 생성
-    os.makedirs(deleted_folder, exist_ok=True)
-    print(f"흔들린 사진은 {deleted_folder} 폴더로 이동됩니다.")
-
-    # 모델 로드
-    model, processor = load_model()
-
-    # 처리할 파일 수 계산
-    arw_files = [f for f in os.listdir(args.src) if f.lower().endswith('.arw')]
-    total_files = len(arw_files)
-
-    if total_files == 0:
-        print(f"No ARW files found in {args.src}")
-        return 0
-
-    print(f"Processing {total_files} ARW files...")
+    # 삭제된 이미지를 저장할 폴더 생성 (리포트 모드에서는 파일을 옮기지 않음)
+    if args.report:
+        print(f"리포트 모드: 파일을 옮기거나 XMP를 쓰지 않고 {args.report}에 결과를 기록합니다.")
+    else:
+        os.makedirs(deleted_folder, exist_ok=True)
+        print(f"흔들린 사진은 {deleted_folder} 폴더로 이동됩니다.")
+
+    # 처리할 파일 탐색 - 탐색이 끝나기 전에 처리를 시작하도록 백그라운드 스레드에서 찾는 즉시 전달
+    # (감시 모드에서는 FolderWatcher가 기존 파일과 새 파일을 찾음)
+    full_paths = None
+    if args.watch:
+        print(f"Watching RAW files ({args.ext}) in {args.src}...")
+    else:
+        full_paths = iter_prefetched(iter_raw_files(args.src, extensions, args.include, args.exclude,
+                                                    recursive=not args.no_recursive,
+                                                    skip_dirs=[deleted_folder, duplicates_folder],
+                                                    sort_by_time=args.burst))
+        first_path = next(full_paths, None)
+        if first_path is None:
+            print(f"No RAW files ({args.ext}) found in {args.src}")
+            return 0
+        full_paths = itertools.chain([first_path], full_paths)
+        print(f"Processing RAW files ({args.ext}) in {args.src}...")
+
+    print(f"선명도 지표: {args.metric} (임계값 {args.threshold:g})")
+
+    # 점수 캐시 열기
+    cache = None
+    if not args.no_cache:
+        cache_path = args.cache or os.path.join(args.src, DEFAULT_CACHE_NAME)
+        cache = ScoreCache(cache_path)
+        print(f"점수 캐시를 사용합니다: {cache_path}")
+
+    score_options = {
+        "decode_mode": args.decode,
+        "recheck_band": args.recheck_band,
+        "grid_size": args.grid,
+        "face_max_side": args.face_max_side or None,
+        "metric": args.metric,
+        "metrics": metrics,
+        "face_threshold_scale": args.face_threshold_scale,
+    }
+    # 리포트 모드에서는 결과를 리포트 파일에만 기록하고 캡션도 생성하지 않음
+    report = None
+    captioner = None
+    xmp_writer = None
+    if args.report:
+        try:
+            # destination 열에는 리포트 모드가 아니었다면 옮겼을 경로를 기록
+            folders = {"deleted_folder": deleted_folder, "duplicates_folder": duplicates_folder, "src_root": args.src}
+            report = open_report(args.report, args.threshold, score_options, folders)
+        except ImportError as e:
+            print(f"Error: 리포트 파일을 만들 수 없습니다 (pip install pyarrow): {str(e)}")
+            return 1
+        write_result = report.write_result
+    else:
+        # 캡션은 선명한 사진을 모아 배치로 생성 (모델은 첫 배치에서 로드)
+        # XMP 사이드카는 백그라운드 스레드에서 모아서 기록
+        if args.no_tag:
+            print("--no-tag: 태그를 생성하지 않습니다.")
+        else:
+            captioner = BatchCaptioner(batch_size=args.caption_batch)
+            xmp_writer = SidecarWriter()
+
+        write_result = partial(finish_file, deleted_folder=deleted_folder, cache=cache, score_options=score_options,
+                               src_root=args.src, duplicates_folder=duplicates_folder, xmp_writer=xmp_writer)
+
+    # 연사 묶음은 촬영 시각 순서로 들어오는 선명한 사진에서 만든다
+    grouper = None
+    if args.burst:
+        grouper = BurstGrouper(args.burst_distance, args.burst_window)
+        print(f"연사 묶음 모드: dHash 거리 {args.burst_distance} 이하, {args.burst_window}초 이내 사진을 묶습니다.")
+
+    # 단계별 시간 측정
+    profile_report = None
+    if args.profile:
+        profile_report = ProfileReport()
+        write_result = profile_report.wrap(write_result)
+
+    # 감시 모드: 처리를 마친 파일을 체크포인트에 기록
+    checkpoint = None
+    if args.watch:
+        checkpoint_path = args.checkpoint or os.path.join(args.src, DEFAULT_CHECKPOINT_NAME)
+        checkpoint = WatchCheckpoint(checkpoint_path)
+        write_result = checkpoint.wrap(write_result)
+        print(f"체크포인트를 사용합니다: {checkpoint_path} (처리한 파일 {len(checkpoint.done)}개)")
 
     # 파일 처리
-    processed = 0
-    blurry = 0
-
-    for filename in arw_files:
-        full_path = os.path.join(args.src, filename)
-        result = process_arw(full_path, args.threshold, model, processor)
-
-        if result is None:
-            continue
+    pipeline = None
+    if args.pipeline:
+        print(f"파이프라인 모드로 처리합니다. (디코딩 프로세스 {args.workers}개, 흐림 판단 스레드 {args.score_threads}개)")
+        pipeline = Pipeline(write_result, args.threshold, score_options, cache, captioner,
+                            decode_workers=args.workers, score_threads=args.score_threads,
+                            max_frames=args.max_frames, grouper=grouper, profile=args.profile,
+                            max_memory_mb=args.max_memory_mb)
+
+    def process(paths):
+        if pipeline is not None:
+            # Pipeline의 처리 수는 누적값이므로 이번 호출분만 반환
+            before = (pipeline.processed, pipeline.blurry)
+            processed, blurry = pipeline.run(paths)
+            return processed - before[0], blurry - before[1]
+        return run_batches(paths, args.threshold, args.workers, write_result, cache, score_options, captioner,
+                           grouper, args.profile, args.max_memory_mb)
 
-        processed += 1
-
-        if result["is_blurry"]:
-            blurry += 1
-            shutil.move(full_path, os.path.join(deleted_folder, filename))
-            print(f"🌫️  {filename}: Blurry image moved (Sharpness: {result['lap_var']:.2f})")
+    try:
+        if args.watch:
+            watcher = FolderWatcher(args.src, extensions, args.include, args.exclude,
+                                    recursive=not args.no_recursive, skip_dirs=[deleted_folder, duplicates_folder],
+                                    settle_seconds=args.settle, poll_interval=args.watch_interval,
+                                    use_inotify=not args.poll)
+            print(f"감시 모드({watcher.mode}): 파일이 {args.settle:g}초 동안 바뀌지 않으면 처리합니다. "
+                  f"종료하려면 Ctrl+C를 누르세요.")
+            # SIGTERM(서비스 종료)도 Ctrl+C처럼 현재 묶음을 마친 뒤 종료
+            stop_event = threading.Event()
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+            meter = ThroughputMeter()
+            try:
+                run_watch(watcher, process, checkpoint, stop_event, meter)
+            except KeyboardInterrupt:
+                print("\n감시를 종료합니다.")
+            processed, blurry = meter.processed, meter.blurry
         else:
-            tags_str = ", ".join(result['tags'])
-            print(f"✅ {filename}: {tags_str} (Sharpness: {result['lap_var']:.2f})")
+            processed, blurry = process(full_paths)
+        if pipeline is not None:
+            pipeline.print_stats()
+    finally:
+        if report is not None:
+            report.close()
+        if xmp_writer is not None:
+            xmp_writer.close()
+        if checkpoint is not None:
+            checkpoint.close()
 
     # 요약 출력
-    print(f"\nProcessed {processed} files. Moved {blurry} blurry images to {deleted_folder}")
+    if report is not None:
+        print(f"\nProcessed {processed} files. {blurry} blurry images recorded to {args.report} (no files moved)")
+    else:
+        print(f"\nProcessed {processed} files. Moved {blurry} blurry images to {deleted_folder}")
+    if profile_report is not None:
+        if captioner is not None:
+            profile_report.add_batches("caption", captioner.timings)
+        if xmp_writer is not None:
+            profile_report.add_batches("xmp", xmp_writer.timings)
+        profile_report.print_summary()
+    if xmp_writer is not None:
+        print(f"XMP 사이드카 저장: {xmp_writer.written}개 (실패 {xmp_writer.failed}개)")
+    if grouper is not None:
+        print(f"연사 묶음: 선명한 사진 {grouper.frames}장 → {grouper.bursts}개 묶음 "
+              f"(중복 {grouper.frames - grouper.bursts}장 제외)")
+    if cache is not None:
+        print(f"캐시 적중: {cache.hits}, 캐시 미스: {cache.misses}")
+        cache.close()
     return 0
 
 
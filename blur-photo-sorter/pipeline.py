@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+디코딩 → 흐림 판단 → 캡션 → 쓰기 단계를 bounded queue로 연결한 파이프라인 모듈
+
+- 디코딩: 프로세스 풀 (rawpy)
+- 흐림 판단: 스레드 풀 (numpy/cv2 연산은 GIL을 해제하므로 여러 스레드가 동시에 실행됨)
+- 캡션: 연사 묶음(burst) 정리 후 배치로 모아 처리하는 단일 소비자 스레드
+- 쓰기: XMP 저장과 파일 이동을 담당하는 I/O 스레드
+
+각 단계가 동시에 동작하므로 디스크, CPU, 모델 작업이 겹쳐서 실행되며,
+메모리에 올라가는 디코딩된 이미지 수는 max_frames와 메모리 한도(FrameBudget)로 제한됩니다.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from blur_detection import decode_for_scoring, decode_preview_worker, make_caption_preview, score_decoded
+from burst import capture_time, resolve_burst
+from profiling import Profiler, peak_rss_mb
+from score_cache import lookup_cached_result
+
+# 단계 종료를 알리는 표식
+_DONE = object()
+
+# 디코딩 이미지 한 장이 흐림 판단을 마칠 때까지 차지하는 픽셀당 메모리 (바이트)
+# RGB 3 + 그레이스케일 1 + int16 Laplacian 2 + 격자 한 줄의 float64 사본과 여유분 2
+FRAME_BYTES_PER_PIXEL = 8
+
+# 아직 디코딩한 이미지가 없을 때 가정하는 디코딩 방식별 픽셀 수 (24MP 센서 기준)
+DEFAULT_FRAME_PIXELS = {"full": 6000 * 4000, "half": 3000 * 2000, "thumb": 1616 * 1080}
+
+
+class FrameBudget:
+    """
+    동시에 메모리에 올라가는 디코딩 이미지 수를 제한하는 세마포어.
+
+    max_frames(개수)와 max_memory_mb(MB) 중 더 작은 한도를 사용합니다. 이미지 한 장의 메모리는
+    디코딩 방식별 기본 픽셀 수로 추정하고, observe()로 실제 이미지 크기를 알려주면
+    지금까지 관찰한 가장 큰 이미지 크기로 갱신합니다.
+    한도가 이미지 한 장보다 작아도 한 장은 항상 처리할 수 있습니다.
+    """
+
+    def __init__(self, max_frames=None, max_memory_mb=None, decode_mode="full"):
+        """
+        Args:
+            max_frames (int): 최대 이미지 수 (None이면 메모리 한도만 사용)
+            max_memory_mb (float): 이미지 버퍼에 사용할 최대 메모리 (MB, None이면 제한하지 않음)
+            decode_mode (str): 기본 픽셀 수를 정할 디코딩 방식 ("full", "half", "thumb")
+        """
+        self.max_frames = max_frames
+        self.max_memory_mb = max_memory_mb
+        self.frame_pixels = DEFAULT_FRAME_PIXELS.get(decode_mode, DEFAULT_FRAME_PIXELS["full"])
+        self.observed = False
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def frame_mb(self):
+        """이미지 한 장의 추정 메모리 (MB)"""
+        return self.frame_pixels * FRAME_BYTES_PER_PIXEL / (1024 * 1024)
+
+    @property
+    def limit(self):
+        """현재 추정값으로 계산한 최대 이미지 수 (1 이상)"""
+        limits = []
+        if self.max_frames:
+            limits.append(self.max_frames)
+        if self.max_memory_mb:
+            limits.append(int(self.max_memory_mb // self.frame_mb))
+        return max(1, min(limits)) if limits else None
+
+    def observe(self, pixels):
+        """디코딩한 이미지의 픽셀 수로 이미지 한 장의 메모리 추정값을 갱신합니다."""
+        if not pixels:
+            return
+        with self._cond:
+            # 첫 관찰값은 기본 추정값을 대체하고, 이후에는 가장 큰 값을 유지
+            if not self.observed or pixels > self.frame_pixels:
+                self.frame_pixels = pixels
+                self.observed = True
+                self._cond.notify_all()
+
+    def acquire(self):
+        """이미지 한 장을 올릴 자리가 생길 때까지 기다립니다."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.limit is None or self.in_flight < self.limit)
+            self.in_flight += 1
+
+    def release(self):
+        """이미지 한 장을 해제했음을 알립니다."""
+        with self._cond:
+            if self.in_flight <= 0:
+                raise ValueError("FrameBudget released too many times")
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+
+class ReorderBuffer:
+    """
+    순서 번호(0부터)가 붙은 항목을 받아 번호 순서대로 내보내는 버퍼.
+    앞 번호를 기다리는 항목만 보관하며, 한 스레드에서만 사용합니다.
+    """
+
+    def __init__(self):
+        self.next_index = 0
+        self.waiting = {}
+
+    def push(self, index, item):
+        """
+        항목 하나를 넣고, 이어지는 번호까지 준비된 항목을 순서대로 반환합니다.
+
+        Returns:
+            list: 이번에 내보낼 항목 목록 (앞 번호가 아직 오지 않았으면 빈 목록)
+        """
+        self.waiting[index] = item
+        ready = []
+        while self.next_index in self.waiting:
+            ready.append(self.waiting.pop(self.next_index))
+            self.next_index += 1
+        return ready
+
+    def drain(self):
+        """
+        앞 번호가 끝내 오지 않은 경우(입력 단계 오류 등) 남은 항목을 번호 순서대로 모두 반환합니다.
+
+        Returns:
+            list: 남아 있던 항목 목록
+        """
+        ready = [self.waiting[index] for index in sorted(self.waiting)]
+        self.waiting.clear()
+        return ready
+
+
+def decode_task(image_path, decode_mode="full"):
+    """
+    디코딩 단계의 워커 함수입니다.
+
+    Returns:
+        tuple: (RGB 이미지 또는 None, 실제 사용한 디코딩 방식, 소요 시간(초), CPU 시간(초))
+    """
+    started = time.perf_counter()
+    cpu = time.process_time()
+    rgb, used_mode = decode_for_scoring(image_path, decode_mode)
+    return rgb, used_mode, time.perf_counter() - started, time.process_time() - cpu
+
+
+class StageStats:
+    """파이프라인 단계별 처리량 통계."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.busy = 0.0
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    def record(self, started, finished, count=1):
+        """
+        처리 구간 하나를 기록합니다.
+
+        Args:
+            started (float): 시작 시각 (time.perf_counter)
+            finished (float): 종료 시각 (time.perf_counter)
+            count (int): 이 구간에서 처리한 항목 수 (배치인 경우 배치 크기)
+        """
+        with self._lock:
+            self.count += count
+            self.busy += finished - started
+            if self.first_start is None or started < self.first_start:
+                self.first_start = started
+            if self.last_end is None or finished > self.last_end:
+                self.last_end = finished
+
+    @property
+    def throughput(self):
+        """첫 작업 시작부터 마지막 작업 종료까지의 초당 처리 수."""
+        if not self.count or self.last_end <= self.first_start:
+            return 0.0
+        return self.count / (self.last_end - self.first_start)
+
+    def summary(self):
+        return f"{self.name}: {self.count}개, {self.throughput:.2f}개/s (누적 작업 시간 {self.busy:.1f}s)"
+
+
+class Pipeline:
+    """
+    단계별 bounded queue로 연결된 처리 파이프라인.
+
+    결과 처리(XMP 저장, 파일 이동, 출력)는 write_result 콜백으로 I/O 스레드에서 수행합니다.
+    write_result(image_path, file_key, result)는 흐린 사진이 아니고 캡션이 생성된 경우
+    result["caption"]에 캡션(실패 시 None)이 들어 있고, 연사 묶음에서 keeper가 아닌 사진은
+    result["burst_keeper"]에 keeper 경로가 들어 있습니다.
+
+    흐림 판단 스레드는 끝나는 순서가 섞이므로, grouper를 지정하면 모든 파일(실패한 파일 포함)을
+    캡션 단계로 보내 ReorderBuffer로 입력 순서(폴더별 촬영 시각 순서)를 되돌린 뒤 연사 묶음을 만듭니다.
+    앞 순서의 사진이 늦어져도 ReorderBuffer에 쌓이는 항목이 reorder_window개를 넘지 않도록,
+    입력 단계는 아직 내보내지 못한 가장 앞 순서보다 reorder_window개 이상 앞서 나가지 않습니다.
+    """
+
+    def __init__(self, write_result, blur_threshold=100.0, score_options=None, cache=None, captioner=None,
+                 decode_workers=2, score_threads=2, max_frames=None, queue_size=32, grouper=None, profile=False,
+                 max_memory_mb=None):
+        """
+        Args:
+            write_result: I/O 스레드에서 호출할 결과 처리 함수
+            blur_threshold (float): 흐림 판단 기준값
+            score_options (dict): score_arw에 전달할 옵션 (decode_mode, recheck_band, grid_size, face_max_side, metric 등)
+            cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+            captioner (BatchCaptioner): 캡션 생성기 (None이면 캡션을 생성하지 않음)
+            decode_workers (int): 디코딩 프로세스 수
+            score_threads (int): 흐림 판단 스레드 수
+            max_frames (int): 동시에 메모리에 올라갈 수 있는 디코딩 이미지 수
+            queue_size (int): 캡션/쓰기 단계 큐의 최대 크기
+            grouper (BurstGrouper): 연사 묶음 그룹화기 (None이면 묶지 않음)
+            profile (bool): 파일별 단계 시간과 peak RSS를 result["profile"], result["peak_rss_mb"]에 기록
+            max_memory_mb (float): 디코딩 이미지에 사용할 최대 메모리 (MB, None이면 max_frames만 적용)
+        """
+        self.write_result = write_result
+        self.blur_threshold = blur_threshold
+        self.score_options = score_options or {}
+        self.cache = cache
+        self.captioner = captioner
+        self.grouper = grouper
+        self.profile = profile
+        self.preview_size = captioner.input_size if captioner else None
+        self.decode_workers = max(1, decode_workers)
+        self.score_threads = max(1, score_threads)
+        self.max_frames = max_frames or self.decode_workers + self.score_threads
+
+        # 디코딩 중이거나 흐림 판단을 기다리는 이미지 수 제한 (개수와 메모리 한도 중 작은 값)
+        self.frame_slots = FrameBudget(self.max_frames, max_memory_mb, self.score_options.get("decode_mode", "full"))
+        # score_queue에는 max_frames 이상 들어갈 수 없으므로 put이 막히지 않는다
+        self.score_queue = queue.Queue(maxsize=self.max_frames)
+        self.caption_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+
+        self._outstanding = 0
+        self._outstanding_cond = threading.Condition()
+
+        # 디코딩 중(max_frames)과 캡션 큐에 있는 항목까지 포함한 순서 복원 범위
+        self.reorder_window = self.max_frames + queue_size
+        # ReorderBuffer가 입력 순서대로 내보낸 항목 수
+        self._ordered = 0
+        self._ordered_cond = threading.Condition()
+
+        self.stats = {
+            "decode": StageStats("decode"),
+            "score": StageStats("score"),
+            "caption": StageStats("caption"),
+            "write": StageStats("write"),
+        }
+        self.processed = 0
+        self.blurry = 0
+
+    # ------------------------------------------------------------
+    # 디코딩 단계 (프로세스 풀, 메인 스레드에서 작업 제출)
+    # ------------------------------------------------------------
+    def _track(self, future, on_done):
+        """완료 콜백이 큐에 넣을 때까지 미완료 작업으로 집계합니다."""
+        with self._outstanding_cond:
+            self._outstanding += 1
+
+        def callback(f):
+            try:
+                on_done(f)
+            finally:
+                with self._outstanding_cond:
+                    self._outstanding -= 1
+                    self._outstanding_cond.notify_all()
+
+        future.add_done_callback(callback)
+
+    def _feed(self, paths, executor):
+        decode_mode = self.score_options.get("decode_mode", "full")
+
+        # index: 입력 순서 (연사 묶음 전에 ReorderBuffer로 순서를 되돌릴 때 사용)
+        for index, path in enumerate(paths):
+            if self.grouper is not None:
+                # 앞 순서의 사진을 기다리는 동안 뒤 순서의 결과(캡션용 이미지 포함)가 끝없이 쌓이지 않도록 대기
+                with self._ordered_cond:
+                    self._ordered_cond.wait_for(lambda: index - self._ordered < self.reorder_window)
+            file_key, cached = lookup_cached_result(self.cache, path, self.blur_threshold, self.score_options)
+
+            if cached is None:
+                self.frame_slots.acquire()
+                future = executor.submit(decode_task, path, decode_mode)
+                self._track(future, lambda f, index=index, path=path, file_key=file_key:
+                            self.score_queue.put((index, path, file_key, f)))
+            elif self.preview_size is not None and not cached["is_blurry"] and not cached["tags"]:
+                # 점수는 캐시에 있지만 캡션용 이미지가 필요한 경우 디코딩만 수행
+                self.frame_slots.acquire()
+                future = executor.submit(decode_preview_worker, path, cached["decode_mode"], self.preview_size)
+                self._track(future, lambda f, index=index, path=path, file_key=file_key, cached=cached:
+                            self._on_preview_decoded(index, path, file_key, cached, f))
+            else:
+                self._route(index, path, file_key, cached)
+
+        # 모든 디코딩 결과가 큐에 들어갈 때까지 대기
+        with self._outstanding_cond:
+            self._outstanding_cond.wait_for(lambda: self._outstanding == 0)
+
+    def _on_preview_decoded(self, index, path, file_key, cached, future):
+        self.frame_slots.release()
+        try:
+            preview = future.result()
+        except Exception as e:
+            print(f"Error processing {path}: {str(e)}")
+            preview = None
+        self._route(index, path, file_key, cached, preview)
+
+    def _groupable(self, result):
+        return self.grouper is not None and not result["is_blurry"] and result.get("dhash") is not None
+
+    def _route(self, index, path, file_key, result, preview=None):
+        """
+        캡션이 필요한 사진은 캡션 단계로, 나머지는 쓰기 단계로 보냅니다.
+        연사 묶음을 만드는 경우에는 순서를 되돌리기 위해 모든 사진을 캡션 단계로 보냅니다.
+        """
+        if preview is not None or self.grouper is not None:
+            self.caption_queue.put((index, (path, file_key, result, preview)))
+        else:
+            self.write_queue.put((path, file_key, result))
+
+    def _skip(self, index):
+        """처리하지 못한 파일의 순서 번호를 캡션 단계에 알립니다. (ReorderBuffer가 기다리지 않도록)"""
+        if self.grouper is not None:
+            self.caption_queue.put((index, None))
+
+    # ------------------------------------------------------------
+    # 흐림 판단 단계 (스레드)
+    # ------------------------------------------------------------
+    def _score_loop(self):
+        while True:
+            item = self.score_queue.get()
+            if item is _DONE:
+                break
+
+            index, path, file_key, future = item
+            result, preview = None, None
+            try:
+                rgb, used_mode, decode_seconds, decode_cpu = future.result()
+                finished = time.perf_counter()
+                self.stats["decode"].record(finished - decode_seconds, finished)
+                if rgb is not None:
+                    self.frame_slots.observe(rgb.shape[0] * rgb.shape[1])
+
+                    started = time.perf_counter()
+                    profiler = Profiler() if self.profile else None
+                    if profiler is not None:
+                        profiler.add("decode", decode_seconds, decode_cpu)
+                    options = dict(self.score_options, decode_mode=used_mode)
+                    result, rgb = score_decoded(path, rgb, self.blur_threshold, profiler=profiler, **options)
+                    if result is not None:
+                        result["decode_seconds"] += decode_seconds
+                        if profiler is not None:
+                            result["profile"] = profiler.as_dict()
+                            result["peak_rss_mb"] = peak_rss_mb()
+                        if self.preview_size is not None and not result["is_blurry"]:
+                            preview = make_caption_preview(rgb, self.preview_size)
+                        if self.cache is not None and file_key is not None:
+                            self.cache.store(file_key, path, result, self.score_options)
+                    self.stats["score"].record(started, time.perf_counter())
+            except Exception as e:
+                print(f"Error processing {path}: {str(e)}")
+                result = None
+            finally:
+                # 전체 해상도 이미지를 해제하고 다음 디코딩을 허용
+                rgb = None
+                self.frame_slots.release()
+
+            if result is None:
+                self._skip(index)
+                continue
+            self._route(index, path, file_key, result, preview)
+
+    # ------------------------------------------------------------
+    # 캡션 단계 (연사 묶음 정리 + 배치 단일 소비자)
+    # ------------------------------------------------------------
+    def _emit_captions(self, done, started):
+        if not done:
+            return
+        self.stats["caption"].record(started, time.perf_counter(), len(done))
+        for (path, file_key, result), caption in done:
+            result["caption"] = caption
+            self.write_queue.put((path, file_key, result))
+
+    def _caption(self, item):
+        path, file_key, result, preview = item
+        if preview is None or self.captioner is None:
+            self.write_queue.put((path, file_key, result))
+            return
+        started = time.perf_counter()
+        self._emit_captions(self.captioner.add((path, file_key, result), preview), started)
+
+    def _emit_burst(self, burst):
+        # keeper만 캡션을 생성하고 나머지는 바로 쓰기 단계로 보낸다
+        keeper, others = resolve_burst(burst)
+        for path, file_key, result, _ in others:
+            self.write_queue.put((path, file_key, result))
+        self._caption(keeper)
+
+    def _group_or_caption(self, item):
+        if item is None:
+            return
+        path, file_key, result, _ = item
+        if self._groupable(result):
+            for burst in self.grouper.add(item, capture_time(path), result["dhash"],
+                                          result["main_object_score"], os.path.dirname(path)):
+                self._emit_burst(burst)
+        else:
+            self._caption(item)
+
+    def _caption_loop(self):
+        reorder = ReorderBuffer()
+        while True:
+            entry = self.caption_queue.get()
+            if entry is _DONE:
+                break
+            index, item = entry
+            if self.grouper is None:
+                self._caption(item)
+                continue
+            # 연사 묶음은 입력 순서대로 만들어야 하므로 앞 순서의 사진이 올 때까지 기다린다
+            ready = reorder.push(index, item)
+            if ready:
+                with self._ordered_cond:
+                    self._ordered = reorder.next_index
+                    self._ordered_cond.notify_all()
+            for item in ready:
+                self._group_or_caption(item)
+
+        if self.grouper is not None:
+            for item in reorder.drain():
+                self._group_or_caption(item)
+            for burst in self.grouper.flush():
+                self._emit_burst(burst)
+        if self.captioner is not None:
+            started = time.perf_counter()
+            self._emit_captions(self.captioner.flush(), started)
+
+    # ------------------------------------------------------------
+    # 쓰기 단계 (I/O 스레드)
+    # ------------------------------------------------------------
+    def _write_loop(self):
+        while True:
+            item = self.write_queue.get()
+            if item is _DONE:
+                break
+            path, file_key, result = item
+            started = time.perf_counter()
+            try:
+                self.write_result(path, file_key, result)
+                self.processed += 1
+                if result["is_blurry"]:
+                    self.blurry += 1
+            except Exception as e:
+                print(f"결과 저장 중 오류 발생 ({path}): {str(e)}")
+            self.stats["write"].record(started, time.perf_counter())
+
+    def run(self, paths):
+        """
+        파이프라인으로 파일 목록을 처리합니다.
+
+        Args:
+            paths: ARW 파일 경로 목록 (iterable)
+
+        Returns:
+            tuple: (처리한 파일 수, 흐린 사진 수)
+        """
+        score_threads = [threading.Thread(target=self._score_loop, name=f"score-{i}", daemon=True)
+                         for i in range(self.score_threads)]
+        caption_thread = threading.Thread(target=self._caption_loop, name="caption", daemon=True)
+        write_thread = threading.Thread(target=self._write_loop, name="write", daemon=True)
+        for thread in score_threads + [caption_thread, write_thread]:
+            thread.start()
+
+        # 앞 단계가 끝나면 다음 단계에 종료 표식을 보낸다
+        # (입력 단계에서 예외가 발생해도 이미 처리한 사진은 끝까지 기록한 뒤 예외를 전달)
+        try:
+            with ProcessPoolExecutor(max_workers=self.decode_workers) as executor:
+                self._feed(paths, executor)
+        finally:
+            for _ in score_threads:
+                self.score_queue.put(_DONE)
+            for thread in score_threads:
+                thread.join()
+
+            self.caption_queue.put(_DONE)
+            caption_thread.join()
+
+            self.write_queue.put(_DONE)
+            write_thread.join()
+
+        return self.processed, self.blurry
+
+    def print_stats(self):
+        """단계별 처리량을 출력합니다."""
+        print("\n===== 단계별 처리량 =====")
+        for stage in self.stats.values():
+            print(f"  {stage.summary()}")
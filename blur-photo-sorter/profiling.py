@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+단계별 시간 측정 모듈 (--profile)
+
+파일마다 단계별(decode, gray, faces, main_object, laplacian, caption, xmp, write) 경과 시간(wall)과
+CPU 시간, 최대 메모리(peak RSS)를 기록하고 p50/p95 요약을 출력합니다.
+워커 프로세스에서 측정한 값은 처리 결과(result["profile"])에 담아 부모 프로세스로 전달합니다.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 요약 출력 순서
+STAGE_ORDER = ["decode", "gray", "faces", "main_object", "laplacian", "caption", "xmp", "write"]
+
+
+def peak_rss_mb():
+    """
+    현재 프로세스의 최대 메모리 사용량(peak RSS)을 MB 단위로 반환합니다.
+    (프로세스 시작 후 최댓값이므로 파일별 값은 그 파일을 처리한 시점까지의 최댓값입니다)
+
+    Returns:
+        float: peak RSS (MB), 측정할 수 없으면 None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Profiler:
+    """파일 하나의 단계별 (경과 시간, CPU 시간)을 누적하는 측정기."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, wall, cpu):
+        total = self.stages.setdefault(name, [0.0, 0.0])
+        total[0] += wall
+        total[1] += cpu
+
+    @contextmanager
+    def stage(self, name):
+        """with 블록의 경과 시간과 호출 스레드의 CPU 시간을 name 단계에 더합니다."""
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def as_dict(self):
+        return {name: tuple(values) for name, values in self.stages.items()}
+
+
+def profiled(profiler, name):
+    """profiler가 None이면 아무것도 하지 않는 with 블록을 반환합니다."""
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+def percentile(values, q):
+    """
+    정렬된 값 목록의 q 분위수를 선형 보간으로 계산합니다.
+
+    Args:
+        values (list): 정렬된 값 목록
+        q (float): 0~100
+
+    Returns:
+        float: 분위수 (값이 없으면 0.0)
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class ProfileReport:
+    """
+    파일별 측정 결과를 모아 단계별 p50/p95 요약을 만드는 집계기.
+    여러 스레드(파이프라인 쓰기 단계 등)에서 호출할 수 있습니다.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.rss = []
+        self.files = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, wall, cpu, count=1):
+        """
+        단계 측정값을 기록합니다. 배치 단계(caption, xmp)는 count개 파일에 똑같이 나누어 기록합니다.
+        """
+        if count <= 0:
+            return
+        with self._lock:
+            samples = self.samples.setdefault(name, [])
+            samples.extend([(wall / count, cpu / count)] * count)
+
+    def add_batches(self, name, timings):
+        """(경과 시간, CPU 시간, 파일 수) 목록을 기록합니다."""
+        for wall, cpu, count in timings:
+            self.add(name, wall, cpu, count)
+
+    def add_result(self, result):
+        """처리 결과에 담긴 파일별 측정값(result["profile"], result["peak_rss_mb"])을 기록합니다."""
+        for name, (wall, cpu) in (result.get("profile") or {}).items():
+            self.add(name, wall, cpu)
+        with self._lock:
+            self.files += 1
+            if result.get("peak_rss_mb") is not None:
+                self.rss.append(result["peak_rss_mb"])
+
+    def wrap(self, write_result):
+        """
+        결과 처리 함수(finish_file 등)를 감싸 파일별 측정값과 write 단계 시간을 기록합니다.
+
+        Returns:
+            function: write_result(image_path, file_key, result)와 같은 형식의 함수
+        """
+        def profiled_write(image_path, file_key, result):
+            self.add_result(result)
+            profiler = Profiler()
+            with profiler.stage("write"):
+                write_result(image_path, file_key, result)
+            for name, (wall, cpu) in profiler.as_dict().items():
+                self.add(name, wall, cpu)
+        return profiled_write
+
+    def print_summary(self):
+        """단계별 경과 시간/CPU 시간의 p50, p95와 합계, peak RSS를 출력합니다."""
+        print(f"\n===== 단계별 시간 (파일 {self.files}개) =====")
+        print(f"  {'stage':<12} {'n':>6} {'wall p50':>10} {'wall p95':>10} {'cpu p50':>10} {'cpu p95':>10} {'wall 합계':>10}")
+        names = [name for name in STAGE_ORDER if name in self.samples]
+        names += sorted(name for name in self.samples if name not in STAGE_ORDER)
+        for name in names:
+            samples = self.samples[name]
+            walls = sorted(wall for wall, _ in samples)
+            cpus = sorted(cpu for _, cpu in samples)
+            print(f"  {name:<12} {len(samples):>6} "
+                  f"{percentile(walls, 50) * 1000:>8.1f}ms {percentile(walls, 95) * 1000:>8.1f}ms "
+                  f"{percentile(cpus, 50) * 1000:>8.1f}ms {percentile(cpus, 95) * 1000:>8.1f}ms "
+                  f"{sum(walls):>9.2f}s")
+        if self.rss:
+            rss = sorted(self.rss)
+            print(f"  peak RSS: p50 {percentile(rss, 50):.0f}MB, p95 {percentile(rss, 95):.0f}MB, 최대 {rss[-1]:.0f}MB")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+점수 리포트(manifest) 작성 모듈
+
+--report 모드에서 파일을 옮기거나 XMP를 쓰지 않고, 파일마다 한 행씩
+점수와 판단 결과를 CSV / JSON Lines / Parquet 파일로 바로바로 기록합니다.
+대용량 아카이브의 임계값을 다시 디코딩하지 않고 오프라인으로 조정하거나,
+점수 계산 버전(score_version) 간 결과를 비교할 때 사용합니다.
+"""
+
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+
+from blur_detection import SCORE_VERSION
+from score_cache import score_params_key
+from sharpness import DEFAULT_METRIC, METRICS
+
+REPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+REPORT_COLUMNS = [
+    "path",
+    "decision",
+    "is_blurry",
+    "threshold",
+    "metric",
+    "lap_var",
+    "main_object_score",
+    "metric_scores",
+    "face_count",
+    "face_scores",
+    "dhash",
+    "burst_keeper",
+    "destination",
+    "decode_mode",
+    "cached",
+    "decode_seconds",
+    "score_seconds",
+    "score_version",
+    "params",
+]
+
+# Parquet 파일은 이 행 수만큼 모아서 row group 단위로 기록
+PARQUET_ROW_GROUP_SIZE = 1000
+
+
+def report_format(report_path):
+    """
+    리포트 파일 확장자로 형식을 결정합니다.
+
+    Args:
+        report_path (str): 리포트 파일 경로
+
+    Returns:
+        str: "csv", "jsonl", "parquet" 중 하나 (지원하지 않는 확장자면 None)
+    """
+    return REPORT_FORMATS.get(os.path.splitext(report_path)[1].lower())
+
+
+def destination_path(image_path, result, deleted_folder=None, duplicates_folder=None, src_root=None):
+    """
+    처리 결과에 따라 파일을 옮길 경로를 반환합니다. (main.finish_file과 같은 기준)
+
+    Args:
+        image_path (str): 이미지 파일 경로
+        result (dict): 처리 결과
+        deleted_folder (str): 흐린 사진을 옮길 폴더
+        duplicates_folder (str): 연사 묶음의 나머지 사진을 옮길 폴더
+        src_root (str): 소스 폴더 - 지정하면 하위 폴더 구조를 유지한 경로를 반환
+
+    Returns:
+        str: 옮길 경로 (옮기지 않는 사진이거나 폴더를 지정하지 않은 경우 None)
+    """
+    if result["is_blurry"]:
+        folder = deleted_folder
+    elif result.get("burst_keeper"):
+        folder = duplicates_folder
+    else:
+        return None
+    if not folder:
+        return None
+    rel_path = os.path.relpath(image_path, src_root) if src_root else os.path.basename(image_path)
+    return os.path.join(folder, rel_path)
+
+
+def make_report_row(image_path, result, blur_threshold, score_options=None, deleted_folder=None,
+                    duplicates_folder=None, src_root=None):
+    """
+    처리 결과를 리포트 한 행으로 변환합니다.
+
+    Args:
+        image_path (str): 이미지 파일 경로
+        result (dict): score_arw 또는 캐시의 처리 결과
+        blur_threshold (float): 흐림 판단 기준값
+        score_options (dict): score_arw에 전달한 옵션
+        deleted_folder, duplicates_folder, src_root: destination 열 계산에 사용 (destination_path 참고)
+
+    Returns:
+        dict: REPORT_COLUMNS 순서의 행 (캐시에서 가져온 결과는 시간 값이 None)
+    """
+    score_options = score_options or {}
+    metric = score_options.get("metric", DEFAULT_METRIC)
+    metric_scores = result.get("metric_scores") or {metric: result["main_object_score"]}
+    return {
+        "path": image_path,
+        "decision": "blurry" if result["is_blurry"] else "duplicate" if result.get("burst_keeper") else "sharp",
+        "is_blurry": bool(result["is_blurry"]),
+        "threshold": float(blur_threshold),
+        "metric": metric,
+        "lap_var": float(result["lap_var"]),
+        "main_object_score": float(result["main_object_score"]),
+        "metric_scores": {name: float(score) for name, score in metric_scores.items()},
+        "face_count": len(result["faces"]),
+        "face_scores": [float(score) for score in result["face_scores"]],
+        "dhash": result.get("dhash"),
+        "burst_keeper": result.get("burst_keeper"),
+        "destination": destination_path(image_path, result, deleted_folder, duplicates_folder, src_root),
+        "decode_mode": result.get("decode_mode", "full"),
+        "cached": bool(result.get("cached", False)),
+        "decode_seconds": result.get("decode_seconds"),
+        "score_seconds": result.get("score_seconds"),
+        "score_version": SCORE_VERSION,
+        "params": score_params_key(score_options),
+    }
+
+
+class ReportWriter(ABC):
+    """
+    리포트 행을 파일에 스트리밍으로 기록하는 기본 클래스.
+
+    write_result(image_path, file_key, result)는 main.finish_file 대신
+    run_batches / Pipeline의 결과 처리 함수로 사용할 수 있습니다.
+    """
+
+    def __init__(self, report_path, blur_threshold=70.0, score_options=None, folders=None):
+        """
+        Args:
+            report_path (str): 리포트 파일 경로
+            blur_threshold (float): 흐림 판단 기준값
+            score_options (dict): score_arw에 전달한 옵션
+            folders (dict): destination 열 계산에 사용할 deleted_folder, duplicates_folder, src_root
+        """
+        self.report_path = report_path
+        self.blur_threshold = blur_threshold
+        self.score_options = score_options or {}
+        self.folders = folders or {}
+        self.rows = 0
+
+    @abstractmethod
+    def write_row(self, row):
+        """REPORT_COLUMNS 순서의 행 하나를 기록합니다."""
+
+    def write_result(self, image_path, file_key, result):
+        """처리 결과 하나를 리포트에 기록합니다."""
+        self.write_row(make_report_row(image_path, result, self.blur_threshold, self.score_options, **self.folders))
+        self.rows += 1
+
+    @abstractmethod
+    def close(self):
+        """남은 행을 기록하고 파일을 닫습니다."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvReportWriter(ReportWriter):
+    """CSV 리포트 (face_scores, metric_scores는 JSON 문자열로 기록)."""
+
+    def __init__(self, report_path, blur_threshold=70.0, score_options=None, folders=None):
+        super().__init__(report_path, blur_threshold, score_options, folders)
+        self.file = open(report_path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=REPORT_COLUMNS)
+        self.writer.writeheader()
+
+    def write_row(self, row):
+        row = dict(row, face_scores=json.dumps(row["face_scores"]), metric_scores=json.dumps(row["metric_scores"]))
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlReportWriter(ReportWriter):
+    """JSON Lines 리포트 (한 줄에 한 파일)."""
+
+    def __init__(self, report_path, blur_threshold=70.0, score_options=None, folders=None):
+        super().__init__(report_path, blur_threshold, score_options, folders)
+        self.file = open(report_path, "w", encoding="utf-8")
+
+    def write_row(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """Parquet 리포트 (pyarrow 필요, PARQUET_ROW_GROUP_SIZE 행마다 row group으로 기록)."""
+
+    def __init__(self, report_path, blur_threshold=70.0, score_options=None, folders=None,
+                 row_group_size=PARQUET_ROW_GROUP_SIZE):
+        super().__init__(report_path, blur_threshold, score_options, folders)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("decision", pa.string()),
+            ("is_blurry", pa.bool_()),
+            ("threshold", pa.float64()),
+            ("metric", pa.string()),
+            ("lap_var", pa.float64()),
+            ("main_object_score", pa.float64()),
+            ("metric_scores", pa.struct([(name, pa.float64()) for name in METRICS])),
+            ("face_count", pa.int32()),
+            ("face_scores", pa.list_(pa.float64())),
+            ("dhash", pa.string()),
+            ("burst_keeper", pa.string()),
+            ("destination", pa.string()),
+            ("decode_mode", pa.string()),
+            ("cached", pa.bool_()),
+            ("decode_seconds", pa.float64()),
+            ("score_seconds", pa.float64()),
+            ("score_version", pa.int32()),
+            ("params", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(report_path, self.schema)
+        self.row_group_size = max(1, row_group_size)
+        self.pending = []
+
+    def write_row(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        table = self.pa.Table.from_pylist(self.pending, schema=self.schema)
+        self.writer.write_table(table)
+        self.pending = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def open_report(report_path, blur_threshold=70.0, score_options=None, folders=None):
+    """
+    확장자에 맞는 리포트 작성기를 엽니다.
+
+    Args:
+        report_path (str): 리포트 파일 경로 (.csv, .jsonl, .parquet)
+        blur_threshold (float): 흐림 판단 기준값
+        score_options (dict): score_arw에 전달한 옵션
+        folders (dict): destination 열 계산에 사용할 deleted_folder, duplicates_folder, src_root
+
+    Returns:
+        ReportWriter: 리포트 작성기
+
+    Raises:
+        ValueError: 지원하지 않는 확장자인 경우
+        ImportError: Parquet 형식인데 pyarrow가 설치되어 있지 않은 경우
+    """
+    fmt = report_format(report_path)
+    if fmt == "csv":
+        return CsvReportWriter(report_path, blur_threshold, score_options, folders)
+    if fmt == "jsonl":
+        return JsonlReportWriter(report_path, blur_threshold, score_options, folders)
+    if fmt == "parquet":
+        return ParquetReportWriter(report_path, blur_threshold, score_options, folders)
+    raise ValueError(f"지원하지 않는 리포트 형식입니다: {report_path} (.csv, .jsonl, .parquet)")
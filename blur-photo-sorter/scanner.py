@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RAW 파일 탐색 모듈
+
+os.scandir로 하위 폴더까지 재귀적으로 탐색하면서 찾은 파일을 바로 반환(yield)합니다.
+전체 목록을 먼저 만들지 않으므로 수백만 개의 항목이 있는 네트워크 공유 폴더에서도
+탐색이 끝나기 전에 처리를 시작할 수 있습니다.
+"""
+
+import fnmatch
+import os
+import queue
+import threading
+
+DEFAULT_RAW_EXTENSIONS = ("arw", "cr3", "nef", "dng")
+
+# 백그라운드 탐색 스레드가 미리 찾아 둘 최대 파일 수
+DEFAULT_PREFETCH = 1024
+
+# 탐색 종료를 알리는 표식
+_DONE = object()
+
+
+def parse_extensions(value):
+    """
+    "arw,cr3,.NEF" 형식의 문자열을 확장자 튜플로 변환합니다.
+
+    Args:
+        value (str): 쉼표로 구분한 확장자 목록
+
+    Returns:
+        tuple: 소문자, 점이 붙은 확장자 목록 (예: (".arw", ".cr3", ".nef"))
+    """
+    extensions = []
+    for ext in value.split(","):
+        ext = ext.strip().lower().lstrip(".")
+        if ext:
+            extensions.append("." + ext)
+    return tuple(extensions)
+
+
+def _matches(rel_path, name, patterns):
+    """상대 경로 또는 파일 이름이 glob 패턴 중 하나와 일치하는지 확인합니다."""
+    return any(fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def iter_raw_files(root, extensions=None, include=None, exclude=None, recursive=True,
+                   skip_dirs=None, skip_hidden=True, sort_by_time=False):
+    """
+    root 아래의 RAW 파일 경로를 찾는 즉시 반환합니다.
+
+    glob 패턴은 root 기준 상대 경로('/' 구분)와 파일/폴더 이름에 모두 적용되며,
+    exclude 패턴과 일치하는 폴더는 하위 항목을 탐색하지 않습니다.
+    sort_by_time이면 폴더 하나를 모두 읽은 뒤 수정 시각(촬영 시각) 순서로 반환합니다. (연사 묶음용)
+
+    Args:
+        root (str): 탐색할 폴더
+        extensions (tuple): 처리할 확장자 (기본값: DEFAULT_RAW_EXTENSIONS)
+        include (list): 이 glob 패턴 중 하나와 일치하는 파일만 반환 (None이면 모두)
+        exclude (list): 이 glob 패턴과 일치하는 파일/폴더는 제외
+        recursive (bool): 하위 폴더까지 탐색할지 여부
+        skip_dirs (list): 탐색하지 않을 폴더 경로 (예: 흐린 사진을 옮기는 deleted 폴더)
+        skip_hidden (bool): '.'으로 시작하는 파일/폴더 제외 (._DSC0001.ARW 같은 macOS 메타데이터 파일 등)
+        sort_by_time (bool): 폴더별로 수정 시각 순서로 정렬하여 반환
+
+    Yields:
+        str: RAW 파일 경로
+    """
+    if extensions is None:
+        extensions = parse_extensions(",".join(DEFAULT_RAW_EXTENSIONS))
+    include = include or []
+    exclude = exclude or []
+    skip_dirs = {os.path.realpath(path) for path in (skip_dirs or [])}
+
+    # 재귀 호출 대신 스택으로 깊이 우선 탐색 (깊은 폴더 구조에서도 안전)
+    stack = [(root, "")]
+    while stack:
+        directory, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            print(f"폴더를 읽을 수 없습니다: {directory} ({str(e)})")
+            continue
+
+        subdirs = []
+        timed_files = []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if skip_hidden and name.startswith("."):
+                    continue
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+
+                try:
+                    # 심볼릭 링크 폴더는 따라가지 않음 (순환 방지)
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not _matches(rel_path, name, exclude) \
+                                and os.path.realpath(entry.path) not in skip_dirs:
+                            subdirs.append((entry.path, rel_path))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+
+                if not name.lower().endswith(extensions):
+                    continue
+                if include and not _matches(rel_path, name, include):
+                    continue
+                if _matches(rel_path, name, exclude):
+                    continue
+                if sort_by_time:
+                    try:
+                        timed_files.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+                else:
+                    yield entry.path
+
+        for _, path in sorted(timed_files):
+            yield path
+
+        # 이름순으로 하위 폴더를 탐색하도록 역순으로 쌓는다
+        stack.extend(sorted(subdirs, reverse=True))
+
+
+def is_raw_path(root, path, extensions=None, include=None, exclude=None, recursive=True,
+                skip_dirs=None, skip_hidden=True):
+    """
+    iter_raw_files가 반환할 파일인지 경로 하나만으로 확인합니다. (폴더 감시 이벤트로 받은 파일용)
+    경로의 각 폴더에도 iter_raw_files와 같은 제외 조건(숨김, exclude, skip_dirs)을 적용합니다.
+
+    Args:
+        root (str): 탐색 기준 폴더
+        path (str): 확인할 파일 경로
+        extensions, include, exclude, recursive, skip_dirs, skip_hidden: iter_raw_files와 같음
+
+    Returns:
+        bool: 처리 대상 RAW 파일이면 True
+    """
+    if extensions is None:
+        extensions = parse_extensions(",".join(DEFAULT_RAW_EXTENSIONS))
+    rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+    parts = rel_path.split("/")
+    if parts[0] == ".." or (not recursive and len(parts) > 1):
+        return False
+
+    # 상위 폴더 조건 (숨김 폴더, exclude 패턴, skip_dirs)
+    skip_dirs = {os.path.realpath(directory) for directory in (skip_dirs or [])}
+    for depth, part in enumerate(parts[:-1], 1):
+        if skip_hidden and part.startswith("."):
+            return False
+        if _matches("/".join(parts[:depth]), part, exclude or []):
+            return False
+    directory = os.path.realpath(os.path.dirname(path))
+    if any(directory == skip or directory.startswith(skip + os.sep) for skip in skip_dirs):
+        return False
+
+    # 파일 조건
+    name = parts[-1]
+    if skip_hidden and name.startswith("."):
+        return False
+    if not name.lower().endswith(extensions):
+        return False
+    if include and not _matches(rel_path, name, include):
+        return False
+    return not _matches(rel_path, name, exclude or [])
+
+
+def iter_prefetched(iterable, buffer_size=DEFAULT_PREFETCH):
+    """
+    iterable을 백그라운드 스레드에서 미리 읽어 두면서 항목을 반환합니다.
+    네트워크 공유 폴더의 느린 디렉터리 조회가 처리 작업을 막지 않도록 합니다.
+
+    Args:
+        iterable: 원본 iterable (예: iter_raw_files)
+        buffer_size (int): 미리 읽어 둘 최대 항목 수
+
+    Yields:
+        iterable의 항목 (원본에서 발생한 예외는 그대로 전달)
+    """
+    buffer = queue.Queue(maxsize=max(1, buffer_size))
+    stop = threading.Event()
+
+    def put(item):
+        # 소비를 중단하면(stop) 버퍼가 가득 차 있어도 탐색 스레드가 멈추지 않고 끝나도록 한다
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, name="scan", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+흐림 판단 점수를 SQLite에 저장하는 영구 캐시 모듈
+
+파일 크기 + 수정 시각 + 파일 앞/뒤 일부의 해시로 만든 키를 사용하므로,
+같은 파일을 다시 처리할 때는 디코딩 없이 저장된 점수로 임계값이나 선명도 지표(저장된 지표인 경우)만 바꿔
+재분류할 수 있습니다.
+파일 내용이 바뀌거나 점수 계산 방식(SCORE_VERSION)이 바뀌면 캐시는 무효화됩니다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from blur_detection import (
+    DEFAULT_DETECT_MAX_SIDE,
+    DEFAULT_GRID_SIZE,
+    FACE_THRESHOLD_SCALE,
+    SCORE_VERSION,
+    classify_score,
+    needs_full_recheck,
+)
+from defaults import DEFAULT_CACHE_NAME
+from sharpness import DEFAULT_METRIC
+
+# 부분 해시에 사용할 파일 앞/뒤 바이트 수
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# 테이블 구조가 바뀌면 증가시킵니다 (기존 테이블을 지우고 새로 만듦)
+SCHEMA_VERSION = 1
+
+
+def score_params_key(score_options):
+    """
+    점수 값에 영향을 주는 옵션(격자 크기, 얼굴 감지 해상도)을 캐시 키용 문자열로 만듭니다.
+    디코딩 방식은 별도 컬럼으로 저장하고, 선명도 지표는 지표별 점수를 함께 저장하므로 포함하지 않습니다.
+
+    Args:
+        score_options (dict): score_arw에 전달하는 옵션
+
+    Returns:
+        str: 옵션 문자열 (예: "grid=5,face=1600")
+    """
+    grid_size = score_options.get("grid_size", DEFAULT_GRID_SIZE)
+    face_max_side = score_options.get("face_max_side", DEFAULT_DETECT_MAX_SIDE)
+    return f"grid={grid_size},face={face_max_side or 0}"
+
+
+def file_signature(image_path):
+    """
+    파일 크기, 수정 시각, 앞/뒤 PARTIAL_HASH_BYTES 바이트의 해시로 캐시 키를 만듭니다.
+    흔들린 사진을 deleted 폴더로 옮겨도(이름 변경) 키는 그대로 유지됩니다.
+
+    Args:
+        image_path (str): 이미지 파일 경로
+
+    Returns:
+        str: 캐시 키
+    """
+    stat = os.stat(image_path)
+    digest = hashlib.sha1()
+    with open(image_path, "rb") as f:
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if stat.st_size > PARTIAL_HASH_BYTES * 2:
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+            digest.update(f.read(PARTIAL_HASH_BYTES))
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+
+class ScoreCache:
+    """
+    흐림 판단 결과(lap_var, main_object_score, 얼굴 좌표/점수, 태그, dHash)를 저장하는 SQLite 캐시.
+
+    같은 파일에 대해 디코딩 방식별(full/half/thumb)로 결과를 따로 저장합니다.
+    SQLite 연결은 부모 프로세스에서만 사용하며, 여러 스레드에서 호출할 수 있도록 잠금으로 보호합니다.
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): SQLite 파일 경로
+        """
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS scores")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                file_key TEXT NOT NULL,
+                decode_mode TEXT NOT NULL,
+                params TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                path TEXT,
+                lap_var REAL,
+                metric_scores TEXT,
+                faces TEXT,
+                face_scores TEXT,
+                tags TEXT,
+                dhash TEXT,
+                PRIMARY KEY (file_key, decode_mode, params)
+            )
+            """
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _row_to_result(self, row, blur_threshold, metric, face_threshold_scale):
+        decode_mode, lap_var, metric_scores, faces, face_scores, tags, dhash = row
+        faces = [tuple(face) for face in json.loads(faces)]
+        main_object_score = metric_scores[metric]
+        return {
+            "is_blurry": classify_score(main_object_score, len(faces) > 0, blur_threshold, face_threshold_scale),
+            "tags": json.loads(tags),
+            "lap_var": lap_var,
+            "main_object_score": main_object_score,
+            "faces": faces,
+            "face_scores": face_scores.get(metric, []),
+            "metric_scores": metric_scores,
+            "face_metric_scores": face_scores,
+            "decode_mode": decode_mode,
+            "dhash": dhash,
+            "cached": True,
+        }
+
+    def _select(self, file_key, decode_mode, params):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT decode_mode, lap_var, metric_scores, faces, face_scores, tags, dhash "
+                "FROM scores WHERE file_key = ? AND decode_mode = ? AND params = ? AND version = ?",
+                (file_key, decode_mode, params, SCORE_VERSION),
+            ).fetchone()
+        if row is None:
+            return None
+        # 지표별 점수와 지표별 얼굴 점수는 JSON으로 저장
+        row = list(row)
+        row[2] = json.loads(row[2])
+        row[4] = json.loads(row[4])
+        return row
+
+    def lookup(self, file_key, blur_threshold=70.0, score_options=None):
+        """
+        캐시된 점수로 현재 임계값 기준의 처리 결과를 만듭니다.
+        전체 해상도 결과가 있으면 어떤 디코딩 방식이든 그것을 사용합니다.
+        빠른 디코딩 결과만 있는 경우, 새 임계값 기준으로 재판단 구간에 들어가면
+        전체 해상도로 다시 계산해야 하므로 캐시 미스로 처리합니다.
+        선택한 선명도 지표의 점수가 저장되어 있지 않은 경우도 캐시 미스입니다.
+
+        Args:
+            file_key (str): file_signature로 만든 캐시 키
+            blur_threshold (float): 흐림 판단 기준값
+            score_options (dict): score_arw에 전달하는 옵션
+                (decode_mode, recheck_band, grid_size, face_max_side, metric, face_threshold_scale)
+
+        Returns:
+            dict: 처리 결과 (캐시에 없으면 None)
+        """
+        score_options = score_options or {}
+        decode_mode = score_options.get("decode_mode", "full")
+        recheck_band = score_options.get("recheck_band", 0.25)
+        metric = score_options.get("metric", DEFAULT_METRIC)
+        face_threshold_scale = score_options.get("face_threshold_scale", FACE_THRESHOLD_SCALE)
+        params = score_params_key(score_options)
+        modes = ["full"] if decode_mode == "full" else ["full", decode_mode]
+        for mode in modes:
+            row = self._select(file_key, mode, params)
+            if row is None or metric not in row[2]:
+                continue
+            # score_decoded와 같은 기준 (얼굴이 있으면 얼굴 임계값 주변)
+            if mode != "full" and needs_full_recheck(row[2][metric], len(json.loads(row[3])) > 0, blur_threshold,
+                                                     recheck_band, face_threshold_scale):
+                continue
+            with self.lock:
+                self.hits += 1
+            return self._row_to_result(row, blur_threshold, metric, face_threshold_scale)
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def store(self, file_key, image_path, result, score_options=None):
+        """
+        처리 결과를 캐시에 저장합니다. (같은 키/디코딩 방식이면 덮어쓰되, 지표별 점수는 기존 값과 합칩니다)
+
+        Args:
+            file_key (str): file_signature로 만든 캐시 키
+            image_path (str): 이미지 파일 경로 (참고용)
+            result (dict): score_arw의 처리 결과
+            score_options (dict): score_arw에 전달한 옵션
+        """
+        score_options = score_options or {}
+        decode_mode = result.get("decode_mode", "full")
+        params = score_params_key(score_options)
+        metric_scores = result.get("metric_scores") or {score_options.get("metric", DEFAULT_METRIC):
+                                                        result["main_object_score"]}
+        face_scores = result.get("face_metric_scores") or {}
+
+        # 다른 지표로 저장해 둔 점수 유지 (얼굴 감지와 격자는 지표와 무관하므로 같은 영역의 점수)
+        existing = self._select(file_key, decode_mode, params)
+        if existing is not None:
+            metric_scores = dict(existing[2], **metric_scores)
+            face_scores = dict(existing[4], **face_scores)
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scores "
+                "(file_key, decode_mode, params, version, path, lap_var, metric_scores, faces, face_scores, tags, dhash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_key,
+                    decode_mode,
+                    params,
+                    SCORE_VERSION,
+                    image_path,
+                    result["lap_var"],
+                    json.dumps(metric_scores),
+                    json.dumps([list(face) for face in result["faces"]]),
+                    json.dumps(face_scores),
+                    json.dumps(result["tags"]),
+                    result.get("dhash"),
+                ),
+            )
+            self.conn.commit()
+
+    def close(self):
+        """SQLite 연결을 닫습니다."""
+        with self.lock:
+            self.conn.close()
+
+
+def lookup_cached_result(cache, image_path, blur_threshold, score_options):
+    """
+    캐시에서 처리 결과를 찾습니다.
+
+    Args:
+        cache (ScoreCache): 점수 캐시 (None이면 사용하지 않음)
+        image_path (str): 이미지 파일 경로
+        blur_threshold (float): 흐림 판단 기준값
+        score_options (dict): score_arw에 전달하는 옵션
+
+    Returns:
+        tuple: (캐시 키, 처리 결과 또는 None) - 캐시를 사용하지 않으면 (None, None)
+    """
+    if cache is None:
+        return None, None
+    try:
+        file_key = file_signature(image_path)
+    except OSError as e:
+        print(f"캐시 키를 만들 수 없습니다: {image_path} ({str(e)})")
+        return None, None
+    return file_key, cache.lookup(file_key, blur_threshold, score_options)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+선명도(초점) 측정 모듈
+
+하나의 그레이스케일 이미지에서 여러 선명도 지표를 격자 셀별로 함께 계산합니다.
+
+- laplacian: Laplacian 분산 (기본값)
+- tenengrad: Sobel 기울기 에너지 평균 (gx^2 + gy^2)
+- fft: 셀 중앙 패치의 고주파 에너지 비율 (%)
+
+지표마다 값의 크기가 다르므로 흐림 판단 기본 임계값(DEFAULT_THRESHOLDS)도 지표별로 정합니다.
+"""
+
+import cv2
+import numpy as np
+
+# 지표 이름과 지표별 기본 흐림 판단 임계값은 defaults 모듈에 정의 (main.py --help용)
+from defaults import DEFAULT_METRIC, DEFAULT_THRESHOLDS, METRICS
+
+# fft 지표: 셀마다 중앙의 FFT_PATCH_SIDE x FFT_PATCH_SIDE 패치만 변환
+# (축소하면 측정하려는 고주파가 사라지므로 원본 해상도 패치를 사용)
+FFT_PATCH_SIDE = 128
+
+# fft 지표: 이 주파수(cycles/pixel, 최대 0.5) 이상을 고주파로 간주
+FFT_HIGH_FREQ_CUTOFF = 0.25
+
+
+def parse_metrics(value):
+    """
+    쉼표로 구분한 지표 목록을 파싱합니다.
+
+    Args:
+        value (str): 예) "laplacian,tenengrad"
+
+    Returns:
+        list: 지표 이름 목록 (중복 제거, 입력 순서 유지)
+
+    Raises:
+        ValueError: 알 수 없는 지표가 있는 경우
+    """
+    names = []
+    for name in (value or "").split(","):
+        name = name.strip().lower()
+        if not name or name in names:
+            continue
+        if name not in METRICS:
+            raise ValueError(f"알 수 없는 선명도 지표입니다: {name} ({', '.join(METRICS)})")
+        names.append(name)
+    return names
+
+
+def metric_names(metric=DEFAULT_METRIC, metrics=None):
+    """판단에 사용할 지표(metric)를 맨 앞에 두고 함께 기록할 지표(metrics)를 붙인 목록"""
+    return [metric] + [name for name in (metrics or []) if name != metric]
+
+
+def tile_laplacian_variance(gray, grid_size):
+    """
+    그레이스케일 이미지를 grid_size x grid_size 격자로 나누고 각 셀의 Laplacian 분산을 계산합니다.
+
+    전체 이미지에 Laplacian을 한 번만 적용한 뒤, 셀 경계 행/열만 보정하여
+    셀마다 따로 cv2.Laplacian을 호출한 것(셀 가장자리 BORDER_REFLECT_101)과 같은 값을 만들고,
+    셀별 합과 제곱합으로 분산을 한 번에 구합니다.
+    이미지 크기가 격자로 나누어 떨어지지 않으면 남는 오른쪽/아래 픽셀은 사용하지 않습니다.
+
+    Args:
+        gray: 그레이스케일 이미지 (uint8)
+        grid_size: 격자 한 변의 셀 수
+
+    Returns:
+        numpy.ndarray: (grid_size, grid_size) 크기의 셀별 Laplacian 분산
+    """
+    height, width = gray.shape[:2]
+    cell_h, cell_w = height // grid_size, width // grid_size
+    if cell_h < 2 or cell_w < 2:
+        raise ValueError(f"이미지({width}x{height})가 {grid_size}x{grid_size} 격자에 비해 너무 작습니다.")
+
+    # uint8 이미지의 Laplacian(±1020)과 경계 보정값(±255)은 int16에 담기므로
+    # float64 대비 1/4 메모리로 전체 Laplacian을 보관한다
+    gray = gray[:grid_size * cell_h, :grid_size * cell_w]
+    lap = cv2.Laplacian(gray, cv2.CV_16S)
+
+    # 셀 경계에서는 이웃 셀 픽셀 대신 반사된(reflect101) 픽셀을 사용하도록 보정
+    tops = np.arange(1, grid_size) * cell_h
+    bottoms = tops - 1
+    lap[tops, :] += gray[tops + 1, :].astype(np.int16) - gray[tops - 1, :]
+    lap[bottoms, :] += gray[bottoms - 1, :].astype(np.int16) - gray[bottoms + 1, :]
+
+    lefts = np.arange(1, grid_size) * cell_w
+    rights = lefts - 1
+    lap[:, lefts] += gray[:, lefts + 1].astype(np.int16) - gray[:, lefts - 1]
+    lap[:, rights] += gray[:, rights - 1].astype(np.int16) - gray[:, rights + 1]
+
+    # 격자 한 줄(band)씩 float64로 바꿔 셀별 합과 제곱합을 구한다 (임시 배열은 band 하나 크기)
+    # 정수 값의 합이므로 float64에서 오차 없이 계산된다
+    sums = np.empty((grid_size, grid_size))
+    sq_sums = np.empty((grid_size, grid_size))
+    for row in range(grid_size):
+        band = lap[row * cell_h:(row + 1) * cell_h].astype(np.float64)
+        sums[row] = band.sum(axis=0).reshape(grid_size, cell_w).sum(axis=1)
+        sq_sums[row] = np.einsum("ij,ij->j", band, band).reshape(grid_size, cell_w).sum(axis=1)
+
+    # 셀별 분산 계산 (Var = E[x^2] - E[x]^2)
+    n = cell_h * cell_w
+    mean = sums / n
+    return sq_sums / n - mean * mean
+
+
+def tile_tenengrad(gray, grid_size):
+    """
+    각 셀의 Tenengrad(Sobel 기울기 에너지 gx^2 + gy^2의 평균)를 계산합니다.
+
+    Sobel은 격자 한 줄(band)씩 위아래 한 행을 더 붙여 계산하므로 이미지 전체에 한 번 적용한 것과 같고,
+    기울기 이미지(int16)도 band 하나 크기만 메모리에 올라갑니다.
+
+    Args:
+        gray: 그레이스케일 이미지 (uint8)
+        grid_size: 격자 한 변의 셀 수
+
+    Returns:
+        numpy.ndarray: (grid_size, grid_size) 크기의 셀별 Tenengrad
+    """
+    height, width = gray.shape[:2]
+    cell_h, cell_w = height // grid_size, width // grid_size
+    if cell_h < 2 or cell_w < 2:
+        raise ValueError(f"이미지({width}x{height})가 {grid_size}x{grid_size} 격자에 비해 너무 작습니다.")
+
+    scores = np.empty((grid_size, grid_size))
+    for row in range(grid_size):
+        top, bottom = row * cell_h, (row + 1) * cell_h
+        start, stop = max(0, top - 1), min(height, bottom + 1)
+        band = gray[start:stop, :grid_size * cell_w]
+        gx = cv2.Sobel(band, cv2.CV_16S, 1, 0)[top - start:top - start + cell_h].astype(np.float64)
+        gy = cv2.Sobel(band, cv2.CV_16S, 0, 1)[top - start:top - start + cell_h].astype(np.float64)
+        energy = np.einsum("ij,ij->j", gx, gx) + np.einsum("ij,ij->j", gy, gy)
+        scores[row] = energy.reshape(grid_size, cell_w).sum(axis=1) / (cell_h * cell_w)
+    return scores
+
+
+def high_frequency_ratio(patches):
+    """
+    패치별로 DC를 제외한 전체 스펙트럼 에너지 중 FFT_HIGH_FREQ_CUTOFF 이상 주파수의 비율(%)을 계산합니다.
+    경계 효과를 줄이기 위해 평균을 빼고 Hann 창을 곱한 뒤 변환합니다.
+
+    Args:
+        patches: (패치 수, 높이, 너비) 크기의 그레이스케일 패치
+
+    Returns:
+        numpy.ndarray: 패치별 고주파 에너지 비율 (0~100)
+    """
+    patches = patches.astype(np.float32)
+    patches -= patches.mean(axis=(1, 2), keepdims=True)
+    height, width = patches.shape[1:]
+    patches *= np.outer(np.hanning(height), np.hanning(width)).astype(np.float32)
+
+    power = np.abs(np.fft.rfft2(patches)) ** 2
+    fy = np.fft.fftfreq(height)[:, None]
+    fx = np.fft.rfftfreq(width)[None, :]
+    radius = np.sqrt(fy * fy + fx * fx)
+
+    total = power[:, radius > 0].sum(axis=1)
+    high = power[:, radius >= FFT_HIGH_FREQ_CUTOFF].sum(axis=1)
+    return np.divide(high, total, out=np.zeros_like(total), where=total > 0) * 100
+
+
+def tile_fft_ratio(gray, grid_size):
+    """
+    각 셀 중앙 패치(최대 FFT_PATCH_SIDE x FFT_PATCH_SIDE)의 고주파 에너지 비율(%)을 계산합니다.
+    모든 셀의 패치를 모아 한 번에 변환합니다.
+
+    Args:
+        gray: 그레이스케일 이미지 (uint8)
+        grid_size: 격자 한 변의 셀 수
+
+    Returns:
+        numpy.ndarray: (grid_size, grid_size) 크기의 셀별 고주파 에너지 비율
+    """
+    height, width = gray.shape[:2]
+    cell_h, cell_w = height // grid_size, width // grid_size
+    if cell_h < 2 or cell_w < 2:
+        raise ValueError(f"이미지({width}x{height})가 {grid_size}x{grid_size} 격자에 비해 너무 작습니다.")
+
+    side = min(FFT_PATCH_SIDE, cell_h, cell_w)
+    top0, left0 = (cell_h - side) // 2, (cell_w - side) // 2
+    patches = np.empty((grid_size * grid_size, side, side), dtype=np.uint8)
+    for row in range(grid_size):
+        for col in range(grid_size):
+            top, left = row * cell_h + top0, col * cell_w + left0
+            patches[row * grid_size + col] = gray[top:top + side, left:left + side]
+    return high_frequency_ratio(patches).reshape(grid_size, grid_size)
+
+
+TILE_METRICS = {
+    "laplacian": tile_laplacian_variance,
+    "tenengrad": tile_tenengrad,
+    "fft": tile_fft_ratio,
+}
+
+
+def tile_metrics(gray, grid_size, names=(DEFAULT_METRIC,)):
+    """
+    같은 그레이스케일 이미지에서 여러 지표의 셀별 점수를 계산합니다.
+    지표를 하나씩 계산하고 임시 배열을 해제하므로 메모리 최대치는 가장 큰 지표 하나만큼입니다.
+
+    Args:
+        gray: 그레이스케일 이미지 (uint8)
+        grid_size (int): 격자 한 변의 셀 수
+        names: 계산할 지표 이름 목록
+
+    Returns:
+        dict: 지표 이름 → (grid_size, grid_size) 셀별 점수
+    """
+    return {name: TILE_METRICS[name](gray, grid_size) for name in names}
+
+
+def laplacian_variance(gray):
+    """
+    그레이스케일 이미지 전체의 Laplacian 분산을 계산합니다.
+    Laplacian은 int16으로 계산하고 분산은 cv2.meanStdDev(내부 double 누적)로 구하므로
+    float64 Laplacian 배열을 만들지 않습니다.
+
+    Args:
+        gray: 그레이스케일 이미지 (uint8)
+
+    Returns:
+        float: Laplacian 분산
+    """
+    _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+    return float(stddev[0, 0]) ** 2
+
+
+def region_sharpness(gray, metric=DEFAULT_METRIC):
+    """
+    얼굴 영역처럼 잘라낸 그레이스케일 영역 하나의 선명도를 계산합니다.
+
+    Args:
+        gray: 그레이스케일 영역 (uint8)
+        metric (str): 지표 이름
+
+    Returns:
+        float: 선명도 점수
+    """
+    if metric == "laplacian":
+        return laplacian_variance(gray)
+    if metric == "tenengrad":
+        return float(tile_tenengrad(gray, 1)[0, 0])
+    if metric == "fft":
+        return float(tile_fft_ratio(gray, 1)[0, 0])
+    raise ValueError(f"알 수 없는 선명도 지표입니다: {metric}")
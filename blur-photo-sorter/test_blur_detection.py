@@ -0,0 +1,84 @@
+"""
+blur_detection 모듈 테스트 (빠른 디코딩 점수의 전체 해상도 재판단)
+pytest
+"""
+
+import numpy as np
+import pytest
+
+import blur_detection
+from blur_detection import FACE_THRESHOLD_SCALE, effective_threshold, needs_full_recheck, score_decoded
+
+
+def test_effective_threshold():
+    assert effective_threshold(False, 100.0) == 100.0
+    assert effective_threshold(True, 100.0) == pytest.approx(100.0 * FACE_THRESHOLD_SCALE)
+    assert effective_threshold(True, 100.0, face_threshold_scale=2.0) == 200.0
+
+
+@pytest.mark.parametrize("score, has_faces, expected", [
+    (80.0, False, True),
+    (74.0, False, False),
+    (126.0, False, False),
+    # 얼굴 임계값(130) 기준으로 ±32.5
+    (127.0, True, True),
+    (98.0, True, True),
+    (97.0, True, False),
+    (163.0, True, False),
+])
+def test_needs_full_recheck(score, has_faces, expected):
+    assert needs_full_recheck(score, has_faces, 100.0, 0.25, face_threshold_scale=1.3) is expected
+
+
+def fake_score_image(scores):
+    """디코딩 방식별 얼굴 점수를 돌려주는 score_image 대체 함수"""
+    def score_image(rgb, blur_threshold=100.0, *args):
+        score = scores[rgb.shape[1]]
+        face_threshold_scale = args[-1]
+        return {
+            "is_blurry": score < blur_threshold * face_threshold_scale,
+            "tags": [],
+            "lap_var": 0.0,
+            "main_object_score": score,
+            "faces": [(0, 0, 10, 10)],
+            "face_scores": [score],
+            "metric_scores": {"laplacian": score},
+            "face_metric_scores": {"laplacian": [score]},
+            "dhash": None,
+        }
+    return score_image
+
+
+def test_face_score_near_face_threshold_is_rechecked(monkeypatch):
+    half = np.zeros((20, 30, 3), dtype=np.uint8)
+    full = np.zeros((40, 60, 3), dtype=np.uint8)
+    decoded = []
+
+    def decode_for_scoring(image_path, decode_mode="full"):
+        decoded.append(decode_mode)
+        return full, "full"
+
+    # 빠른 디코딩에서는 얼굴 임계값(130) 바로 아래, 전체 해상도에서는 그 위
+    monkeypatch.setattr(blur_detection, "score_image", fake_score_image({30: 127.0, 60: 140.0}))
+    monkeypatch.setattr(blur_detection, "decode_for_scoring", decode_for_scoring)
+
+    result, rgb = score_decoded("a.ARW", half, blur_threshold=100.0, decode_mode="half", recheck_band=0.25,
+                                face_threshold_scale=1.3)
+
+    # blur_threshold(100) ± 25 밖이지만 얼굴 임계값 ± 구간 안이므로 전체 해상도로 다시 판단
+    assert decoded == ["full"]
+    assert rgb is full
+    assert result["decode_mode"] == "full"
+    assert result["main_object_score"] == 140.0
+    assert result["is_blurry"] is False
+
+
+def test_face_score_far_from_face_threshold_keeps_fast_decode(monkeypatch):
+    half = np.zeros((20, 30, 3), dtype=np.uint8)
+    monkeypatch.setattr(blur_detection, "score_image", fake_score_image({30: 200.0}))
+    monkeypatch.setattr(blur_detection, "decode_for_scoring", lambda *args: pytest.fail("다시 디코딩하면 안 됨"))
+
+    result, rgb = score_decoded("a.ARW", half, blur_threshold=100.0, decode_mode="half", recheck_band=0.25,
+                                face_threshold_scale=1.3)
+    assert rgb is half
+    assert result["decode_mode"] == "half"
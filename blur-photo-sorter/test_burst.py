@@ -0,0 +1,133 @@
+"""
+burst 모듈 테스트 (BK-tree, 연사 묶음, 파이프라인 순서 복원)
+pytest
+"""
+
+import multiprocessing
+import os
+import random
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import blur_detection
+from burst import BKTree, BurstGrouper, hamming_distance
+from pipeline import Pipeline, ReorderBuffer
+
+
+def test_bktree_search_within_distance():
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for index, value in enumerate(values):
+        tree.add(value, index)
+    # 같은 값은 한 노드에 모인다
+    tree.add(values[0], "same")
+    assert tree.size == len(values) + 1
+
+    for query in values[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 5, 20, 32):
+            expected = sorted((hamming_distance(query, value), index) for index, value in enumerate(values)
+                              if hamming_distance(query, value) <= radius)
+            found = sorted(found for found in tree.search(query, radius) if found[1] != "same")
+            assert found == expected
+
+    assert sorted((item for _, item in tree.search(values[0], 0)), key=str) == [0, "same"]
+    assert BKTree().search(values[0], 64) == []
+
+
+def frames(grouper, *entries):
+    """(이름, 촬영 시각, dHash, 점수[, 그룹])를 차례로 넣고 닫힌 묶음을 이름 목록으로 반환"""
+    closed = []
+    for name, taken_at, dhash, score, *group in entries:
+        closed.extend(grouper.add(name, taken_at, dhash, score, *group))
+    return [sorted(frame[0] for frame in burst.frames) for burst in closed]
+
+
+def test_burst_closes_after_time_window():
+    grouper = BurstGrouper(max_distance=4, time_window=2.0)
+    scene_a = "00000000000000ff"
+    scene_b = "ffffffff00000000"
+
+    # 시간 간격 안의 비슷한 사진은 같은 묶음, 다른 장면은 다른 묶음
+    assert frames(grouper, ("a1", 0.0, scene_a, 10), ("a2", 0.5, "00000000000000fe", 30), ("b1", 1.0, scene_b, 5)) \
+        == []
+    # 마지막 사진에서 time_window보다 멀어지면 닫힌다
+    assert frames(grouper, ("c1", 10.0, scene_a, 1)) == [["a1", "a2"], ["b1"]]
+    assert [sorted(frame[0] for frame in burst.frames) for burst in grouper.flush()] == [["c1"]]
+    assert (grouper.frames, grouper.bursts) == (4, 3)
+
+    # keeper는 가장 선명한 사진
+    grouper = BurstGrouper(max_distance=4, time_window=2.0)
+    frames(grouper, ("a1", 0.0, scene_a, 10), ("a2", 0.5, scene_a, 30), ("a3", 1.0, scene_a, 20))
+    keeper, others = grouper.flush()[0].split()
+    assert keeper == "a2"
+    assert sorted(others) == ["a1", "a3"]
+
+
+def test_burst_groups_by_directory():
+    grouper = BurstGrouper(max_distance=4, time_window=2.0)
+    scene = "00000000000000ff"
+    # 폴더 사이에서 촬영 시각이 거꾸로 가도 앞 폴더의 묶음은 시각이 앞으로 멀어질 때만 닫힌다
+    closed = frames(grouper, ("a1", 100.0, scene, 1, "A"), ("a2", 101.0, scene, 1, "A"),
+                    ("b1", 50.0, scene, 1, "B"), ("b2", 100.5, scene, 1, "B"))
+    assert closed == [["b1"]]
+    # 다른 폴더의 사진과는 묶지 않는다
+    assert sorted(sorted(frame[0] for frame in burst.frames) for burst in grouper.flush()) == \
+        [["a1", "a2"], ["b2"]]
+
+
+def test_reorder_buffer():
+    buffer = ReorderBuffer()
+    assert buffer.push(2, "c") == []
+    assert buffer.push(1, "b") == []
+    assert buffer.push(0, "a") == ["a", "b", "c"]
+    assert buffer.push(4, "e") == []
+    assert buffer.push(3, None) == [None, "e"]
+    assert buffer.waiting == {}
+
+    # 앞 번호가 오지 않으면 남은 항목을 번호 순서대로 꺼낸다
+    assert buffer.push(8, "i") == []
+    assert buffer.push(6, "g") == []
+    assert buffer.drain() == ["g", "i"]
+    assert buffer.waiting == {}
+
+
+def slow_first_decode(image_path, decode_mode="full"):
+    # 첫 사진의 디코딩이 가장 늦게 끝나도록 해서 흐림 판단 결과가 입력 순서와 다르게 도착하게 한다
+    if image_path.endswith("0.npy"):
+        time.sleep(0.5)
+    return np.load(image_path)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="워커 프로세스에 decode_raw 교체를 전달하려면 fork 방식이 필요합니다")
+def test_pipeline_groups_in_capture_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(blur_detection, "decode_raw", slow_first_decode)
+    rng = np.random.default_rng(0)
+    scene_a = rng.integers(0, 256, size=(240, 320, 3), dtype=np.uint8)
+    scene_b = cv2.flip(scene_a, -1)
+
+    # frame0, frame1: 같은 장면 연사 / frame2~: time_window보다 나중에 찍은 다른 장면
+    images = [scene_a, scene_a, scene_b, scene_b, scene_b]
+    taken = [0.0, 0.5, 10.0, 10.5, 11.0]
+    paths = []
+    base = time.time() - 3600
+    for index, (rgb, offset) in enumerate(zip(images, taken)):
+        path = os.path.join(str(tmp_path), f"frame{index}.npy")
+        np.save(path, rgb)
+        os.utime(path, (base + offset, base + offset))
+        paths.append(path)
+
+    written = {}
+    pipeline = Pipeline(lambda path, file_key, result: written.setdefault(path, result), blur_threshold=10.0,
+                        decode_workers=4, score_threads=4, grouper=BurstGrouper(max_distance=4, time_window=2.0))
+    processed, _ = pipeline.run(paths)
+
+    assert processed == len(paths)
+    keepers = {os.path.basename(path): result.get("burst_keeper") for path, result in written.items()}
+    # 첫 사진이 늦게 도착해도 두 번째 사진과 같은 묶음이 된다 (묶음마다 keeper 하나만 burst_keeper가 없음)
+    assert sum(keepers[f"frame{index}.npy"] is None for index in (0, 1)) == 1
+    assert sum(keepers[f"frame{index}.npy"] is None for index in (2, 3, 4)) == 1
@@ -0,0 +1,53 @@
+"""
+face_detection 모듈 테스트 (축소 이미지에서의 최소 얼굴 크기)
+pytest
+"""
+
+import numpy as np
+import pytest
+
+import face_detection
+from face_detection import MIN_FACE_SIZE, detect_faces, min_face_size
+
+
+@pytest.mark.parametrize("scale, expected", [
+    # 원본 해상도에서는 MIN_FACE_SIZE 그대로
+    (1.0, (MIN_FACE_SIZE, MIN_FACE_SIZE)),
+    # 6000px → 1600px: 30 * 0.27 = 8px이지만 감지 창(24px)보다 작게 하지 않음
+    (1600 / 6000, (24, 24)),
+    (0.9, (27, 27)),
+])
+def test_min_face_size(scale, expected):
+    assert min_face_size(scale, (24, 24)) == expected
+
+
+class RecordingCascade:
+    """detectMultiScale에 전달한 인자를 기록하는 캐스케이드"""
+
+    def __init__(self):
+        self.calls = []
+
+    def getOriginalWindowSize(self):
+        return 24, 24
+
+    def detectMultiScale(self, gray, **kwargs):
+        self.calls.append((gray.shape, kwargs))
+        return np.array([[100, 100, 40, 40]], dtype=np.int32)
+
+
+def test_detect_faces_clamps_min_size_to_cascade_window(monkeypatch):
+    cascade = RecordingCascade()
+    monkeypatch.setattr(face_detection, "get_cascade", lambda cascade_path=None: cascade)
+
+    faces = detect_faces(np.zeros((4000, 6000), dtype=np.uint8), max_side=1600)
+
+    (shape, kwargs), = cascade.calls
+    assert shape == (1067, 1600)
+    assert kwargs["minSize"] == (24, 24)
+    # 얼굴 좌표는 원본 해상도로 되돌린다
+    assert faces.tolist() == [[375, 375, 150, 150]]
+
+
+def test_real_cascade_window_is_at_least_min_size():
+    window = tuple(face_detection.get_cascade().getOriginalWindowSize())
+    assert min_face_size(0.1, window) == window
@@ -0,0 +1,78 @@
+"""
+main 모듈 테스트 (--workers 병렬 처리)
+pytest
+
+RAW 파일 대신 합성 이미지를 .npy로 저장하고 blur_detection.decode_raw를 바꿔 사용합니다.
+워커 프로세스에도 바꾼 함수가 전달되어야 하므로 fork 방식에서만 실행합니다.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+import blur_detection
+from main import run_batches
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="워커 프로세스에 decode_raw 교체를 전달하려면 fork 방식이 필요합니다")
+
+# 실행할 때마다 달라지는 값은 비교에서 제외
+TIMING_KEYS = ("decode_seconds", "score_seconds", "profile", "peak_rss_mb")
+
+
+def load_npy(image_path, decode_mode="full"):
+    return np.load(image_path)
+
+
+@pytest.fixture
+def synthetic_files(tmp_path, monkeypatch):
+    """선명한 사진과 단계별로 흐린 사진을 섞은 합성 이미지 파일 목록"""
+    monkeypatch.setattr(blur_detection, "decode_raw", load_npy)
+    rng = np.random.default_rng(0)
+    paths = []
+    for index, sigma in enumerate([0, 0.8, 0, 2.0, 0.5, 0, 3.0, 1.2]):
+        rgb = rng.integers(0, 256, size=(240, 320, 3), dtype=np.uint8)
+        if sigma:
+            rgb = cv2.GaussianBlur(rgb, (0, 0), sigma)
+        path = os.path.join(str(tmp_path), f"frame{index}.npy")
+        np.save(path, rgb)
+        paths.append(path)
+    return paths
+
+
+def collect(paths, workers):
+    results = []
+
+    def write_result(full_path, file_key, result):
+        results.append((full_path, {key: value for key, value in result.items() if key not in TIMING_KEYS}))
+
+    processed, blurry = run_batches(paths, 70.0, workers, write_result)
+    return processed, blurry, results
+
+
+def test_score_arw_worker_matches_in_process(synthetic_files):
+    expected = [blur_detection.score_arw_worker(path, 70.0)[0] for path in synthetic_files]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        actual = [result for result, _ in executor.map(blur_detection.score_arw_worker, synthetic_files,
+                                                       [70.0] * len(synthetic_files))]
+
+    for want, got in zip(expected, actual):
+        for key in TIMING_KEYS:
+            want.pop(key, None)
+            got.pop(key, None)
+        assert got == want
+
+
+def test_workers_match_sequential(synthetic_files):
+    sequential = collect(synthetic_files, workers=1)
+    parallel = collect(synthetic_files, workers=2)
+
+    processed, blurry, results = sequential
+    assert processed == len(synthetic_files)
+    assert 0 < blurry < processed
+    # 병렬 처리도 입력 순서대로 같은 결과를 반환
+    assert parallel == sequential
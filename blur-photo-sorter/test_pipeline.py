@@ -0,0 +1,84 @@
+"""
+pipeline 모듈 테스트 (입력 단계 오류 처리, 순서 복원 버퍼 크기 제한)
+pytest
+
+RAW 파일 대신 합성 이미지를 .npy로 저장하고 blur_detection.decode_raw를 바꿔 사용합니다.
+워커 프로세스에도 바꾼 함수가 전달되어야 하므로 fork 방식에서만 실행합니다.
+"""
+
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+import blur_detection
+import pipeline
+from burst import BurstGrouper
+from pipeline import Pipeline, ReorderBuffer
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="워커 프로세스에 decode_raw 교체를 전달하려면 fork 방식이 필요합니다")
+
+
+def slow_first_decode(image_path, decode_mode="full"):
+    # 첫 사진의 디코딩이 늦게 끝나서 뒤 순서의 결과가 먼저 도착하도록 한다
+    if image_path.endswith("frame0.npy"):
+        time.sleep(1.0)
+    return np.load(image_path)
+
+
+def make_frames(directory, count):
+    rng = np.random.default_rng(0)
+    paths = []
+    for index in range(count):
+        path = os.path.join(str(directory), f"frame{index}.npy")
+        np.save(path, rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_feed_error_still_writes_scored_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(blur_detection, "decode_raw", slow_first_decode)
+    paths = make_frames(tmp_path, 4)
+
+    def scan():
+        # 탐색 도중 네트워크 공유 폴더 오류가 발생한 경우
+        yield from paths
+        raise OSError("폴더를 읽을 수 없음")
+
+    for grouper in (None, BurstGrouper()):
+        written = []
+        pipe = Pipeline(lambda path, file_key, result: written.append(path), blur_threshold=10.0,
+                        decode_workers=2, score_threads=2, grouper=grouper)
+        with pytest.raises(OSError):
+            pipe.run(scan())
+        # 예외가 발생하기 전에 넘긴 사진은 모두 기록된다
+        assert sorted(written) == sorted(paths)
+        assert pipe.processed == len(paths)
+
+
+def test_reorder_buffer_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(blur_detection, "decode_raw", slow_first_decode)
+    paths = make_frames(tmp_path, 30)
+    peak = []
+
+    class RecordingReorderBuffer(ReorderBuffer):
+        def push(self, index, item):
+            ready = super().push(index, item)
+            peak.append(len(self.waiting) + len(ready))
+            return ready
+
+    monkeypatch.setattr(pipeline, "ReorderBuffer", RecordingReorderBuffer)
+
+    written = []
+    pipe = Pipeline(lambda path, file_key, result: written.append(path), blur_threshold=10.0,
+                    decode_workers=2, score_threads=2, max_frames=2, queue_size=2, grouper=BurstGrouper())
+    processed, _ = pipe.run(paths)
+
+    assert processed == len(paths)
+    # 첫 사진이 늦어져도 버퍼에는 reorder_window(max_frames + queue_size)개까지만 쌓인다
+    assert max(peak) <= 4
+    assert pipe.reorder_window == 4
+
@@ -0,0 +1,109 @@
+"""
+report 모듈 테스트
+pytest (parquet 형식은 pyarrow가 설치된 경우에만)
+"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from report import REPORT_COLUMNS, ReportWriter, destination_path, open_report
+
+
+def make_result(is_blurry, burst_keeper=None):
+    return {
+        "is_blurry": is_blurry,
+        "lap_var": 42.5,
+        "main_object_score": 55.25,
+        "metric_scores": {"laplacian": 55.25, "tenengrad": 12.0},
+        "faces": [(0, 0, 10, 10)],
+        "face_scores": [80.0],
+        "tags": [],
+        "dhash": "00ff00ff00ff00ff",
+        "burst_keeper": burst_keeper,
+        "decode_mode": "half",
+    }
+
+
+def read_rows(report_path):
+    if report_path.endswith(".csv"):
+        with open(report_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            row["is_blurry"] = row["is_blurry"] == "True"
+            row["metric_scores"] = json.loads(row["metric_scores"])
+            row["face_scores"] = json.loads(row["face_scores"])
+            for column in ("lap_var", "main_object_score"):
+                row[column] = float(row[column])
+            row["destination"] = row["destination"] or None
+        return rows
+    if report_path.endswith(".jsonl"):
+        with open(report_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    pq = pytest.importorskip("pyarrow.parquet")
+    rows = pq.read_table(report_path).to_pylist()
+    for row in rows:
+        # struct 열은 METRICS 전체를 가지므로 기록하지 않은 지표는 None
+        row["metric_scores"] = {name: score for name, score in row["metric_scores"].items() if score is not None}
+    return rows
+
+
+def test_report_writer_is_abstract():
+    with pytest.raises(TypeError):
+        ReportWriter("report.csv")
+
+
+def test_destination_path(tmp_path):
+    src = str(tmp_path)
+    image_path = os.path.join(src, "day1", "a.ARW")
+    folders = {"deleted_folder": os.path.join(src, "deleted"), "duplicates_folder": os.path.join(src, "duplicates"),
+               "src_root": src}
+
+    assert destination_path(image_path, make_result(True), **folders) == os.path.join(src, "deleted", "day1", "a.ARW")
+    assert destination_path(image_path, make_result(False, burst_keeper="b.ARW"), **folders) == \
+        os.path.join(src, "duplicates", "day1", "a.ARW")
+    assert destination_path(image_path, make_result(False), **folders) is None
+    # duplicates 폴더를 지정하지 않으면 연사 중복도 옮기지 않는다
+    assert destination_path(image_path, make_result(False, burst_keeper="b.ARW"), folders["deleted_folder"]) is None
+
+
+@pytest.mark.parametrize("extension", [".csv", ".jsonl", ".parquet"])
+def test_write_one_row_per_format(tmp_path, extension):
+    if extension == ".parquet":
+        pytest.importorskip("pyarrow")
+    src = str(tmp_path)
+    report_path = os.path.join(src, "report" + extension)
+    folders = {"deleted_folder": os.path.join(src, "deleted"), "duplicates_folder": os.path.join(src, "duplicates"),
+               "src_root": src}
+    files = [
+        (os.path.join(src, "blurry.ARW"), make_result(True)),
+        (os.path.join(src, "dup.ARW"), make_result(False, burst_keeper=os.path.join(src, "keeper.ARW"))),
+        (os.path.join(src, "sharp.ARW"), make_result(False)),
+    ]
+
+    with open_report(report_path, 70.0, {"metric": "laplacian"}, folders) as report:
+        for image_path, result in files:
+            report.write_result(image_path, None, result)
+    assert report.rows == len(files)
+
+    rows = read_rows(report_path)
+    assert len(rows) == len(files)
+    assert set(REPORT_COLUMNS) <= set(rows[0])
+
+    for row, (image_path, result) in zip(rows, files):
+        assert row["path"] == image_path
+        assert row["decode_mode"] == "half"
+        assert row["is_blurry"] is result["is_blurry"]
+        assert row["lap_var"] == pytest.approx(42.5)
+        assert row["main_object_score"] == pytest.approx(55.25)
+        assert row["metric_scores"] == {"laplacian": 55.25, "tenengrad": 12.0}
+        assert row["face_scores"] == [80.0]
+
+    assert [row["destination"] for row in rows] == [
+        os.path.join(src, "deleted", "blurry.ARW"),
+        os.path.join(src, "duplicates", "dup.ARW"),
+        None,
+    ]
+    assert [row["decision"] for row in rows] == ["blurry", "duplicate", "sharp"]
@@ -0,0 +1,119 @@
+"""
+scanner 모듈 테스트
+pytest
+"""
+
+import os
+
+import pytest
+
+from scanner import is_raw_path, iter_prefetched, iter_raw_files, parse_extensions
+
+FILES = [
+    "DSC00001.ARW",
+    "DSC00002.arw",
+    "IMG_0001.CR3",
+    "notes.txt",
+    ".hidden.ARW",
+    "._DSC00001.ARW",
+    "trip/DSC00010.ARW",
+    "trip/day2/DSC00020.NEF",
+    "trip/day2/preview.JPG",
+    "trip/.cache/DSC00030.ARW",
+    "backup/DSC00040.ARW",
+    "deleted/DSC00050.ARW",
+    "deleted/trip/DSC00051.ARW",
+    "duplicates/DSC00060.ARW",
+]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for rel_path in FILES:
+        path = tmp_path.joinpath(*rel_path.split("/"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"raw")
+    return str(tmp_path)
+
+
+def scan(root, **kwargs):
+    return sorted(os.path.relpath(path, root).replace(os.sep, "/") for path in iter_raw_files(root, **kwargs))
+
+
+def skip_dirs(root):
+    # main.py와 같이 흐린 사진(deleted)과 중복 사진(duplicates) 폴더는 다시 탐색하지 않는다
+    return [os.path.join(root, "deleted"), os.path.join(root, "duplicates")]
+
+
+def test_parse_extensions():
+    assert parse_extensions("arw, .CR3,,nef ") == (".arw", ".cr3", ".nef")
+
+
+def test_recursive_scan_skips_moved_and_hidden(tree):
+    assert scan(tree, skip_dirs=skip_dirs(tree)) == [
+        "DSC00001.ARW",
+        "DSC00002.arw",
+        "IMG_0001.CR3",
+        "backup/DSC00040.ARW",
+        "trip/DSC00010.ARW",
+        "trip/day2/DSC00020.NEF",
+    ]
+    # skip_dirs가 없으면 옮겨 둔 사진도 탐색한다
+    assert "deleted/trip/DSC00051.ARW" in scan(tree)
+    assert "duplicates/DSC00060.ARW" in scan(tree)
+    # 숨김 파일/폴더를 포함하는 경우
+    assert {".hidden.ARW", "._DSC00001.ARW", "trip/.cache/DSC00030.ARW"} <= \
+        set(scan(tree, skip_dirs=skip_dirs(tree), skip_hidden=False))
+
+
+def test_non_recursive_and_extensions(tree):
+    assert scan(tree, recursive=False, extensions=parse_extensions("arw")) == ["DSC00001.ARW", "DSC00002.arw"]
+    assert scan(tree, extensions=parse_extensions("nef,jpg"), skip_dirs=skip_dirs(tree)) == \
+        ["trip/day2/DSC00020.NEF", "trip/day2/preview.JPG"]
+
+
+@pytest.mark.parametrize("include, exclude, expected", [
+    # 파일 이름 패턴
+    (["DSC*"], None, ["DSC00001.ARW", "DSC00002.arw", "backup/DSC00040.ARW", "trip/DSC00010.ARW",
+                      "trip/day2/DSC00020.NEF"]),
+    # 상대 경로 패턴
+    (["trip/*"], None, ["trip/DSC00010.ARW", "trip/day2/DSC00020.NEF"]),
+    # exclude 패턴과 일치하는 폴더는 하위 항목도 제외
+    (None, ["trip"], ["DSC00001.ARW", "DSC00002.arw", "IMG_0001.CR3", "backup/DSC00040.ARW"]),
+    (None, ["trip/day2", "*.CR3"], ["DSC00001.ARW", "DSC00002.arw", "backup/DSC00040.ARW",
+                                    "trip/DSC00010.ARW"]),
+    # include와 exclude를 함께 지정하면 exclude가 우선
+    (["DSC*"], ["backup", "DSC00002.*"], ["DSC00001.ARW", "trip/DSC00010.ARW", "trip/day2/DSC00020.NEF"]),
+])
+def test_include_exclude(tree, include, exclude, expected):
+    assert scan(tree, include=include, exclude=exclude, skip_dirs=skip_dirs(tree)) == expected
+
+
+def test_is_raw_path_matches_scan(tree):
+    kwargs = {"include": ["DSC*"], "exclude": ["backup"], "skip_dirs": skip_dirs(tree)}
+    expected = scan(tree, **kwargs)
+    candidates = [rel_path for rel_path in FILES if is_raw_path(tree, os.path.join(tree, *rel_path.split("/")),
+                                                                **kwargs)]
+    assert sorted(candidates) == expected
+
+
+def test_sort_by_time_within_directory(tree):
+    names = ["DSC00001.ARW", "DSC00002.arw", "IMG_0001.CR3"]
+    # 이름순과 반대로 촬영 시각을 지정
+    for offset, name in enumerate(reversed(names)):
+        os.utime(os.path.join(tree, name), (1_000_000 + offset, 1_000_000 + offset))
+    paths = [os.path.basename(path) for path in iter_raw_files(tree, recursive=False, sort_by_time=True)]
+    assert paths == list(reversed(names))
+
+
+def test_iter_prefetched_forwards_items_and_errors():
+    assert list(iter_prefetched(iter(range(100)), buffer_size=4)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise OSError("네트워크 오류")
+
+    items = iter_prefetched(failing())
+    assert next(items) == 1
+    with pytest.raises(OSError):
+        next(items)
@@ -0,0 +1,155 @@
+"""
+score_cache 모듈 테스트
+pytest
+"""
+
+import os
+
+import pytest
+
+import score_cache
+from score_cache import ScoreCache, file_signature, lookup_cached_result
+
+
+def make_result(score, decode_mode="full", metric_scores=None, faces=None):
+    return {
+        "is_blurry": score < 70.0,
+        "tags": [],
+        "lap_var": 123.0,
+        "main_object_score": score,
+        "faces": faces or [],
+        "face_scores": [score] if faces else [],
+        "metric_scores": metric_scores or {"laplacian": score},
+        "face_metric_scores": {},
+        "dhash": "0123456789abcdef",
+        "decode_mode": decode_mode,
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ScoreCache(os.path.join(str(tmp_path), "scores.sqlite"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = os.path.join(str(tmp_path), "a.ARW")
+    with open(path, "wb") as f:
+        f.write(os.urandom(1024))
+    return path
+
+
+def test_store_lookup_round_trip(cache):
+    cache.store("key", "a.ARW", make_result(100.0))
+
+    result = cache.lookup("key", 70.0)
+    assert result["main_object_score"] == 100.0
+    assert result["lap_var"] == 123.0
+    assert result["dhash"] == "0123456789abcdef"
+    assert result["cached"] is True
+    assert result["is_blurry"] is False
+    # 임계값만 바꾸면 디코딩 없이 재분류
+    assert cache.lookup("key", 150.0)["is_blurry"] is True
+    assert (cache.hits, cache.misses) == (2, 0)
+
+    assert cache.lookup("other", 70.0) is None
+    assert cache.misses == 1
+
+
+def test_store_merges_metric_scores(cache):
+    cache.store("key", "a.ARW", make_result(100.0), {"metric": "laplacian"})
+    cache.store("key", "a.ARW", make_result(400.0, metric_scores={"tenengrad": 400.0}), {"metric": "tenengrad"})
+
+    # 나중에 저장한 지표가 앞서 저장한 지표를 지우지 않는다
+    result = cache.lookup("key", 70.0, {"metric": "laplacian"})
+    assert result["metric_scores"] == {"laplacian": 100.0, "tenengrad": 400.0}
+    assert result["main_object_score"] == 100.0
+    assert cache.lookup("key", 380.0, {"metric": "tenengrad"})["main_object_score"] == 400.0
+    # 저장하지 않은 지표는 캐시 미스
+    assert cache.lookup("key", 7.0, {"metric": "fft"}) is None
+
+
+def test_fast_decode_row_misses_inside_recheck_band(cache):
+    options = {"decode_mode": "half", "recheck_band": 0.25}
+    cache.store("key", "a.ARW", make_result(80.0, decode_mode="half"), options)
+
+    # 80은 임계값 100 ± 25 안이므로 전체 해상도로 다시 판단해야 한다
+    assert cache.lookup("key", 100.0, options) is None
+    # 임계값 ± 구간 밖이면 빠른 디코딩 점수를 그대로 사용
+    assert cache.lookup("key", 50.0, options)["decode_mode"] == "half"
+    # 전체 해상도 결과가 있으면 재판단 구간과 관계없이 사용
+    cache.store("key", "a.ARW", make_result(80.0), options)
+    assert cache.lookup("key", 100.0, options)["decode_mode"] == "full"
+
+
+def test_fast_decode_face_row_uses_face_threshold(cache):
+    options = {"decode_mode": "half", "recheck_band": 0.25, "face_threshold_scale": 1.3}
+    cache.store("face", "a.ARW", make_result(127.0, decode_mode="half", faces=[(0, 0, 10, 10)]), options)
+    cache.store("plain", "b.ARW", make_result(127.0, decode_mode="half"), options)
+
+    # 127은 임계값 100 ± 25 밖이지만 얼굴 임계값 130 ± 32.5 안이므로 전체 해상도로 다시 판단해야 한다
+    assert cache.lookup("face", 100.0, options) is None
+    # 얼굴이 없으면 임계값 100 기준으로 판단하므로 그대로 사용
+    result = cache.lookup("plain", 100.0, options)
+    assert (result["decode_mode"], result["is_blurry"]) == ("half", False)
+    # 얼굴 임계값 구간 밖이면 얼굴 임계값으로 분류
+    result = cache.lookup("face", 60.0, options)
+    assert (result["decode_mode"], result["is_blurry"]) == ("half", False)
+
+
+def test_full_lookup_ignores_fast_decode_rows(cache):
+    cache.store("key", "a.ARW", make_result(10.0, decode_mode="thumb"), {"decode_mode": "thumb"})
+    assert cache.lookup("key", 70.0, {"decode_mode": "full"}) is None
+
+
+def test_params_change_misses(cache):
+    cache.store("key", "a.ARW", make_result(100.0), {"grid_size": 5})
+    assert cache.lookup("key", 70.0, {"grid_size": 8}) is None
+
+
+def test_signature_changes_with_size_and_mtime(image_path):
+    key = file_signature(image_path)
+    assert file_signature(image_path) == key
+
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched = file_signature(image_path)
+    assert touched != key
+
+    with open(image_path, "ab") as f:
+        f.write(b"\0")
+    assert file_signature(image_path) != touched
+
+
+def test_modified_file_misses(cache, image_path):
+    file_key, result = lookup_cached_result(cache, image_path, 70.0, {})
+    assert result is None
+    cache.store(file_key, image_path, make_result(100.0))
+    assert lookup_cached_result(cache, image_path, 70.0, {})[1] is not None
+
+    with open(image_path, "ab") as f:
+        f.write(b"more")
+    assert lookup_cached_result(cache, image_path, 70.0, {})[1] is None
+
+
+def test_score_version_change_invalidates(cache, monkeypatch):
+    cache.store("key", "a.ARW", make_result(100.0))
+    monkeypatch.setattr(score_cache, "SCORE_VERSION", score_cache.SCORE_VERSION + 1)
+    assert cache.lookup("key", 70.0) is None
+
+
+def test_schema_version_change_recreates_table(tmp_path):
+    db_path = os.path.join(str(tmp_path), "scores.sqlite")
+    cache = ScoreCache(db_path)
+    cache.store("key", "a.ARW", make_result(100.0))
+    assert cache.conn.execute("PRAGMA user_version").fetchone()[0] == score_cache.SCHEMA_VERSION
+    cache.conn.execute("PRAGMA user_version = 0")
+    cache.conn.commit()
+    cache.close()
+
+    # 다른 구조의 캐시 파일은 지우고 새로 만든다
+    cache = ScoreCache(db_path)
+    assert cache.lookup("key", 70.0) is None
+    cache.close()
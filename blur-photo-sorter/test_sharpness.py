@@ -0,0 +1,56 @@
+"""
+sharpness 모듈 테스트
+pytest
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from sharpness import tile_laplacian_variance
+
+
+def reference_tile_variance(gray, grid_size):
+    """셀마다 따로 cv2.Laplacian을 적용하던 이전 방식 (셀 가장자리는 BORDER_REFLECT_101)"""
+    height, width = gray.shape[:2]
+    cell_h, cell_w = height // grid_size, width // grid_size
+    scores = np.empty((grid_size, grid_size))
+    for row in range(grid_size):
+        for col in range(grid_size):
+            cell = gray[row * cell_h:(row + 1) * cell_h, col * cell_w:(col + 1) * cell_w]
+            scores[row, col] = cv2.Laplacian(cell, cv2.CV_64F).var()
+    return scores
+
+
+@pytest.mark.parametrize("shape, grid_size", [
+    ((100, 150), 5),
+    # 격자로 나누어 떨어지지 않는 크기 (남는 오른쪽/아래 픽셀은 사용하지 않음)
+    ((103, 157), 5),
+    ((240, 320), 8),
+    # 셀이 가장 작은 경우 (2x2)
+    ((10, 12), 5),
+])
+def test_matches_per_tile_laplacian(shape, grid_size):
+    gray = np.random.default_rng(1).integers(0, 256, size=shape, dtype=np.uint8)
+
+    expected = reference_tile_variance(gray, grid_size)
+    actual = tile_laplacian_variance(gray, grid_size)
+
+    assert actual.shape == (grid_size, grid_size)
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_cell_boundaries_do_not_use_neighbor_pixels():
+    # 셀마다 밝기가 다른 평평한 영역이면 셀 안에는 경계가 없으므로 모든 셀의 분산이 0
+    cell = 20
+    levels = np.arange(25, dtype=np.uint8).reshape(5, 5) * 10
+    gray = np.kron(levels, np.ones((cell, cell), dtype=np.uint8))
+
+    np.testing.assert_array_equal(tile_laplacian_variance(gray, 5), np.zeros((5, 5)))
+    # 전체 이미지 Laplacian을 그대로 나눴다면 셀 경계의 밝기 차이가 분산에 들어간다
+    assert cv2.Laplacian(gray, cv2.CV_64F)[:cell, :cell].var() > 0
+
+
+def test_too_small_image_raises():
+    with pytest.raises(ValueError):
+        tile_laplacian_variance(np.zeros((9, 9), dtype=np.uint8), 5)
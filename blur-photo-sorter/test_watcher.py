@@ -0,0 +1,101 @@
+"""
+watcher 모듈 테스트 (WatchCheckpoint로 이어서 처리)
+pytest
+"""
+
+import json
+import os
+
+from main import run_watch
+from watcher import WatchCheckpoint
+
+
+class FakeWatcher:
+    """정해 둔 묶음을 차례로 넘기는 감시기"""
+
+    pending_count = 0
+
+    def __init__(self, *batches):
+        self._batches = batches
+
+    def batches(self, stop_event=None):
+        yield from self._batches
+
+
+def make_files(directory, count):
+    paths = []
+    for index in range(count):
+        path = os.path.join(str(directory), f"DSC{index:05d}.ARW")
+        with open(path, "wb") as f:
+            f.write(b"raw" * (index + 1))
+        paths.append(path)
+    return paths
+
+
+def run_once(checkpoint_path, batch):
+    """체크포인트를 열어 batch를 처리하고 실제로 처리한 파일 목록을 반환"""
+    processed = []
+
+    def write_result(image_path, file_key, result):
+        processed.append(image_path)
+
+    checkpoint = WatchCheckpoint(checkpoint_path)
+    write = checkpoint.wrap(write_result)
+
+    def process(paths):
+        for path in paths:
+            write(path, None, {})
+        return len(paths), 0
+
+    try:
+        run_watch(FakeWatcher(batch), process, checkpoint, stop_event=None)
+    finally:
+        checkpoint.close()
+    return processed
+
+
+def test_restart_skips_processed_files(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    paths = make_files(tmp_path, 4)
+
+    assert run_once(checkpoint_path, paths[:2]) == paths[:2]
+    # 다시 시작하면 처리한 파일은 건너뛰고 나머지만 처리
+    assert run_once(checkpoint_path, paths) == paths[2:]
+    assert run_once(checkpoint_path, paths) == []
+
+    # 내용이 바뀐 파일은 다시 처리
+    with open(paths[0], "ab") as f:
+        f.write(b"edited")
+    assert run_once(checkpoint_path, paths) == [paths[0]]
+
+
+def test_load_drops_missing_and_changed_files(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    paths = make_files(tmp_path, 3)
+    run_once(checkpoint_path, paths)
+
+    # 흐린 사진 폴더로 옮겨진 파일의 기록은 열 때 정리된다
+    os.remove(paths[1])
+    checkpoint = WatchCheckpoint(checkpoint_path)
+    checkpoint.close()
+    assert set(checkpoint.done) == {paths[0], paths[2]}
+    with open(checkpoint_path, encoding="utf-8") as f:
+        assert [json.loads(line)["path"] for line in f] == [paths[0], paths[2]]
+
+
+def test_truncated_last_line_is_tolerated(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    paths = make_files(tmp_path, 3)
+    run_once(checkpoint_path, paths[:2])
+
+    # 기록 도중 비정상 종료되어 마지막 줄이 잘린 경우
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"path": paths[2], "size": 9, "mtime_ns": 1})[:20])
+
+    # 잘린 줄만 무시하고 앞의 기록은 그대로 사용
+    assert run_once(checkpoint_path, paths) == [paths[2]]
+
+    # 잘린 줄은 정리되고 이후 기록이 온전한 줄로 이어진다
+    with open(checkpoint_path, encoding="utf-8") as f:
+        assert [json.loads(line)["path"] for line in f] == paths
+    assert run_once(checkpoint_path, paths) == []
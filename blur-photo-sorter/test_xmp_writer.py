@@ -0,0 +1,96 @@
+"""
+xmp_writer 모듈 테스트
+pytest
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from xmp_writer import SidecarWriter, build_xmp_packet, sidecar_path, write_sidecar
+
+RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+
+
+def read_tags(xmp_path):
+    """사이드카의 dc:subject, MicrosoftPhoto, Lightroom 키워드 목록"""
+    root = ET.parse(xmp_path).getroot()
+    return [[li.text for li in bag.iter(f"{RDF}li")] for bag in root.iter(f"{RDF}Bag")]
+
+
+def leftover_tmp_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_tags_are_xml_escaped(tmp_path):
+    tags = ["Tom & Jerry", "<script>", "a > b", "\"quoted\" 'tag'", "한글 태그"]
+    image_path = str(tmp_path / "photo.ARW")
+
+    packet = build_xmp_packet(tags)
+    assert "<script>" not in packet
+    assert "Tom &amp; Jerry" in packet
+
+    # 파싱하면 원래 태그 그대로 세 곳에 모두 들어 있다
+    with SidecarWriter(batch_size=2, fsync=False) as writer:
+        writer.submit(image_path, tags)
+    assert read_tags(sidecar_path(image_path)) == [tags, tags, tags]
+
+
+@pytest.mark.parametrize("fsync", [True, False])
+def test_batch_replaces_existing_sidecar(tmp_path, fsync):
+    paths = [str(tmp_path / f"photo{index}.ARW") for index in range(5)]
+    write_sidecar(paths[0], ["old"])
+
+    with SidecarWriter(batch_size=2, flush_interval=0.01, fsync=fsync) as writer:
+        for index, path in enumerate(paths):
+            writer.submit(path, [f"tag{index}"])
+
+    assert (writer.written, writer.failed) == (len(paths), 0)
+    for index, path in enumerate(paths):
+        assert read_tags(sidecar_path(path))[0] == [f"tag{index}"]
+    assert leftover_tmp_files(tmp_path) == []
+
+
+@pytest.mark.parametrize("failing", ["fsync", "replace"])
+def test_failed_write_keeps_old_sidecar_and_removes_tmp(tmp_path, monkeypatch, failing):
+    image_path = str(tmp_path / "photo.ARW")
+    other_path = str(tmp_path / "other.ARW")
+    write_sidecar(image_path, ["old"])
+
+    original = getattr(os, failing)
+    calls = []
+
+    def fail_first(*args):
+        # 배치의 첫 파일(photo.ARW)에서만 실패시켜 같은 배치의 다른 파일은 기록되는지 확인
+        calls.append(args)
+        if len(calls) == 1:
+            raise OSError("디스크 오류")
+        return original(*args)
+
+    monkeypatch.setattr(os, failing, fail_first)
+
+    with SidecarWriter(batch_size=2, fsync=True) as writer:
+        writer.submit(image_path, ["new"])
+        writer.submit(other_path, ["other"])
+
+    assert (writer.written, writer.failed) == (1, 1)
+    # 원본 사이드카는 이전 내용 그대로이고 임시 파일은 남지 않는다
+    assert read_tags(sidecar_path(image_path))[0] == ["old"]
+    assert read_tags(sidecar_path(other_path))[0] == ["other"]
+    assert leftover_tmp_files(tmp_path) == []
+
+
+def test_write_sidecar_removes_tmp_on_failure(tmp_path, monkeypatch):
+    image_path = str(tmp_path / "photo.ARW")
+    write_sidecar(image_path, ["old"])
+
+    def fail(*args):
+        raise OSError("디스크 오류")
+
+    monkeypatch.setattr(os, "fsync", fail)
+    with pytest.raises(OSError):
+        write_sidecar(image_path, ["new"])
+
+    assert read_tags(sidecar_path(image_path))[0] == ["old"]
+    assert leftover_tmp_files(tmp_path) == []
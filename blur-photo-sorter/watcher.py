@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+폴더 감시(--watch) 모듈
+
+메모리 카드를 복사해 넣는 폴더를 계속 감시하면서, 새 RAW 파일이 다 쓰이면 처리 대상으로 넘깁니다.
+
+- FolderWatcher: Linux에서는 inotify(ctypes, 외부 패키지 없음)로 변경을 받고,
+  사용할 수 없으면 주기적인 폴더 탐색(polling)으로 대신합니다.
+  파일 크기와 수정 시각이 settle_seconds 동안 바뀌지 않으면 다 쓰인 것으로 판단합니다.
+- WatchCheckpoint: 처리를 마친 파일을 JSON Lines 파일에 기록하여, 다시 시작하면 이어서 처리합니다.
+- ThroughputMeter: 누적 처리 수와 최근 처리량을 집계합니다.
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from scanner import is_raw_path, iter_raw_files
+
+# 파일 크기/수정 시각이 이 시간(초) 동안 바뀌지 않으면 다 쓰인 것으로 판단
+DEFAULT_SETTLE_SECONDS = 2.0
+
+# 준비된 파일 확인 주기 (polling 모드에서는 폴더 탐색 주기)
+DEFAULT_POLL_INTERVAL = 2.0
+
+# 복사가 계속되는 동안에도 이 개수가 모이면 바로 처리
+DEFAULT_MAX_BATCH = 256
+
+DEFAULT_CHECKPOINT_NAME = ".blur_watch_checkpoint.jsonl"
+
+# inotify 이벤트 (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """ctypes로 호출하는 Linux inotify. 사용할 수 없는 플랫폼에서는 생성 시 OSError가 발생합니다."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify는 Linux에서만 사용할 수 있습니다.")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        self.directories = {}
+
+    def add_watch(self, directory):
+        """폴더 하나를 감시합니다. (하위 폴더는 따로 추가해야 함)"""
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"{os.strerror(err)}: {directory}")
+        self.directories[wd] = directory
+
+    def read_events(self, timeout):
+        """
+        timeout(초)까지 기다린 뒤 도착한 이벤트를 반환합니다.
+
+        Returns:
+            list: (폴더 경로, 이름, mask) 목록 - 큐가 넘친 경우 (None, None, IN_Q_OVERFLOW)
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, None, mask))
+            elif mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+            elif wd in self.directories:
+                events.append((self.directories[wd], name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    폴더에 새로 들어오는 RAW 파일을 찾아 다 쓰인 것부터 묶음(batch)으로 반환하는 감시기.
+
+    처음 batches()를 호출하면 기존 파일을 한 번 탐색한 뒤, 그 다음부터는 inotify 이벤트로 받은 파일
+    (polling 모드에서는 주기적인 탐색에서 새로 생기거나 바뀐 파일)만 확인합니다.
+    복사가 진행 중인 파일(크기/수정 시각이 settle_seconds 안에 바뀐 파일)이 남아 있으면
+    max_batch개가 모일 때까지 기다렸다가 한꺼번에 넘겨 캡션 배치와 연사 묶음이 잘게 나뉘지 않도록 합니다.
+    """
+
+    def __init__(self, root, extensions=None, include=None, exclude=None, recursive=True, skip_dirs=None,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 max_batch=DEFAULT_MAX_BATCH, use_inotify=True):
+        """
+        Args:
+            root (str): 감시할 폴더
+            extensions, include, exclude, recursive, skip_dirs: scanner.iter_raw_files와 같음
+            settle_seconds (float): 파일이 이 시간 동안 바뀌지 않으면 다 쓰인 것으로 판단
+            poll_interval (float): 준비된 파일 확인 주기 (polling 모드에서는 폴더 탐색 주기)
+            max_batch (int): 복사 중인 파일이 남아 있어도 바로 넘길 준비된 파일 수
+            use_inotify (bool): False이면 항상 polling 모드 사용
+        """
+        self.root = root
+        self.filters = {
+            "extensions": extensions,
+            "include": include,
+            "exclude": exclude,
+            "recursive": recursive,
+            "skip_dirs": skip_dirs,
+        }
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.max_batch = max(1, max_batch)
+        # 경로 → ((크기, 수정 시각), 마지막으로 바뀐 것을 본 시각)
+        self.pending = {}
+        # 넘겨준 파일의 (크기, 수정 시각) - polling 모드에서 같은 파일을 다시 넘기지 않도록 사용
+        self.emitted = {}
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                print(f"inotify를 사용할 수 없어 {poll_interval}초마다 폴더를 탐색합니다: {str(e)}")
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify is not None else "polling"
+
+    @property
+    def pending_count(self):
+        """아직 쓰이는 중이거나 settle_seconds를 기다리는 파일 수"""
+        return len(self.pending)
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _add_candidate(self, path, now):
+        if path not in self.pending:
+            self.pending[path] = (None, now)
+
+    def _watch_tree(self, directory):
+        """directory와 하위 폴더에 inotify 감시를 추가합니다. 실패하면 polling 모드로 바꿉니다."""
+        skip_dirs = {os.path.realpath(path) for path in (self.filters["skip_dirs"] or [])}
+        stack = [directory]
+        while stack and self.inotify is not None:
+            current = stack.pop()
+            try:
+                self.inotify.add_watch(current)
+            except OSError as e:
+                print(f"inotify 감시를 추가할 수 없어 polling 모드로 바꿉니다: {str(e)}")
+                self.inotify.close()
+                self.inotify = None
+                return
+            if not self.filters["recursive"]:
+                return
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                            continue
+                        if os.path.realpath(entry.path) not in skip_dirs:
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _scan(self, directory, now):
+        """directory 아래의 RAW 파일 중 처음 보거나 바뀐 파일을 후보로 추가합니다."""
+        if directory == self.root:
+            paths = iter_raw_files(directory, **self.filters)
+        else:
+            # 하위 폴더를 탐색할 때도 include/exclude는 root 기준 상대 경로로 판단
+            paths = (path for path in iter_raw_files(directory, extensions=self.filters["extensions"],
+                                                     skip_dirs=self.filters["skip_dirs"])
+                     if is_raw_path(self.root, path, **self.filters))
+        for path in paths:
+            self._scan_file(path, now)
+
+    def _is_watched_dir(self, directory):
+        """새로 생긴 폴더가 탐색 대상(숨김/exclude/skip_dirs가 아닌 하위 폴더)인지 확인합니다."""
+        if not self.filters["recursive"]:
+            return False
+        # 폴더 안의 가상의 RAW 파일로 상위 폴더 조건만 확인
+        probe = os.path.join(directory, "probe.arw")
+        return is_raw_path(self.root, probe, extensions=(".arw",), exclude=self.filters["exclude"],
+                           skip_dirs=self.filters["skip_dirs"])
+
+    def _scan_file(self, path, now):
+        if path in self.pending:
+            return
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return
+        if self.emitted.get(path) != signature:
+            self._add_candidate(path, now)
+
+    def _handle_events(self, timeout):
+        now = time.monotonic()
+        for directory, name, mask in self.inotify.read_events(timeout):
+            if mask & IN_Q_OVERFLOW:
+                # 이벤트를 놓쳤으므로 전체 탐색으로 보완
+                print("inotify 이벤트 큐가 넘쳐 폴더를 다시 탐색합니다.")
+                self._scan(self.root, now)
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                # 새 하위 폴더: 감시를 추가하고, 감시 전에 만들어진 파일을 찾기 위해 한 번 탐색
+                if self._is_watched_dir(path):
+                    self._watch_tree(path)
+                    self._scan(path, now)
+                continue
+            if is_raw_path(self.root, path, **self.filters):
+                # 닫힘/이동 이벤트가 와도 settle_seconds 동안 변화가 없는지 확인한 뒤 넘긴다
+                self.pending.pop(path, None)
+                self._add_candidate(path, now)
+
+    def _collect_ready(self):
+        """settle_seconds 동안 바뀌지 않은 후보를 준비된 파일로 꺼냅니다."""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed_at) in list(self.pending.items()):
+            try:
+                current = self._signature(path)
+            except OSError:
+                # 복사 도중 이름이 바뀌었거나 삭제된 파일
+                del self.pending[path]
+                continue
+            if current != signature:
+                self.pending[path] = (current, now)
+            elif current[0] > 0 and now - changed_at >= self.settle_seconds:
+                del self.pending[path]
+                self.emitted[path] = current
+                ready.append((current[1], path))
+        return ready
+
+    def batches(self, stop_event=None):
+        """
+        다 쓰인 파일을 묶음으로 반환합니다. stop_event가 설정될 때까지 계속 감시합니다.
+
+        Args:
+            stop_event (threading.Event): 감시를 멈출 때 설정하는 이벤트
+
+        Yields:
+            list: 수정 시각 순서로 정렬한 파일 경로 목록
+        """
+        stop_event = stop_event or threading.Event()
+        if self.inotify is not None:
+            self._watch_tree(self.root)
+        self._scan(self.root, time.monotonic())
+
+        ready = []
+        last_scan = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                if self.inotify is not None:
+                    self._handle_events(self.poll_interval if not self.pending else min(self.poll_interval, 0.5))
+                else:
+                    stop_event.wait(self.poll_interval if not self.pending else min(self.poll_interval, 0.5))
+                    if time.monotonic() - last_scan >= self.poll_interval:
+                        self._scan(self.root, time.monotonic())
+                        last_scan = time.monotonic()
+
+                ready.extend(self._collect_ready())
+                # 복사 중인 파일이 없거나 충분히 모이면 넘긴다
+                if ready and (not self.pending or len(ready) >= self.max_batch):
+                    batch, ready = [path for _, path in sorted(ready)], []
+                    yield batch
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
+                self.inotify = None
+
+
+class WatchCheckpoint:
+    """
+    처리를 마친 파일의 (경로, 크기, 수정 시각)을 JSON Lines 파일에 이어 쓰는 체크포인트.
+    다시 시작할 때 같은 크기/수정 시각의 파일은 건너뛰고, 열 때 이미 없는 파일의 기록은 정리합니다.
+    여러 스레드(파이프라인 쓰기 단계 등)에서 호출할 수 있습니다.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): 체크포인트 파일 경로
+        """
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        self._load()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        lines = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                    self.done[entry["path"]] = (entry["size"], entry["mtime_ns"])
+                except (ValueError, KeyError):
+                    continue  # 비정상 종료로 잘린 마지막 줄 등
+
+        # 옮겨졌거나 바뀐 파일의 기록을 정리하여 다시 쓴다
+        self.done = {path: signature for path, signature in self.done.items() if self._signature(path) == signature}
+        if lines != len(self.done):
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for path, (size, mtime_ns) in self.done.items():
+                    f.write(json.dumps({"path": path, "size": size, "mtime_ns": mtime_ns}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def is_done(self, path):
+        """같은 크기/수정 시각으로 이미 처리한 파일이면 True"""
+        with self._lock:
+            signature = self.done.get(path)
+        return signature is not None and signature == self._signature(path)
+
+    def mark_done(self, path, signature):
+        """
+        처리를 마친 파일을 기록합니다.
+
+        Args:
+            path (str): 파일 경로
+            signature (tuple): 처리 전에 확인한 (크기, 수정 시각) - 흐린 사진은 처리 후 옮겨지므로 미리 확인
+        """
+        if signature is None:
+            return
+        with self._lock:
+            self.done[path] = signature
+            self.file.write(json.dumps({"path": path, "size": signature[0], "mtime_ns": signature[1]},
+                                       ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def wrap(self, write_result):
+        """
+        결과 처리 함수(finish_file 등)를 감싸 처리를 마친 파일을 기록합니다.
+
+        Returns:
+            function: write_result(image_path, file_key, result)와 같은 형식의 함수
+        """
+        def checkpointed_write(image_path, file_key, result):
+            signature = self._signature(image_path)
+            write_result(image_path, file_key, result)
+            self.mark_done(image_path, signature)
+        return checkpointed_write
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+class ThroughputMeter:
+    """감시 모드의 누적 처리 수와 최근 처리량(개/분)을 집계합니다."""
+
+    def __init__(self, window=60.0):
+        """
+        Args:
+            window (float): 최근 처리량을 계산할 구간 (초)
+        """
+        self.window = window
+        self.started = time.monotonic()
+        self.processed = 0
+        self.blurry = 0
+        self.batches = 0
+        self.recent = collections.deque()
+
+    def record(self, processed, blurry=0):
+        """처리한 묶음 하나를 기록합니다."""
+        now = time.monotonic()
+        self.processed += processed
+        self.blurry += blurry
+        self.batches += 1
+        self.recent.append((now, processed))
+        while self.recent and now - self.recent[0][0] > self.window:
+            self.recent.popleft()
+
+    @property
+    def recent_rate(self):
+        """최근 window초 동안의 분당 처리 수"""
+        now = time.monotonic()
+        count = sum(n for at, n in self.recent if now - at <= self.window)
+        return count * 60.0 / self.window
+
+    @property
+    def average_rate(self):
+        """감시 시작 후 분당 평균 처리 수"""
+        elapsed = time.monotonic() - self.started
+        return self.processed * 60.0 / elapsed if elapsed > 0 else 0.0
+
+    def summary(self, waiting=0):
+        return (f"[watch] 누적 {self.processed}개 (흐림 {self.blurry}개, 묶음 {self.batches}개), "
+                f"최근 {self.window:.0f}초 {self.recent_rate:.1f}개/분, 평균 {self.average_rate:.1f}개/분, "
+                f"복사 중 {waiting}개")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+XMP 사이드카 파일 작성 모듈
+
+libxmp(Exempi) 없이 문자열 템플릿으로 XMP 패킷을 만들어 <원본 파일명>.xmp 사이드카만 기록합니다.
+수 MB 크기의 RAW 파일은 다시 쓰지 않으며, SidecarWriter는 백그라운드 스레드에서
+여러 파일을 모아 쓴 뒤 fsync를 한 번에 처리합니다.
+"""
+
+import os
+import queue
+import threading
+import time
+from xml.sax.saxutils import escape
+
+DEFAULT_WRITE_BATCH = 32
+
+# 배치가 차지 않아도 이 시간(초)이 지나면 기록
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+XMP_TEMPLATE = """<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:MicrosoftPhoto="http://ns.microsoft.com/photo/1.0/"
+    xmlns:lr="http://ns.adobe.com/lightroom/1.0/">
+   <dc:subject>
+    <rdf:Bag>
+{items}
+    </rdf:Bag>
+   </dc:subject>
+   <MicrosoftPhoto:LastKeywordXMP>
+    <rdf:Bag>
+{items}
+    </rdf:Bag>
+   </MicrosoftPhoto:LastKeywordXMP>
+   <lr:hierarchicalSubject>
+    <rdf:Bag>
+{items}
+    </rdf:Bag>
+   </lr:hierarchicalSubject>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+<?xpacket end="w"?>
+"""
+
+# 종료를 알리는 표식
+_DONE = object()
+
+
+def sidecar_path(image_path):
+    """XMP 사이드카 파일 경로 (원본 파일명.xmp)"""
+    return f"{image_path}.xmp"
+
+
+def build_xmp_packet(tags):
+    """
+    태그를 DC subject, Microsoft Photo, Lightroom 키워드로 담은 XMP 패킷을 만듭니다.
+
+    Args:
+        tags (list): 저장할 태그 목록
+
+    Returns:
+        str: XMP 패킷 문자열
+    """
+    items = "\n".join(f"     <rdf:li>{escape(tag)}</rdf:li>" for tag in tags)
+    return XMP_TEMPLATE.format(items=items)
+
+
+def write_sidecar(image_path, tags, fsync=True):
+    """
+    XMP 사이드카 파일 하나를 바로 기록합니다. (임시 파일에 쓴 뒤 이름을 바꿔 반쯤 쓰인 파일이 남지 않도록 함)
+
+    Args:
+        image_path (str): 원본 이미지 파일 경로
+        tags (list): 저장할 태그 목록
+        fsync (bool): 이름을 바꾸기 전에 fsync할지 여부
+
+    Returns:
+        str: 사이드카 파일 경로
+    """
+    xmp_path = sidecar_path(image_path)
+    tmp_path = xmp_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(build_xmp_packet(tags))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, xmp_path)
+    except Exception:
+        _remove_tmp(tmp_path)
+        raise
+    return xmp_path
+
+
+def _remove_tmp(tmp_path):
+    """기록에 실패한 임시 파일을 지웁니다. (만들지 못했거나 이미 지워졌으면 무시)"""
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+
+
+def _fsync_directory(directory):
+    """이름 변경이 디스크에 반영되도록 폴더를 fsync합니다. (지원하지 않는 플랫폼에서는 무시)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SidecarWriter:
+    """
+    XMP 사이드카 파일을 백그라운드 스레드에서 기록하는 작성기.
+
+    submit()은 바로 반환하며, 쓰기 스레드가 최대 batch_size개씩 모아
+    임시 파일 쓰기 → 한꺼번에 fsync → 이름 변경 → 폴더별 fsync 한 번 순서로 기록합니다.
+    """
+
+    def __init__(self, batch_size=DEFAULT_WRITE_BATCH, flush_interval=DEFAULT_FLUSH_INTERVAL, fsync=True):
+        """
+        Args:
+            batch_size (int): 한 번에 fsync할 최대 파일 수
+            flush_interval (float): 배치가 차지 않아도 기록할 대기 시간 (초)
+            fsync (bool): fsync 수행 여부
+        """
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.queue = queue.Queue(maxsize=self.batch_size * 4)
+        self.written = 0
+        self.failed = 0
+        # --profile용 배치별 (경과 시간, CPU 시간, 파일 수)
+        self.timings = []
+        self.thread = threading.Thread(target=self._run, name="xmp-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, image_path, tags):
+        """
+        사이드카 기록을 예약합니다.
+
+        Args:
+            image_path (str): 원본 이미지 파일 경로
+            tags (list): 저장할 태그 목록
+        """
+        self.queue.put((image_path, list(tags)))
+
+    def _run(self):
+        done = False
+        while not done:
+            batch = []
+            item = self.queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _DONE:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            done = item is _DONE
+            if batch:
+                wall = time.perf_counter()
+                cpu = time.thread_time()
+                self._write_batch(batch)
+                self.timings.append((time.perf_counter() - wall, time.thread_time() - cpu, len(batch)))
+
+    def _write_batch(self, batch):
+        # 1. 임시 파일에 모두 쓰기
+        pending = []
+        for image_path, tags in batch:
+            xmp_path = sidecar_path(image_path)
+            tmp_path = xmp_path + ".tmp"
+            f = None
+            try:
+                f = open(tmp_path, "w", encoding="utf-8")
+                f.write(build_xmp_packet(tags))
+                pending.append((xmp_path, f))
+            except Exception as e:
+                if f is not None:
+                    f.close()
+                _remove_tmp(tmp_path)
+                self.failed += 1
+                print(f"XMP 태그 저장 중 오류 발생 ({xmp_path}): {str(e)}")
+
+        # 2. fsync를 한꺼번에 수행한 뒤 이름 변경
+        directories = set()
+        for xmp_path, f in pending:
+            try:
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                f.close()
+                os.replace(f.name, xmp_path)
+                directories.add(os.path.dirname(xmp_path) or ".")
+                self.written += 1
+            except Exception as e:
+                f.close()
+                # 반쯤 쓰인 임시 파일이 남지 않도록 삭제 (기존 사이드카는 그대로 유지)
+                _remove_tmp(f.name)
+                self.failed += 1
+                print(f"XMP 태그 저장 중 오류 발생 ({xmp_path}): {str(e)}")
+
+        # 3. 폴더별로 한 번만 fsync
+        if self.fsync:
+            for directory in directories:
+                _fsync_directory(directory)
+
+    def close(self):
+        """남은 사이드카를 모두 기록하고 쓰기 스레드를 종료합니다."""
+        self.queue.put(_DONE)
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
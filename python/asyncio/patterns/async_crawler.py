@@ -2,10 +2,14 @@
 실전 예제: 비동기 웹 크롤러
 - Semaphore + Queue + httpx 조합
 - 동시 요청 제한 + 생산자-소비자 패턴으로 URL을 크롤링한다
+- amap으로 URL을 필요한 만큼만 꺼내는 간단한 크롤러
 """
 
 import asyncio
 import time
+from collections.abc import AsyncIterable, Iterable
+
+from async_map import amap
 
 try:
     import httpx
@@ -102,23 +106,21 @@ async def crawler_example():
 
 
 # ============================================================
-# 2. 간단한 버전 - Semaphore만 사용
+# 2. 간단한 버전 - amap 사용
 # ============================================================
-async def simple_crawler(urls: list[str], max_concurrent: int = 5):
-    """Semaphore만 사용하는 간단한 크롤러."""
-    sem = asyncio.Semaphore(max_concurrent)
+async def simple_crawler(urls: Iterable[str] | AsyncIterable[str], max_concurrent: int = 5):
+    """amap으로 동시 요청 수를 제한하는 간단한 크롤러. (URL마다 태스크를 미리 만들지 않음)"""
     results = {}
 
     async def fetch(url: str):
-        async with sem:
-            # 시뮬레이션
-            await asyncio.sleep(0.1)
-            result = {"url": url, "status": 200, "length": 512}
-            results[url] = result
-            print(f"  {url} -> {result['status']}")
-            return result
-
-    await asyncio.gather(*[fetch(url) for url in urls])
+        # 시뮬레이션
+        await asyncio.sleep(0.1)
+        result = {"url": url, "status": 200, "length": 512}
+        print(f"  {url} -> {result['status']}")
+        return result
+
+    async for result in amap(fetch, urls, concurrency=max_concurrent):
+        results[result["url"]] = result
     return results
 
 
@@ -126,6 +128,6 @@ if __name__ == "__main__":
     print("=== 비동기 웹 크롤러 (Semaphore + Queue) ===")
     asyncio.run(crawler_example())
 
-    print("\n=== 간단한 크롤러 (Semaphore만) ===")
+    print("\n=== 간단한 크롤러 (amap) ===")
     urls = [f"https://example.com/page/{i}" for i in range(10)]
     asyncio.run(simple_crawler(urls, max_concurrent=3))
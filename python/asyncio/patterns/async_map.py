@@ -0,0 +1,150 @@
+"""
+동시 실행 수를 제한하는 스트리밍 map (amap)
+- 입력을 필요한 만큼만 꺼내고 최대 concurrency개의 태스크만 유지
+- 완료 순서(ordered=False) 또는 입력 순서(ordered=True)로 결과 반환
+- 동기/비동기 iterable 모두 지원, 중간에 멈추면 남은 태스크 취소
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from typing import Any
+
+
+async def _iterate(iterable: Iterable | AsyncIterable) -> AsyncIterator:
+    """동기/비동기 iterable을 async iterator로 통일한다."""
+    if isinstance(iterable, AsyncIterable):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+# ============================================================
+# 1. amap
+# ============================================================
+async def amap(
+    func: Callable[[Any], Awaitable[Any]],
+    iterable: Iterable | AsyncIterable,
+    concurrency: int = 10,
+    ordered: bool = False,
+) -> AsyncIterator:
+    """iterable의 항목마다 func를 실행하고 결과를 하나씩 반환한다.
+
+    gather/TaskGroup처럼 모든 항목의 태스크를 먼저 만들지 않고, 실행 중인 태스크가
+    concurrency개보다 적을 때만 입력을 꺼내 태스크를 만든다. 따라서 입력이 1000만 개여도
+    메모리에는 최대 concurrency개의 태스크(ordered=True이면 순서를 기다리는 결과 포함)만 남는다.
+    결과를 소비하지 않으면 새 태스크도 만들지 않는다. (backpressure)
+
+    한 항목에서 예외가 발생하거나, 반복을 중간에 멈추거나, 소비하는 태스크가 취소되면
+    실행 중인 태스크를 모두 취소한다.
+
+    Args:
+        func: 항목 하나를 처리하는 코루틴 함수
+        iterable: 입력 (동기 또는 비동기 iterable, 필요한 만큼만 꺼냄)
+        concurrency: 동시에 실행할 최대 태스크 수
+        ordered: True이면 입력 순서대로, False이면 완료되는 순서대로 반환
+
+    Yields:
+        func의 결과
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency는 1 이상이어야 합니다: {concurrency}")
+
+    items = _iterate(iterable)
+    exhausted = False
+    # 완료된 태스크를 done callback으로 받아 asyncio.wait처럼 매번 전체를 검사하지 않는다
+    completed: asyncio.Queue[asyncio.Task] = asyncio.Queue()
+    running: dict[asyncio.Task, int] = {}
+    # ordered=True: 앞 순서를 기다리는 결과 {입력 순서: 결과}
+    waiting: dict[int, Any] = {}
+    next_index = 0  # 다음에 꺼낼 입력 순서
+    next_yield = 0  # 다음에 반환할 입력 순서
+
+    try:
+        while True:
+            # 1. 한도 안에서 입력을 꺼내 태스크 생성
+            while not exhausted and len(running) + len(waiting) < concurrency:
+                try:
+                    item = await anext(items)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = asyncio.ensure_future(func(item))
+                task.add_done_callback(completed.put_nowait)
+                running[task] = next_index
+                next_index += 1
+
+            if not running and not waiting:
+                return
+
+            # 2. 완료된 태스크 하나를 받아 결과 반환 (예외는 그대로 전달)
+            task = await completed.get()
+            index = running.pop(task)
+            result = task.result()
+            if not ordered:
+                yield result
+                continue
+
+            waiting[index] = result
+            while next_yield in waiting:
+                yield waiting.pop(next_yield)
+                next_yield += 1
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        await items.aclose()
+
+
+async def amap_example():
+    """1만 개 항목을 동시에 50개씩 처리하면서 살아 있는 태스크 수를 확인한다."""
+    alive_peak = 0
+
+    async def process(item: int) -> int:
+        nonlocal alive_peak
+        alive_peak = max(alive_peak, len(asyncio.all_tasks()))
+        await asyncio.sleep(0.001 * (item % 5))
+        return item * 2
+
+    start = time.monotonic()
+    total = 0
+    count = 0
+    async for result in amap(process, range(10_000), concurrency=50):
+        total += result
+        count += 1
+    elapsed = time.monotonic() - start
+
+    print(f"  {count}개 처리, 합계 {total}, {elapsed:.2f}s 소요")
+    print(f"  동시에 살아 있던 태스크 최대 {alive_peak}개 (입력 1만 개를 한 번에 만들지 않음)")
+    return count, alive_peak
+
+
+# ============================================================
+# 2. 입력 순서 유지 (ordered=True)
+# ============================================================
+async def ordered_amap_example():
+    """처리 시간이 달라도 입력 순서대로 결과를 받는다."""
+
+    async def fetch(page: int) -> str:
+        await asyncio.sleep(0.05 if page % 2 else 0.01)
+        return f"page-{page}"
+
+    async def pages():
+        # 비동기 입력: 페이지 번호를 하나씩 만들어 낸다
+        for page in range(8):
+            yield page
+
+    results = [result async for result in amap(fetch, pages(), concurrency=3, ordered=True)]
+    print(f"  {results}")
+    return results
+
+
+if __name__ == "__main__":
+    print("=== 1. amap (완료 순서) ===")
+    asyncio.run(amap_example())
+
+    print("\n=== 2. amap (입력 순서) ===")
+    asyncio.run(ordered_amap_example())
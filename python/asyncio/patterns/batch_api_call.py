@@ -2,51 +2,141 @@
 실전 예제: API 배치 호출
 - 수백 개 API를 동시에 호출하되 rate limit 준수
 - Semaphore + TaskGroup 조합
+- AIMD 방식으로 동시 실행 수를 자동 조절하는 limiter
+- 결과를 dict에 모으지 않고 callback / async iterator로 전달
+- 청크 단위(stop-and-wait) 처리와 sliding window 처리 비교
 """
 
 import asyncio
+import contextlib
+import inspect
+import io
 import time
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from typing import Any
+
+from async_map import amap
+from rate_limiter import GCRALimiter
+
+
+class OverloadedError(Exception):
+    """upstream 과부하 응답 (HTTP 429, 503 등)"""
+
+
+async def simulated_api_call(api_id: int) -> str:
+    """API 호출 시뮬레이션."""
+    await asyncio.sleep(0.05)
+    return f"response-{api_id}"
 
 
 # ============================================================
 # 1. Semaphore + TaskGroup으로 배치 API 호출
 # ============================================================
 async def batch_api_call(
-    api_ids: list[int],
+    api_ids: Iterable[int] | AsyncIterable[int],
     max_concurrent: int = 10,
     rate_per_second: int = 20,
+    concurrency_limiter: "AdaptiveConcurrencyLimiter | None" = None,
+    api_call: Callable[[int], Awaitable[str]] = simulated_api_call,
+    max_retries: int = 5,
+    on_result: Callable[[dict], object] | None = None,
+    rate_burst: int | None = None,
 ):
-    """수백 개 API를 동시에 호출하되 동시 실행 수와 초당 호출 수를 제한한다."""
-    sem = asyncio.Semaphore(max_concurrent)
+    """수백 개 API를 동시에 호출하되 동시 실행 수와 초당 호출 수를 제한한다.
+
+    초당 호출 수는 GCRALimiter로 제한하므로 호출마다 O(1)이고 호출 기록이 쌓이지 않는다.
+    api_ids는 amap으로 필요한 만큼만 꺼내므로 태스크는 동시 실행 한도만큼만 만들어진다.
+    concurrency_limiter를 넘기면 고정된 Semaphore(max_concurrent) 대신 사용한다.
+    과부하(OverloadedError, TimeoutError)로 실패한 호출은 max_retries번까지 다시 시도하고,
+    모두 실패하면 예외를 발생시키지 않고 {"id", "error", "timestamp"} 결과로 전달한다.
+    (결과에 "data" 대신 "error"가 있으면 실패) 그 밖의 예외는 재시도하지 않고 그대로 전달된다.
+
+    Args:
+        api_call: API ID를 받아 응답을 반환하는 코루틴 함수
+        max_retries: 과부하로 실패할 때 시도할 최대 횟수 (첫 호출 포함, 1이면 재시도하지 않음)
+        on_result: 결과를 하나씩 받을 함수 (코루틴 함수도 가능). 지정하면 결과를 dict에 모으지 않는다.
+        rate_burst: 대기 없이 연속으로 허용하는 호출 수 (기본값: rate_per_second)
+
+    Returns:
+        on_result가 없으면 {api_id: 결과}, 있으면 전달한 결과 수 (실패 결과 포함)
+    """
+    limiter = concurrency_limiter or asyncio.Semaphore(max_concurrent)
+    rate_limiter = GCRALimiter(rate=rate_per_second, burst=rate_burst or rate_per_second)
     results: dict[int, dict] = {}
-    call_timestamps: list[float] = []
+    delivered = 0
+
+    async def emit(result: dict):
+        nonlocal delivered
+        delivered += 1
+        if on_result is None:
+            results[result["id"]] = result
+            return
+        returned = on_result(result)
+        if inspect.isawaitable(returned):
+            await returned
 
     async def call_api(api_id: int):
-        async with sem:
-            # rate limiting: 초당 호출 수 체크
-            now = time.monotonic()
-            call_timestamps.append(now)
-
-            # 최근 1초 내 호출 수 체크
-            recent = [t for t in call_timestamps if t > now - 1.0]
-            if len(recent) > rate_per_second:
-                wait = recent[0] + 1.0 - now
-                if wait > 0:
-                    await asyncio.sleep(wait)
-
-            # API 호출 시뮬레이션
-            await asyncio.sleep(0.05)
-            results[api_id] = {
-                "id": api_id,
-                "data": f"response-{api_id}",
-                "timestamp": time.monotonic(),
-            }
+        for attempt in range(1, max_retries + 1):
+            try:
+                # 초당 호출 수 제한은 동시 실행 슬롯을 잡기 전에 대기
+                # (슬롯을 잡은 채 기다리면 다른 호출이 막히고, AIMD limiter가 대기 시간을 지연으로 오인함)
+                await rate_limiter.acquire()
+                async with limiter:
+                    data = await api_call(api_id)
+                await emit({
+                    "id": api_id,
+                    "data": data,
+                    "timestamp": time.monotonic(),
+                })
+                return
+            except (OverloadedError, TimeoutError) as e:
+                if attempt == max_retries:
+                    await emit({"id": api_id, "error": repr(e), "timestamp": time.monotonic()})
+                    return
+                # 동시 실행 슬롯을 반납한 뒤 대기
+                await asyncio.sleep(0.05 * attempt)
 
-    async with asyncio.TaskGroup() as tg:
-        for api_id in api_ids:
-            tg.create_task(call_api(api_id))
+    # 초당 호출 수 대기 중인 태스크도 슬롯을 기다리므로 동시 실행 한도(AIMD는 최대 한도)만큼만 만든다
+    max_tasks = concurrency_limiter.max_limit if concurrency_limiter else max_concurrent
+    async for _ in amap(call_api, api_ids, concurrency=max_tasks):
+        pass
 
-    return results
+    return results if on_result is None else delivered
+
+
+async def iter_batch_api_call(api_ids: Iterable[int] | AsyncIterable[int], buffer_size: int = 100, **kwargs) -> AsyncIterator[dict]:
+    """batch_api_call의 결과를 완료되는 순서대로 하나씩 반환한다.
+
+    결과는 최대 buffer_size개까지만 버퍼에 쌓이고, 소비하는 쪽이 느리면 호출도 기다린다.
+    반복을 중간에 멈추면 남은 호출을 취소한다.
+
+    Args:
+        api_ids: 호출할 API ID 목록
+        buffer_size: 소비되기를 기다리는 결과의 최대 수
+        **kwargs: batch_api_call에 전달할 인자
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+    done = object()
+
+    async def run():
+        try:
+            await batch_api_call(api_ids, on_result=queue.put, **kwargs)
+        finally:
+            # 취소된 경우에는 받을 쪽이 없으므로 종료 표식을 넣지 않는다 (버퍼가 가득 차 있으면 멈춤)
+            if not asyncio.current_task().cancelling():
+                await queue.put(done)
+
+    runner = asyncio.create_task(run())
+    try:
+        while (result := await queue.get()) is not done:
+            yield result
+        await runner  # 호출 중 발생한 예외 전달
+    finally:
+        if not runner.done():
+            runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await runner
 
 
 async def batch_example():
@@ -73,11 +163,242 @@ async def batch_example():
     return results
 
 
+async def streaming_batch_example():
+    """결과를 모으지 않고 완료되는 순서대로 처리한다. (메모리에는 버퍼만 남음)"""
+    start = time.monotonic()
+    succeeded = 0
+    async for result in iter_batch_api_call(list(range(50)), buffer_size=10, max_concurrent=10, rate_per_second=50):
+        if "error" not in result:
+            succeeded += 1
+    elapsed = time.monotonic() - start
+    print(f"  총 {succeeded}개 결과를 스트리밍으로 처리, {elapsed:.2f}s 소요")
+    return succeeded
+
+
 # ============================================================
-# 2. 청크 단위 배치 처리
+# 2. AIMD 방식 동시 실행 수 자동 조절
 # ============================================================
-async def chunked_batch(items: list, chunk_size: int = 10, delay: float = 1.0):
-    """항목을 청크로 나눠 처리한다. 청크 사이에 대기 시간을 둔다."""
+class AdaptiveConcurrencyLimiter:
+    """AIMD(Additive Increase, Multiplicative Decrease) 방식 동시 실행 제한.
+
+    asyncio.Semaphore처럼 async with로 사용하며, 블록의 결과로 동시 실행 한도(limit)를 조절한다.
+    - 성공하고 지연 시간이 최소 지연 시간의 latency_tolerance배 이내이며 오류율이 낮으면,
+      한도만큼 성공할 때마다 한도를 1씩 늘린다. (성공 1번에 1/limit씩)
+    - 과부하(OverloadedError, TimeoutError)나 지연 시간 급증이면 한도에 backoff를 곱해 줄인다.
+      동시에 실행 중이던 요청이 한꺼번에 실패해도 한 번만 줄도록, 최소 지연 시간 동안은 다시 줄이지 않는다.
+    - 취소(asyncio.CancelledError)된 블록은 성공도 실패도 아니므로 슬롯만 반납한다.
+    upstream의 실제 처리 용량을 모르더라도 한도가 그 근처로 수렴한다.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.5,
+        max_error_rate: float = 0.1,
+    ):
+        """
+        Args:
+            initial_limit: 처음 동시 실행 한도
+            min_limit: 최소 동시 실행 한도
+            max_limit: 최대 동시 실행 한도
+            latency_tolerance: 최소 지연 시간의 이 배수를 넘으면 과부하로 판단
+            backoff: 과부하일 때 한도에 곱하는 값 (0~1)
+            max_error_rate: 오류율(최근 평균)이 이 값 이상이면 한도를 늘리지 않음
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.max_error_rate = max_error_rate
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.min_latency: float | None = None
+        self.error_rate = 0.0
+        self.successes = 0
+        self.overloads = 0
+        self.errors = 0
+        self._last_decrease = 0.0
+        self._started = time.monotonic()
+        # (경과 시간, 한도) - 한도가 바뀔 때마다 기록 (최근 1024개)
+        self.limit_history: deque[tuple[float, int]] = deque([(0.0, self.limit)], maxlen=1024)
+        # 슬롯을 기다리는 태스크의 future
+        self._waiters: deque[asyncio.Future] = deque()
+        # 태스크별 async with 블록의 시작 시각 (중첩된 블록은 들어간 역순으로 나온다)
+        self._entered: dict[asyncio.Task, list[float]] = {}
+
+    @property
+    def limit(self) -> int:
+        """현재 동시 실행 한도"""
+        return int(self._limit)
+
+    async def acquire(self) -> float:
+        """한도 안에서 실행할 수 있을 때까지 대기하고 시작 시각을 반환한다."""
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 깨어난 직후 취소되었으면 받은 차례를 다음 대기자에게 넘긴다
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                self._waiters.remove(waiter)
+        self.in_flight += 1
+        return time.monotonic()
+
+    def _wake(self):
+        """남은 슬롯 수만큼 대기자를 깨운다. (깨어난 대기자는 한도를 다시 확인함)"""
+        available = self.limit - self.in_flight
+        for waiter in self._waiters:
+            if available <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                available -= 1
+
+    def release(self, started: float, exc: BaseException | None = None):
+        """실행 결과를 반영하여 한도를 조절하고 슬롯을 반납한다.
+
+        await 없이 바로 반납하므로 블록을 나오는 도중 태스크가 취소되어도 슬롯이 새지 않는다.
+        """
+        if self.in_flight <= 0:
+            raise ValueError("AdaptiveConcurrencyLimiter released too many times")
+        if not isinstance(exc, asyncio.CancelledError):
+            self._observe(started, exc)
+        self.in_flight -= 1
+        self._wake()
+
+    def _observe(self, started: float, exc: BaseException | None):
+        now = time.monotonic()
+        latency = now - started
+        before = self.limit
+        # 오류율은 지수 이동 평균으로 추적
+        self.error_rate = self.error_rate * 0.9 + (0.1 if exc is not None else 0.0)
+
+        if isinstance(exc, (OverloadedError, TimeoutError)):
+            self.overloads += 1
+            self._decrease(now)
+        elif exc is not None:
+            self.errors += 1
+        else:
+            self.successes += 1
+            if self.min_latency is None or latency < self.min_latency:
+                self.min_latency = latency
+            if latency > self.min_latency * self.latency_tolerance:
+                self._decrease(now)
+            elif self.error_rate < self.max_error_rate and self.in_flight * 2 >= self.limit:
+                # 한도를 절반 이상 쓰고 있을 때만 늘린다 (호출하는 쪽이 느려서 남는 한도는 늘리지 않음)
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+        if self.limit != before:
+            self.limit_history.append((now - self._started, self.limit))
+
+    def _decrease(self, now: float):
+        if now - self._last_decrease < (self.min_latency or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+
+    def metrics(self) -> dict:
+        """현재 한도와 처리 통계"""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "min_latency": self.min_latency,
+        }
+
+    async def __aenter__(self):
+        started = await self.acquire()
+        self._entered.setdefault(asyncio.current_task(), []).append(started)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        task = asyncio.current_task()
+        entered = self._entered[task]
+        started = entered.pop()
+        if not entered:
+            del self._entered[task]
+        self.release(started, exc)
+
+
+class SimulatedUpstream:
+    """동시에 capacity개까지만 처리하고, 넘으면 과부하(429)로 응답하는 API 시뮬레이션."""
+
+    def __init__(self, capacity: int = 8, latency: float = 0.05):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def call(self, api_id: int) -> str:
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            await asyncio.sleep(self.latency * 0.2)
+            raise OverloadedError(f"429 Too Many Requests (API-{api_id})")
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return f"response-{api_id}"
+
+
+async def adaptive_batch_example():
+    """upstream 용량(동시 8개)을 모르는 상태에서 AIMD limiter로 배치 호출한다."""
+    upstream = SimulatedUpstream(capacity=8, latency=0.05)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=50)
+    start = time.monotonic()
+
+    results = await batch_api_call(
+        list(range(200)),
+        rate_per_second=1000,
+        concurrency_limiter=limiter,
+        api_call=upstream.call,
+    )
+
+    elapsed = time.monotonic() - start
+    failed = sum(1 for r in results.values() if "error" in r)
+    history = " → ".join(str(limit) for _, limit in list(limiter.limit_history)[:20])
+    print(f"  총 {len(results)}개 API 호출 완료 (실패 {failed}개, 429 응답 {upstream.rejected}번), {elapsed:.2f}s 소요")
+    print(f"  동시 실행 한도 변화: {history}")
+    print(f"  최종 지표: {limiter.metrics()}")
+    return results, limiter
+
+
+# ============================================================
+# 3. 청크 단위 배치 처리
+# ============================================================
+async def simulated_process(item) -> str:
+    """항목 처리 시뮬레이션."""
+    await asyncio.sleep(0.05)
+    return f"processed-{item}"
+
+
+async def chunked_batch(
+    items: list,
+    chunk_size: int = 10,
+    delay: float = 1.0,
+    sliding: bool = False,
+    process: Callable[[Any], Awaitable[Any]] = simulated_process,
+):
+    """항목을 청크로 나눠 처리한다. 청크 사이에 대기 시간을 둔다.
+
+    sliding=True이면 청크가 끝나기를 기다리지 않고 항상 chunk_size개를 동시에 처리하며,
+    청크 사이 대기 대신 GCRALimiter로 같은 속도(delay초마다 chunk_size개)를 지킨다.
+    느린 항목 하나가 청크 전체를 멈추지 않으므로 처리량이 높아진다. 결과는 입력 순서와 같다.
+    """
+    if sliding:
+        return await _sliding_window_batch(items, chunk_size, delay, process)
+
     all_results = []
 
     for i in range(0, len(items), chunk_size):
@@ -86,10 +407,6 @@ async def chunked_batch(items: list, chunk_size: int = 10, delay: float = 1.0):
         total_chunks = (len(items) + chunk_size - 1) // chunk_size
         print(f"  청크 {chunk_num}/{total_chunks} 처리 중 ({len(chunk)}개)")
 
-        async def process(item):
-            await asyncio.sleep(0.05)
-            return f"processed-{item}"
-
         results = await asyncio.gather(*[process(item) for item in chunk])
         all_results.extend(results)
 
@@ -102,8 +419,51 @@ async def chunked_batch(items: list, chunk_size: int = 10, delay: float = 1.0):
     return all_results
 
 
+async def _sliding_window_batch(items, chunk_size: int, delay: float, process):
+    """chunk_size개를 계속 동시에 처리하고 시작 속도는 limiter로 제한한다."""
+    rate_limiter = GCRALimiter(rate=chunk_size / delay, burst=chunk_size) if delay > 0 else None
+
+    async def limited(indexed):
+        index, item = indexed
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        return index, await process(item)
+
+    # 결과 목록 자리에 바로 채우므로 amap은 완료 순서로 받는다
+    # (ordered=True이면 느린 앞 항목의 결과를 기다리는 동안 새 항목을 시작하지 못함)
+    all_results = [None] * len(items)
+    async for index, result in amap(limited, enumerate(items), concurrency=chunk_size):
+        all_results[index] = result
+    print(f"  총 {len(all_results)}개 처리 완료 (sliding window, 동시 {chunk_size}개)")
+    return all_results
+
+
+async def chunked_batch_benchmark(count: int = 60, chunk_size: int = 10, delay: float = 0.2, slow: float = 0.3):
+    """청크마다 느린 항목이 하나씩 있을 때 stop-and-wait 청크와 sliding window의 처리량을 비교한다.
+
+    Returns:
+        {"chunked": 초당 처리 수, "sliding": 초당 처리 수}
+    """
+
+    async def process(item):
+        # 청크마다 한 항목은 slow초, 나머지는 0.02초
+        await asyncio.sleep(slow if item % chunk_size == 0 else 0.02)
+        return f"processed-{item}"
+
+    throughput = {}
+    for name, sliding in (("chunked", False), ("sliding", True)):
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = await chunked_batch(list(range(count)), chunk_size, delay, sliding=sliding, process=process)
+        elapsed = time.monotonic() - start
+        throughput[name] = len(results) / elapsed
+        print(f"  {name:<8} {elapsed:.2f}s, 초당 {throughput[name]:.1f}개")
+    print(f"  sliding window 처리량: stop-and-wait 대비 {throughput['sliding'] / throughput['chunked']:.1f}배")
+    return throughput
+
+
 # ============================================================
-# 3. 재시도가 포함된 배치 호출
+# 4. 재시도가 포함된 배치 호출
 # ============================================================
 async def batch_with_retry(
     api_ids: list[int],
@@ -148,9 +508,15 @@ async def batch_with_retry(
 if __name__ == "__main__":
     print("=== 1. 배치 API 호출 ===")
     asyncio.run(batch_example())
+    asyncio.run(streaming_batch_example())
+
+    print("\n=== 2. AIMD 동시 실행 수 자동 조절 ===")
+    asyncio.run(adaptive_batch_example())
 
-    print("\n=== 2. 청크 단위 배치 처리 ===")
+    print("\n=== 3. 청크 단위 배치 처리 ===")
     asyncio.run(chunked_batch(list(range(25)), chunk_size=10, delay=0.5))
+    asyncio.run(chunked_batch(list(range(25)), chunk_size=10, delay=0.5, sliding=True))
+    asyncio.run(chunked_batch_benchmark())
 
-    print("\n=== 3. 재시도 포함 배치 호출 ===")
+    print("\n=== 4. 재시도 포함 배치 호출 ===")
     asyncio.run(batch_with_retry(list(range(30)), max_concurrent=5))
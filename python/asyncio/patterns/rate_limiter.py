@@ -2,12 +2,17 @@
 비동기 Rate Limiting 구현
 - Token Bucket 알고리즘 직접 구현
 - Sliding Window 방식 구현
+- Sliding Window Counter, GCRA 방식 구현 (키마다 상수 메모리)
 - aiolimiter 라이브러리 활용
+- 키(API 키, 호스트)별 limiter registry (유휴 limiter 자동 정리)
+- 대기자 수에 따른 TokenBucket acquire 오버헤드 벤치마크
 """
 
 import asyncio
+import sys
+import threading
 import time
-from collections import deque
+from collections import OrderedDict, deque
 
 
 # ============================================================
@@ -18,6 +23,11 @@ class TokenBucket:
 
     일정 속도로 토큰이 채워지고, 요청 시 토큰을 소비한다.
     버킷이 비면 토큰이 채워질 때까지 대기한다.
+
+    토큰이 부족하면 미리 차감(예약)하여 잔량을 음수로 두고, 부족분이 채워지는 시각까지
+    계산된 시간만큼만 잠든다. 예약은 await 없이 한 번에 끝나므로 락이 필요 없고,
+    잠든 코루틴이 다른 요청을 막지 않는다. 늦게 온 요청일수록 부족분이 커서
+    먼저 온 요청보다 늦게 깨어나므로 요청 순서(FIFO)가 유지된다.
     """
 
     def __init__(self, rate: float, capacity: int):
@@ -28,29 +38,53 @@ class TokenBucket:
         """
         self.rate = rate
         self.capacity = capacity
-        self.tokens = capacity
+        self._tokens = float(capacity)
         self.last_refill = time.monotonic()
-        self._lock = asyncio.Lock()
 
     def _refill(self):
         """경과 시간에 따라 토큰을 보충한다."""
         now = time.monotonic()
         elapsed = now - self.last_refill
-        new_tokens = elapsed * self.rate
-        self.tokens = min(self.capacity, self.tokens + new_tokens)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
         self.last_refill = now
 
-    async def acquire(self):
-        """토큰 1개를 소비한다. 토큰이 없으면 대기한다."""
-        async with self._lock:
-            while True:
-                self._refill()
-                if self.tokens >= 1:
-                    self.tokens -= 1
-                    return
-                # 토큰 1개가 생성될 때까지 대기
-                wait_time = (1 - self.tokens) / self.rate
-                await asyncio.sleep(wait_time)
+    @property
+    def tokens(self) -> float:
+        """현재 토큰 수. 대기 중인 요청이 예약한 만큼 음수가 될 수 있다."""
+        self._refill()
+        return self._tokens
+
+    def reserve(self, n: float = 1) -> float:
+        """토큰 n개를 예약하고, 사용할 수 있을 때까지 기다려야 하는 시간(초)을 반환한다."""
+        if n > self.capacity:
+            raise ValueError(f"n({n})은 버킷 용량({self.capacity})보다 클 수 없습니다")
+        self._refill()
+        self._tokens -= n
+        return max(0.0, -self._tokens / self.rate)
+
+    def try_acquire(self, n: float = 1) -> bool:
+        """토큰 n개가 바로 있으면 소비하고 True, 없으면 대기하지 않고 False를 반환한다."""
+        self._refill()
+        if self._tokens < n:
+            return False
+        self._tokens -= n
+        return True
+
+    def _refund(self, n: float):
+        """사용하지 않은 예약 토큰을 돌려준다."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + n)
+
+    async def acquire(self, n: float = 1):
+        """토큰 n개를 소비한다. 토큰이 없으면 대기하고, 대기 중 취소되면 예약한 토큰을 돌려준다."""
+        wait_time = self.reserve(n)
+        if wait_time <= 0:
+            return
+        try:
+            await asyncio.sleep(wait_time)
+        except asyncio.CancelledError:
+            self._refund(n)
+            raise
 
     async def __aenter__(self):
         await self.acquire()
@@ -141,7 +175,186 @@ async def sliding_window_example():
 
 
 # ============================================================
-# 3. aiolimiter 라이브러리 활용
+# 3. Sliding Window Counter 방식
+# ============================================================
+class SlidingWindowCounterLimiter:
+    """Sliding Window Counter Rate Limiter.
+
+    SlidingWindowLimiter처럼 요청마다 시각을 저장하지 않고, 고정 윈도우 두 개(이전/현재)의
+    요청 수만 저장한다. 이전 윈도우 요청 수에 현재 윈도우와 겹치는 비율을 곱해 더한 값으로
+    최근 window_size 초 동안의 요청 수를 근사하므로 키마다 메모리가 일정하다.
+    (이전 윈도우 안에서 요청이 고르게 분포했다고 가정한 근사값)
+    대기한 요청은 깨어난 뒤 다시 확인하므로 요청 순서는 보장하지 않는다.
+    """
+
+    # 키마다 limiter를 만들 때 인스턴스 크기를 줄이기 위해 __dict__ 대신 슬롯 사용
+    __slots__ = ("max_requests", "window_size", "window_start", "current_count", "previous_count")
+
+    def __init__(self, max_requests: int, window_size: float = 1.0):
+        """
+        Args:
+            max_requests: window 내 최대 요청 수
+            window_size: 윈도우 크기 (초)
+        """
+        self.max_requests = max_requests
+        self.window_size = window_size
+        self.window_start = time.monotonic()
+        self.current_count = 0
+        self.previous_count = 0
+
+    def _advance(self, now: float):
+        """now가 속한 윈도우로 이동한다. 두 윈도우 이상 지났으면 이전 요청 수는 0이다."""
+        passed = int((now - self.window_start) // self.window_size)
+        if passed <= 0:
+            return
+        self.previous_count = self.current_count if passed == 1 else 0
+        self.current_count = 0
+        self.window_start += passed * self.window_size
+
+    def estimated_count(self) -> float:
+        """최근 window_size 초 동안의 요청 수 근사값"""
+        now = time.monotonic()
+        self._advance(now)
+        overlap = 1 - (now - self.window_start) / self.window_size
+        return self.previous_count * overlap + self.current_count
+
+    def _wait_time(self, n: int) -> float:
+        """요청 n개를 허용하면 0, 아니면 다시 확인할 때까지의 대기 시간(초)을 반환한다."""
+        now = time.monotonic()
+        self._advance(now)
+        elapsed = now - self.window_start
+        if self.current_count + n > self.max_requests:
+            # 현재 윈도우만으로 한도를 넘으므로 다음 윈도우까지 대기
+            return self.window_start + self.window_size - now
+        weighted = self.previous_count * (1 - elapsed / self.window_size)
+        if weighted + self.current_count + n <= self.max_requests:
+            self.current_count += n
+            return 0.0
+        # 이전 윈도우의 가중치가 줄어 요청 n개가 들어갈 수 있을 때까지 대기
+        allowed = self.max_requests - self.current_count - n
+        return max(1e-3, self.window_size * (1 - allowed / self.previous_count) - elapsed)
+
+    def try_acquire(self, n: int = 1) -> bool:
+        """요청 n개를 바로 허용할 수 있으면 기록하고 True, 아니면 대기하지 않고 False를 반환한다."""
+        return self._wait_time(n) == 0
+
+    async def acquire(self, n: int = 1):
+        """요청 허용 여부를 확인하고, 초과 시 대기한다."""
+        if n > self.max_requests:
+            raise ValueError(f"n({n})은 max_requests({self.max_requests})보다 클 수 없습니다")
+        # 확인과 기록 사이에 await가 없으므로 락 없이 대기 후 다시 확인
+        while (wait_time := self._wait_time(n)) > 0:
+            await asyncio.sleep(wait_time)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+async def sliding_window_counter_example():
+    """Sliding Window Counter로 1초당 5개 요청을 제한한다."""
+    limiter = SlidingWindowCounterLimiter(max_requests=5, window_size=1.0)
+    start = time.monotonic()
+
+    async def make_request(request_id: int):
+        async with limiter:
+            elapsed = time.monotonic() - start
+            print(f"  요청 #{request_id} 처리 (t={elapsed:.3f}s)")
+            return request_id
+
+    tasks = [make_request(i) for i in range(12)]
+    await asyncio.gather(*tasks)
+    total = time.monotonic() - start
+    print(f"  총 소요 시간: {total:.2f}s")
+    return total
+
+
+# ============================================================
+# 4. GCRA (Generic Cell Rate Algorithm)
+# ============================================================
+class GCRALimiter:
+    """GCRA Rate Limiter.
+
+    다음 요청이 도착해야 하는 이론적 시각(TAT) 하나만 저장한다.
+    요청마다 TAT를 emission_interval(1/rate)만큼 늦추고, TAT가 현재 시각보다
+    burst 요청 분량 이상 앞서 있으면 그만큼 대기한다.
+    Token Bucket과 같은 동작을 float 하나로 표현하므로 키마다 메모리가 일정하고,
+    TokenBucket처럼 예약 후 락 없이 대기하므로 요청 순서(FIFO)가 유지된다.
+    """
+
+    # 키마다 limiter를 만들 때 인스턴스 크기를 줄이기 위해 __dict__ 대신 슬롯 사용
+    __slots__ = ("rate", "burst", "emission_interval", "tat")
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 초당 허용 요청 수
+            burst: 대기 없이 연속으로 허용하는 최대 요청 수
+        """
+        self.rate = rate
+        self.burst = burst
+        self.emission_interval = 1.0 / rate
+        self.tat = time.monotonic()
+
+    def reserve(self, n: int = 1) -> float:
+        """요청 n개를 예약하고, 허용될 때까지 기다려야 하는 시간(초)을 반환한다."""
+        if n > self.burst:
+            raise ValueError(f"n({n})은 burst({self.burst})보다 클 수 없습니다")
+        now = time.monotonic()
+        self.tat = max(self.tat, now) + n * self.emission_interval
+        return max(0.0, self.tat - now - self.burst * self.emission_interval)
+
+    def try_acquire(self, n: int = 1) -> bool:
+        """요청 n개를 바로 허용할 수 있으면 기록하고 True, 아니면 대기하지 않고 False를 반환한다."""
+        now = time.monotonic()
+        tat = max(self.tat, now) + n * self.emission_interval
+        if tat - now > self.burst * self.emission_interval:
+            return False
+        self.tat = tat
+        return True
+
+    async def acquire(self, n: int = 1):
+        """요청 n개를 허용받는다. 대기 중 취소되면 예약을 돌려준다."""
+        wait_time = self.reserve(n)
+        if wait_time <= 0:
+            return
+        try:
+            await asyncio.sleep(wait_time)
+        except asyncio.CancelledError:
+            self.tat -= n * self.emission_interval
+            raise
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+async def gcra_example():
+    """GCRA로 초당 5개(최대 연속 5개) 요청을 제한한다."""
+    limiter = GCRALimiter(rate=5, burst=5)
+    start = time.monotonic()
+
+    async def make_request(request_id: int):
+        async with limiter:
+            elapsed = time.monotonic() - start
+            print(f"  요청 #{request_id} 처리 (t={elapsed:.3f}s)")
+            return request_id
+
+    tasks = [make_request(i) for i in range(12)]
+    await asyncio.gather(*tasks)
+    total = time.monotonic() - start
+    print(f"  총 소요 시간: {total:.2f}s")
+    return total
+
+
+# ============================================================
+# 5. aiolimiter 라이브러리 활용
 # ============================================================
 async def aiolimiter_example():
     """aiolimiter의 AsyncLimiter를 사용한 rate limiting 예제."""
@@ -168,6 +381,161 @@ async def aiolimiter_example():
     return results
 
 
+# ============================================================
+# 6. 키별 limiter registry
+# ============================================================
+class LimiterRegistry:
+    """키(API 키, 호스트 등)마다 limiter를 필요할 때 만들고, 오래 쓰지 않은 limiter는 정리한다.
+
+    limiter는 마지막 사용 순서로 정렬된 OrderedDict에 보관한다. 조회할 때마다 맨 뒤로 옮기므로
+    맨 앞이 가장 오래 쓰지 않은 limiter이고, 정리는 맨 앞에서 ttl이 지난 항목만 꺼내면 된다.
+    조회, 생성, 정리 모두 키 수와 관계없이 O(1)(정리는 꺼낸 항목 수만큼)이다.
+
+    ttl은 limiter가 다시 가득 찰 때까지의 시간(capacity / rate, window_size)보다 길게 정해야
+    정리 후 새로 만든 limiter가 한도를 넘겨 허용하지 않는다.
+    락은 dict 조작 동안만 잡으므로 asyncio 코루틴과 스레드(queue_rate_limiting.RateLimiter 등) 모두에서 쓸 수 있다.
+    """
+
+    def __init__(self, factory, ttl: float = 300.0, max_keys: int | None = None):
+        """
+        Args:
+            factory: 새 limiter를 만드는 함수 (예: lambda: GCRALimiter(rate=10, burst=10))
+            ttl: 이 시간(초) 동안 쓰지 않은 limiter를 정리
+            max_keys: 최대 키 수, 넘으면 가장 오래 쓰지 않은 limiter부터 정리 (None이면 제한 없음)
+        """
+        self.factory = factory
+        self.ttl = ttl
+        self.max_keys = max_keys
+        # 키 → (limiter, 마지막 사용 시각), 마지막 사용 순서로 정렬
+        self._limiters: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def get(self, key):
+        """key의 limiter를 반환한다. 없으면 factory로 만든다."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._limiters.get(key)
+            if entry is None:
+                limiter = self.factory()
+                self.created += 1
+            else:
+                limiter = entry[0]
+                self._limiters.move_to_end(key)
+            self._limiters[key] = (limiter, now)
+            self._evict(now)
+        return limiter
+
+    def _evict(self, now: float):
+        """ttl이 지난 limiter와 max_keys를 넘는 limiter를 가장 오래된 것부터 정리한다."""
+        limiters = self._limiters
+        while limiters:
+            _, (_, last_used) = next(iter(limiters.items()))
+            if now - last_used >= self.ttl:
+                self.evicted_idle += 1
+            elif self.max_keys is not None and len(limiters) > self.max_keys:
+                self.evicted_lru += 1
+            else:
+                break
+            limiters.popitem(last=False)
+
+    def evict_idle(self) -> int:
+        """ttl이 지난 limiter를 정리하고 정리한 수를 반환한다. (조회가 없는 동안 주기적으로 호출)"""
+        with self._lock:
+            before = len(self._limiters)
+            self._evict(time.monotonic())
+            return before - len(self._limiters)
+
+    async def acquire(self, key, n: int = 1):
+        """key의 limiter에서 요청 n개를 허용받는다."""
+        await self.get(key).acquire(n)
+
+    def __len__(self):
+        return len(self._limiters)
+
+    def __contains__(self, key):
+        return key in self._limiters
+
+    def memory_usage(self) -> int:
+        """registry가 보관하는 키, limiter, dict의 대략적인 메모리(bytes). 모든 항목을 순회하므로 모니터링용."""
+        with self._lock:
+            entries = list(self._limiters.items())
+            total = sys.getsizeof(self._limiters)
+        for key, entry in entries:
+            limiter = entry[0]
+            total += sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry[1]) + sys.getsizeof(limiter)
+            if hasattr(limiter, "__dict__"):
+                total += sys.getsizeof(limiter.__dict__)
+        return total
+
+    def stats(self) -> dict:
+        """키 수, 생성/정리 횟수, 대략적인 메모리 사용량"""
+        keys = len(self._limiters)
+        memory = self.memory_usage()
+        return {
+            "keys": keys,
+            "created": self.created,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+            "memory_bytes": memory,
+            "bytes_per_key": memory / keys if keys else 0,
+        }
+
+
+async def limiter_registry_example():
+    """API 키마다 초당 2개(최대 연속 2개)로 제한한다. 키마다 따로 제한되므로 전체는 더 빨리 끝난다."""
+    registry = LimiterRegistry(lambda: GCRALimiter(rate=2, burst=2), ttl=60.0)
+    start = time.monotonic()
+
+    async def make_request(api_key: str, request_id: int):
+        async with registry.get(api_key):
+            elapsed = time.monotonic() - start
+            print(f"  [{api_key}] 요청 #{request_id} 처리 (t={elapsed:.3f}s)")
+            return request_id
+
+    tasks = [make_request(f"key-{i % 3}", i) for i in range(12)]
+    await asyncio.gather(*tasks)
+    total = time.monotonic() - start
+    print(f"  총 소요 시간: {total:.2f}s, {registry.stats()}")
+    return registry
+
+
+# ============================================================
+# 7. TokenBucket 벤치마크
+# ============================================================
+async def token_bucket_benchmark(waiter_counts=(1_000, 10_000, 100_000), duration: float = 0.5):
+    """대기자 수를 늘려가며 acquire 1회당 CPU 시간을 측정한다.
+
+    대기자 N명이 capacity 1, 초당 N/duration개 버킷에서 동시에 토큰을 얻는 동안 사용한 CPU 시간과,
+    같은 N개 태스크가 같은 간격으로 asyncio.sleep만 하는 CPU 시간(이벤트 루프 기준선)을 잰다.
+    잠들어 있는 시간은 CPU 시간에 들어가지 않으므로 duration과 관계없이 limiter와 이벤트 루프의 비용만 남는다.
+    예약은 O(1)이고 잠든 코루틴이 락을 잡지 않으므로 N이 커져도 1회당 시간이 거의 일정해야 한다.
+
+    Returns:
+        {대기자 수: acquire 1회당 CPU 시간(μs)}
+    """
+    async def run(make_waiter, count):
+        start = time.process_time()
+        await asyncio.gather(*(make_waiter(i) for i in range(count)))
+        return time.process_time() - start
+
+    results = {}
+    for count in waiter_counts:
+        interval = duration / count
+        baseline = await run(lambda i: asyncio.sleep((i + 1) * interval), count)
+
+        bucket = TokenBucket(rate=count / duration, capacity=1)
+        bucket.reserve(1)  # 처음부터 모든 요청이 대기하도록 비운다
+        elapsed = await run(lambda i: bucket.acquire(), count)
+
+        results[count] = elapsed / count * 1e6
+        print(f"  대기자 {count:>7,}명: acquire 1회당 CPU {results[count]:.2f}μs "
+              f"(asyncio.sleep 기준선 {baseline / count * 1e6:.2f}μs)")
+    return results
+
+
 if __name__ == "__main__":
     print("=== 1. Token Bucket ===")
     asyncio.run(token_bucket_example())
@@ -175,5 +543,17 @@ if __name__ == "__main__":
     print("\n=== 2. Sliding Window ===")
     asyncio.run(sliding_window_example())
 
-    print("\n=== 3. aiolimiter ===")
+    print("\n=== 3. Sliding Window Counter ===")
+    asyncio.run(sliding_window_counter_example())
+
+    print("\n=== 4. GCRA ===")
+    asyncio.run(gcra_example())
+
+    print("\n=== 5. aiolimiter ===")
     asyncio.run(aiolimiter_example())
+
+    print("\n=== 6. 키별 limiter registry ===")
+    asyncio.run(limiter_registry_example())
+
+    print("\n=== 7. TokenBucket 벤치마크 ===")
+    asyncio.run(token_bucket_benchmark())
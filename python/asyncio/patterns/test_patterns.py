@@ -4,6 +4,8 @@ pytest + pytest-asyncio
 """
 
 import asyncio
+import sys
+import time
 import pytest
 
 from semaphore_example import (
@@ -15,8 +17,15 @@ from semaphore_example import (
 from rate_limiter import (
     TokenBucket,
     SlidingWindowLimiter,
+    SlidingWindowCounterLimiter,
+    GCRALimiter,
+    LimiterRegistry,
     token_bucket_example,
     sliding_window_example,
+    sliding_window_counter_example,
+    gcra_example,
+    limiter_registry_example,
+    token_bucket_benchmark,
 )
 from gather_vs_taskgroup import (
     gather_basic,
@@ -63,7 +72,19 @@ from async_context_manager import (
     exit_stack_with_callback,
 )
 from async_crawler import simple_crawler
-from batch_api_call import batch_api_call, chunked_batch, batch_with_retry
+from async_map import amap, amap_example, ordered_amap_example
+from batch_api_call import (
+    AdaptiveConcurrencyLimiter,
+    OverloadedError,
+    SimulatedUpstream,
+    adaptive_batch_example,
+    batch_api_call,
+    chunked_batch,
+    chunked_batch_benchmark,
+    batch_with_retry,
+    iter_batch_api_call,
+    streaming_batch_example,
+)
 from async_file_io import executor_file_io, bulk_file_processing, file_watcher_example
 
 
@@ -111,6 +132,85 @@ class TestRateLimiter:
         await bucket.acquire()
         assert bucket.tokens < 1
 
+    @pytest.mark.asyncio
+    async def test_token_bucket_weighted(self):
+        bucket = TokenBucket(rate=10, capacity=5)
+        await bucket.acquire(3)
+        start = asyncio.get_running_loop().time()
+        await bucket.acquire(4)  # 남은 2개 + 0.2초 동안 채워지는 2개
+        elapsed = asyncio.get_running_loop().time() - start
+        assert 0.15 < elapsed < 0.4
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_over_capacity(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        with pytest.raises(ValueError):
+            await bucket.acquire(3)
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_fifo(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        order = []
+
+        async def worker(i: int, n: int):
+            await bucket.acquire(n)
+            order.append(i)
+
+        # 요청 크기가 달라도 먼저 온 요청이 먼저 통과한다
+        await asyncio.gather(*(worker(i, 1 if i % 2 else 0.5) for i in range(10)))
+        assert order == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_waiters_sleep_concurrently(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(bucket.acquire() for _ in range(51)))
+        elapsed = asyncio.get_running_loop().time() - start
+        # 50개가 초당 100개로 채워지므로 약 0.5초
+        assert 0.4 < elapsed < 0.8
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_cancel_refund(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        await bucket.acquire()
+        task = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.01)
+        assert bucket.tokens < -0.5  # 대기 중인 요청이 토큰을 예약함
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert bucket.tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_try_acquire(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        assert bucket.try_acquire(2)
+        assert not bucket.try_acquire()
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_benchmark(self):
+        results = await token_bucket_benchmark(waiter_counts=(100, 1000), duration=0.1)
+        assert set(results) == {100, 1000}
+        assert all(cost > 0 for cost in results.values())
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("count", [100, 1000])
+    async def test_token_bucket_acquire_work_does_not_grow_with_waiters(self, count):
+        # 시간 대신 작업 횟수로 확인: 대기자 수와 관계없이 acquire 1회당 예약(토큰 계산) 1번, 잠들기 1번
+        class CountingBucket(TokenBucket):
+            refills = 0
+
+            def _refill(self):
+                CountingBucket.refills += 1
+                super()._refill()
+
+        bucket = CountingBucket(rate=count / 0.05, capacity=1)
+        bucket.reserve(1)
+        CountingBucket.refills = 0
+
+        await asyncio.gather(*(bucket.acquire() for _ in range(count)))
+        assert CountingBucket.refills == count
+
     @pytest.mark.asyncio
     async def test_sliding_window(self):
         total = await sliding_window_example()
@@ -124,6 +224,119 @@ class TestRateLimiter:
         await limiter.acquire()
         assert len(limiter.requests) == 3
 
+    @pytest.mark.asyncio
+    async def test_sliding_window_counter(self):
+        total = await sliding_window_counter_example()
+        assert total > 1.0  # 12개 / 5 per sec
+
+    @pytest.mark.asyncio
+    async def test_sliding_window_counter_limiter(self):
+        limiter = SlidingWindowCounterLimiter(max_requests=3, window_size=1.0)
+        for _ in range(3):
+            assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.estimated_count() == 3
+        # 요청마다 시각을 저장하지 않는다
+        assert not hasattr(limiter, "__dict__")
+
+    @pytest.mark.asyncio
+    async def test_sliding_window_counter_weighted_previous(self):
+        limiter = SlidingWindowCounterLimiter(max_requests=4, window_size=0.2)
+        for _ in range(4):
+            await limiter.acquire()
+        start = asyncio.get_running_loop().time()
+        await limiter.acquire()
+        elapsed = asyncio.get_running_loop().time() - start
+        # 다음 윈도우가 시작되어도 이전 윈도우 요청 4개의 가중치가 3 이하로 줄 때까지 대기
+        assert elapsed >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_gcra(self):
+        total = await gcra_example()
+        assert total > 1.0  # 처음 5개 이후 초당 5개
+
+    @pytest.mark.asyncio
+    async def test_gcra_limiter(self):
+        limiter = GCRALimiter(rate=10, burst=2)
+        assert limiter.try_acquire()
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        with pytest.raises(ValueError):
+            await limiter.acquire(3)
+        assert not hasattr(limiter, "__dict__")
+
+    @pytest.mark.asyncio
+    async def test_gcra_fifo_and_cancel(self):
+        limiter = GCRALimiter(rate=50, burst=1)
+        order = []
+
+        async def worker(i: int):
+            await limiter.acquire()
+            order.append(i)
+
+        await asyncio.gather(*(worker(i) for i in range(10)))
+        assert order == list(range(10))
+
+        limiter.reserve(1)  # 다음 요청이 대기하도록 미리 예약
+        task = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.001)
+        tat = limiter.tat
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.tat == pytest.approx(tat - limiter.emission_interval)
+
+
+# ============================================================
+# Limiter Registry 테스트
+# ============================================================
+class TestLimiterRegistry:
+    @pytest.mark.asyncio
+    async def test_registry_example(self):
+        registry = await limiter_registry_example()
+        assert len(registry) == 3
+
+    def test_same_key_same_limiter(self):
+        registry = LimiterRegistry(lambda: GCRALimiter(rate=1, burst=1))
+        assert registry.get("a") is registry.get("a")
+        assert registry.get("a") is not registry.get("b")
+        assert registry.created == 2
+
+    def test_per_key_limits(self):
+        registry = LimiterRegistry(lambda: GCRALimiter(rate=1, burst=1))
+        assert registry.get("a").try_acquire()
+        assert not registry.get("a").try_acquire()
+        assert registry.get("b").try_acquire()
+
+    def test_idle_eviction(self):
+        registry = LimiterRegistry(lambda: SlidingWindowCounterLimiter(5), ttl=0.05)
+        registry.get("a")
+        registry.get("b")
+        time.sleep(0.06)
+        registry.get("b")
+        # a는 ttl이 지나 정리되고, 방금 사용한 b는 남는다
+        assert "a" not in registry
+        assert "b" in registry
+        assert registry.evicted_idle == 1
+
+    def test_lru_eviction(self):
+        registry = LimiterRegistry(lambda: GCRALimiter(rate=1), max_keys=2)
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+        assert "b" not in registry
+        assert len(registry) == 2
+        assert registry.evicted_lru == 1
+
+    def test_stats(self):
+        registry = LimiterRegistry(lambda: GCRALimiter(rate=1))
+        for i in range(1000):
+            registry.get(f"tenant-{i}")
+        stats = registry.stats()
+        assert stats["keys"] == 1000
+        assert 0 < stats["bytes_per_key"] < 1024
+
 
 # ============================================================
 # gather vs TaskGroup 테스트
@@ -344,11 +557,79 @@ class TestPractical:
         results = await batch_api_call(list(range(20)), max_concurrent=5)
         assert len(results) == 20
 
+    @pytest.mark.asyncio
+    async def test_batch_api_call_rate(self, monkeypatch):
+        # 경과 시간 대신 GCRA 예약 결과로 확인: 처음 burst 5개는 바로, 이후는 1/20초 간격으로 허용
+        scheduled = []
+
+        class RecordingGCRALimiter(GCRALimiter):
+            __slots__ = ()
+
+            def reserve(self, n=1):
+                wait_time = super().reserve(n)
+                scheduled.append((self.tat, wait_time))
+                return wait_time
+
+        monkeypatch.setattr(sys.modules["batch_api_call"], "GCRALimiter", RecordingGCRALimiter)
+        results = await batch_api_call(list(range(20)), max_concurrent=20, rate_per_second=20, rate_burst=5)
+
+        assert len(results) == 20
+        assert len(scheduled) == 20
+        # 호출마다 이론적 도착 시각(TAT)이 1/rate 이상씩 늘어나므로 burst 이후 호출은 그만큼 기다린다
+        tats = [tat for tat, _ in scheduled]
+        assert all(later - earlier >= 1 / 20 - 1e-9 for earlier, later in zip(tats, tats[1:]))
+        assert all(wait_time == 0 for _, wait_time in scheduled[:5])
+        # 마지막 호출은 첫 호출보다 (20 - 5) / 20초 뒤에야 허용된다 (TAT - burst / rate 이후)
+        first_call = tats[0] - 1 / 20
+        assert tats[-1] - 5 / 20 - first_call >= 15 / 20 - 1e-9
+
+    @pytest.mark.asyncio
+    async def test_batch_api_call_callback(self):
+        received = []
+
+        async def on_result(result):
+            received.append(result["id"])
+
+        count = await batch_api_call(list(range(20)), max_concurrent=5, on_result=on_result)
+        assert count == 20
+        assert sorted(received) == list(range(20))
+
+    @pytest.mark.asyncio
+    async def test_iter_batch_api_call(self):
+        ids = [r["id"] async for r in iter_batch_api_call(list(range(30)), buffer_size=4, max_concurrent=10)]
+        assert sorted(ids) == list(range(30))
+        assert await streaming_batch_example() == 50
+
+    @pytest.mark.asyncio
+    async def test_iter_batch_api_call_stop_early(self):
+        stream = iter_batch_api_call(list(range(100)), buffer_size=2, max_concurrent=5, rate_per_second=1000)
+        async for _ in stream:
+            break
+        await stream.aclose()
+        # 남은 호출이 취소되어 실행 중인 태스크가 남지 않는다
+        await asyncio.sleep(0.1)
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        assert not pending
+
     @pytest.mark.asyncio
     async def test_chunked_batch(self):
         results = await chunked_batch(list(range(15)), chunk_size=5, delay=0.1)
         assert len(results) == 15
 
+    @pytest.mark.asyncio
+    async def test_chunked_batch_sliding(self):
+        start = asyncio.get_running_loop().time()
+        results = await chunked_batch(list(range(15)), chunk_size=5, delay=0.5, sliding=True)
+        elapsed = asyncio.get_running_loop().time() - start
+        assert results == [f"processed-{i}" for i in range(15)]
+        # 처음 5개 이후 0.5초마다 5개 → 나머지 10개는 약 1초
+        assert elapsed >= 0.9
+
+    @pytest.mark.asyncio
+    async def test_chunked_batch_benchmark(self):
+        throughput = await chunked_batch_benchmark(count=30, chunk_size=5, delay=0.1, slow=0.2)
+        assert throughput["sliding"] > throughput["chunked"]
+
     @pytest.mark.asyncio
     async def test_batch_with_retry(self):
         results, retry_counts = await batch_with_retry(list(range(20)), max_concurrent=5)
@@ -368,3 +649,255 @@ class TestPractical:
     async def test_file_watcher(self):
         changes = await file_watcher_example()
         assert len(changes) >= 1
+
+
+# ============================================================
+# AIMD 동시 실행 제한 테스트
+# ============================================================
+class TestAdaptiveConcurrency:
+    @pytest.mark.asyncio
+    async def test_adaptive_batch_example(self):
+        results, limiter = await adaptive_batch_example()
+        assert sorted(results) == list(range(200))
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_adaptive_limit_converges_to_capacity(self):
+        upstream = SimulatedUpstream(capacity=8, latency=0.02)
+        # 지연 시간 기준을 끄면 한도는 성공/429 응답 횟수로만 바뀌므로 실행 환경의 속도와 관계없다
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=50, latency_tolerance=float("inf"))
+        results = await batch_api_call(list(range(200)), rate_per_second=10_000, concurrency_limiter=limiter,
+                                       api_call=upstream.call, max_retries=20)
+
+        assert all("error" not in r for r in results.values())
+        limits = [limit for _, limit in limiter.limit_history]
+        # 용량까지 늘어나고, 용량을 넘으면 429 응답으로 줄어들어 용량 근처를 벗어나지 않는다
+        assert max(limits) >= upstream.capacity
+        assert max(limits) <= upstream.capacity + 2
+        assert limiter.overloads > 0
+        assert any(later < earlier for earlier, later in zip(limits, limits[1:]))
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_limit_bounds_in_flight(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+        running = 0
+        peak = 0
+
+        async def worker():
+            nonlocal running, peak
+            async with limiter:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(worker() for _ in range(20)))
+        assert peak == 3
+        assert limiter.successes == 20
+
+    @pytest.mark.asyncio
+    async def test_overload_decreases_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=2)
+        with pytest.raises(OverloadedError):
+            async with limiter:
+                raise OverloadedError("429")
+        assert limiter.limit == 4
+        assert limiter.metrics()["overloads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_block_is_neither_success_nor_failure(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        started = asyncio.Event()
+
+        async def worker():
+            async with limiter:
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(worker())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert limiter.in_flight == 0
+        assert (limiter.successes, limiter.errors, limiter.overloads) == (0, 0, 0)
+        assert limiter.error_rate == 0.0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_tasks_do_not_leak_slots(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        holding = asyncio.Event()
+
+        async def hold():
+            async with limiter:
+                holding.set()
+                await asyncio.sleep(10)
+
+        async def quick():
+            async with limiter:
+                await asyncio.sleep(0)
+
+        holder = asyncio.create_task(hold())
+        await holding.wait()
+        # 슬롯을 기다리는 태스크와 슬롯을 잡은 태스크를 모두 취소
+        waiters = [asyncio.create_task(quick()) for _ in range(5)]
+        await asyncio.sleep(0)
+        for task in waiters[:3] + [holder]:
+            task.cancel()
+        await asyncio.gather(holder, *waiters, return_exceptions=True)
+
+        assert limiter.in_flight == 0
+        assert limiter.successes == 2
+        # 취소 후에도 슬롯을 계속 사용할 수 있다
+        await asyncio.wait_for(quick(), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_nested_blocks_in_one_task(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        async with limiter:
+            async with limiter:
+                assert limiter.in_flight == 2
+            assert limiter.in_flight == 1
+        assert limiter.in_flight == 0
+        assert limiter.successes == 2
+
+    @pytest.mark.asyncio
+    async def test_other_errors_do_not_decrease(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        with pytest.raises(ValueError):
+            async with limiter:
+                raise ValueError("bad response")
+        assert limiter.limit == 8
+        assert limiter.errors == 1
+
+    @pytest.mark.asyncio
+    async def test_fixed_semaphore_retries_overload(self):
+        upstream = SimulatedUpstream(capacity=2, latency=0.01)
+        results = await batch_api_call(list(range(10)), max_concurrent=4, rate_per_second=1000,
+                                       api_call=upstream.call, max_retries=20)
+        assert len(results) == 10
+        assert upstream.rejected > 0
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_return_error_result(self):
+        attempts = {}
+
+        async def always_overloaded(api_id):
+            attempts[api_id] = attempts.get(api_id, 0) + 1
+            raise OverloadedError("429")
+
+        results = await batch_api_call(list(range(3)), max_concurrent=3, rate_per_second=1000,
+                                       api_call=always_overloaded, max_retries=3)
+        # max_retries번 시도한 뒤 예외 대신 "error" 결과를 돌려준다
+        assert attempts == {0: 3, 1: 3, 2: 3}
+        assert sorted(results) == [0, 1, 2]
+        for api_id, result in results.items():
+            assert set(result) == {"id", "error", "timestamp"}
+            assert result["id"] == api_id
+            assert result["error"] == "OverloadedError('429')"
+
+        # on_result에도 같은 형태로 전달되고, max_retries=1이면 재시도하지 않는다
+        attempts.clear()
+        received = []
+        count = await batch_api_call([7], rate_per_second=1000, api_call=always_overloaded, max_retries=1,
+                                     on_result=received.append)
+        assert count == 1
+        assert attempts == {7: 1}
+        assert received[0]["error"] == "OverloadedError('429')"
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self):
+        attempts = 0
+
+        async def bad_response(api_id):
+            nonlocal attempts
+            attempts += 1
+            raise ValueError("bad response")
+
+        with pytest.raises(ValueError):
+            await batch_api_call([0], rate_per_second=1000, api_call=bad_response, max_retries=5)
+        assert attempts == 1
+
+
+# ============================================================
+# amap 테스트
+# ============================================================
+class TestAsyncMap:
+    @pytest.mark.asyncio
+    async def test_amap_example(self):
+        count, alive_peak = await amap_example()
+        assert count == 10_000
+        assert alive_peak <= 52  # 태스크 50개 + 테스트/소비 태스크
+
+    @pytest.mark.asyncio
+    async def test_ordered(self):
+        results = await ordered_amap_example()
+        assert results == [f"page-{i}" for i in range(8)]
+
+    @pytest.mark.asyncio
+    async def test_unordered_yields_as_completed(self):
+        async def work(delay: float) -> float:
+            await asyncio.sleep(delay)
+            return delay
+
+        results = [r async for r in amap(work, [0.1, 0.01, 0.05], concurrency=3)]
+        assert results == [0.01, 0.05, 0.1]
+
+    @pytest.mark.asyncio
+    async def test_pulls_input_lazily(self):
+        pulled = 0
+
+        def items():
+            nonlocal pulled
+            for i in range(1000):
+                pulled += 1
+                yield i
+
+        async def work(item: int) -> int:
+            await asyncio.sleep(0.001)
+            return item
+
+        stream = amap(work, items(), concurrency=5)
+        await anext(stream)
+        assert pulled <= 6
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_exception_cancels_running(self):
+        cancelled = 0
+
+        async def work(item: int) -> int:
+            nonlocal cancelled
+            if item == 3:
+                raise ValueError("bad item")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled += 1
+                raise
+            return item
+
+        with pytest.raises(ValueError):
+            async for _ in amap(work, range(10), concurrency=4):
+                pass
+        assert cancelled == 3
+
+    @pytest.mark.asyncio
+    async def test_break_cancels_running(self):
+        async def work(item: int) -> int:
+            await asyncio.sleep(0.01 if item == 0 else 1)
+            return item
+
+        stream = amap(work, range(100), concurrency=5)
+        async for _ in stream:
+            break
+        await stream.aclose()
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+
+    @pytest.mark.asyncio
+    async def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            async for _ in amap(asyncio.sleep, [0], concurrency=0):
+                pass
@@ -1,123 +1,217 @@
 import random
 import threading
 import time
-from collections import deque, defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import logging
-import requests
 
+logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    def __init__(self, max_calls, per_seconds):
-        self.max_calls = max_calls
-        self.per_seconds = per_seconds
-        self.lock = threading.Lock()
-        self.call_timestamps = deque()
 
-        # 호출 통계 추적을 위한 딕셔너리
-        self.calls_per_second = defaultdict(int)
+class RateLimiterBase(ABC):
+    """
+    StockFetcher가 사용하는 rate limiter 공통 인터페이스 (acquire, close, 호출 통계).
 
-    def acquire(self):
-        with self.lock:
-            now = time.time()
+    하위 클래스는 max_calls, stats_seconds, total_calls 속성과 calls_per_second를 제공한다.
+    """
 
-            # 만료된 타임스탬프 제거
-            while self.call_timestamps and self.call_timestamps[0] <= now - self.per_seconds:
-                self.call_timestamps.popleft()
+    @abstractmethod
+    def acquire(self, timeout=None):
+        """호출 한 번을 허용받을 때까지 대기하고, 허용받으면 True를 반환"""
 
-            # 호출 제한에 도달했다면 대기
-            if len(self.call_timestamps) >= self.max_calls:
-                wait_time = self.per_seconds - (now - self.call_timestamps[0])
-                if wait_time > 0:
-                    time.sleep(wait_time)
-                    now = time.time()  # 대기 후 시간 업데이트
+    @abstractmethod
+    def close(self):
+        """대기 중인 호출을 멈추고 자원을 정리"""
 
-            # 호출 기록
-            current_second = int(now)
-            self.calls_per_second[current_second] += 1
-            self.call_timestamps.append(now)
+    @property
+    @abstractmethod
+    def calls_per_second(self):
+        """최근 stats_seconds초의 {초: 호출 수}"""
 
     def get_stats(self):
         """호출 통계 분석 결과 반환"""
+        calls_per_second = self.calls_per_second
         stats = {
-            "calls_per_second": dict(self.calls_per_second),
-            "max_calls_in_one_second": max(self.calls_per_second.values()) if self.calls_per_second else 0,
-            "total_calls": sum(self.calls_per_second.values()),
-            "seconds_tracked": len(self.calls_per_second)
+            "calls_per_second": calls_per_second,
+            "max_calls_in_one_second": max(calls_per_second.values()) if calls_per_second else 0,
+            "total_calls": self.total_calls,
+            "seconds_tracked": len(calls_per_second)
         }
         return stats
 
     def print_stats(self):
         """호출 통계 출력"""
-        if not self.calls_per_second:
+        calls_per_second = self.calls_per_second
+        if not calls_per_second:
             print("호출 데이터가 없습니다.")
             return
 
-        print("\n===== 초당 API 호출 횟수 분석 =====")
-        max_calls = max(self.calls_per_second.values())
+        print(f"\n===== 초당 API 호출 횟수 분석 (최근 {self.stats_seconds}초) =====")
+        max_calls = max(calls_per_second.values())
 
-        for second, count in sorted(self.calls_per_second.items()):
+        for second, count in sorted(calls_per_second.items()):
             timestamp = datetime.fromtimestamp(second).strftime('%H:%M:%S')
             print(f"시간: {timestamp}, 호출 수: {count}")
 
         print(f"\n최대 초당 호출 횟수: {max_calls}")
         print(f"설정된 max_calls: {self.max_calls}")
         print(f"제한 준수 여부: {'준수' if max_calls <= self.max_calls else '초과'}")
-        print(f"총 호출 횟수: {sum(self.calls_per_second.values())}")
+        print(f"총 호출 횟수: {self.total_calls}")
         print("================================\n")
 
 
-class StockFetcher:
-    def __init__(self):
-        max_calls = 20
-        self.rate_limiter = RateLimiter(max_calls=5 , per_seconds=1)
-        self.executor = ThreadPoolExecutor(max_workers=max_calls)
+class RateLimiter(RateLimiterBase):
+    def __init__(self, max_calls, per_seconds, stats_seconds=60):
+        self.max_calls = max_calls
+        self.per_seconds = per_seconds
+        self.lock = threading.Lock()
+        # close()하면 set되어 대기 중인 스레드를 바로 깨운다
+        self._closed = threading.Event()
+
+        # 최근 max_calls번의 호출(예약) 시각 - max_calls개를 넘으면 가장 오래된 것부터 버려진다
+        self.call_timestamps = deque(maxlen=max_calls)
+
+        # 호출 통계: 최근 stats_seconds초의 초당 호출 수를 고정 크기 원형 버퍼에 기록
+        self.stats_seconds = stats_seconds
+        self._stat_seconds = [-1] * stats_seconds
+        self._stat_counts = [0] * stats_seconds
+        self.total_calls = 0
+
+    def _reserve(self, timeout=None):
+        """호출 시각을 예약하고 그 시각을 반환 (timeout 안에 호출할 수 없으면 예약하지 않고 None)"""
+        now = time.monotonic()
+        slot = now
+        # max_calls번 전 호출이 윈도우를 벗어나는 시각 이후로 예약
+        if len(self.call_timestamps) == self.max_calls:
+            slot = max(now, self.call_timestamps[0] + self.per_seconds)
+        if timeout is not None and slot - now > timeout:
+            return None
+        self.call_timestamps.append(slot)
+        return slot
+
+    def _record(self, second):
+        index = second % self.stats_seconds
+        if self._stat_seconds[index] != second:
+            self._stat_seconds[index] = second
+            self._stat_counts[index] = 0
+        self._stat_counts[index] += 1
+        self.total_calls += 1
+
+    def acquire(self, timeout=None):
+        """
+        호출 한 번을 허용받을 때까지 대기
+
+        Lock은 예약하는 동안만 잡고, 예약한 시각까지는 Lock 밖에서 대기하므로
+        여러 스레드가 동시에 대기한다. close()하면 대기 중인 스레드가 바로 깨어난다.
+
+        Returns:
+            bool: 허용받으면 True, timeout 안에 호출할 수 없거나 close()된 경우 False
+        """
+        with self.lock:
+            if self._closed.is_set():
+                return False
+            slot = self._reserve(timeout)
+        if slot is None:
+            return False
+        # Event.wait는 close()되면 예약한 시각 전이라도 True를 반환한다
+        if self._closed.wait(max(0.0, slot - time.monotonic())):
+            return False
+        with self.lock:
+            self._record(int(time.time()))
+        return True
 
-        # 로깅 설정
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
+    def close(self):
+        """대기 중인 스레드를 모두 깨우고 이후 acquire는 False를 반환"""
+        self._closed.set()
 
+    @property
+    def closed(self):
+        return self._closed.is_set()
 
-    def __fetch_stock_quote(self, stock_code):
-        self.rate_limiter.acquire()
+    @property
+    def calls_per_second(self):
+        """최근 stats_seconds초의 {초: 호출 수}"""
+        with self.lock:
+            oldest = int(time.time()) - self.stats_seconds
+            return {second: count for second, count in zip(self._stat_seconds, self._stat_counts)
+                    if second > oldest}
 
-        start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        self.logger.info(f"호출 시작: {stock_code} - {start_time}")
 
-        wait_time = random.uniform(1, 2)
-        time.sleep(wait_time)
+# 프로세스 풀 워커에서 사용할 limiter (init_worker에서 설정)
+_worker_rate_limiter = None
 
-        end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        self.logger.info(f"호출 완료: {stock_code} - {end_time}")
-        return f"quote:{stock_code}:{random.uniform(1, 100)}"
 
-    def __fetch_stock_info(self, stock_code):
-        self.rate_limiter.acquire()
+def init_worker(rate_limiter):
+    """
+    ProcessPoolExecutor의 initializer.
+    SharedRateLimiter의 프로세스 간 Lock은 프로세스를 만들 때만 넘길 수 있으므로 작업마다 전달하지 않는다.
+    """
+    global _worker_rate_limiter
+    _worker_rate_limiter = rate_limiter
 
-        start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        self.logger.info(f"호출 시작: {stock_code} - {start_time}")
 
-        wait_time = random.uniform(1, 2)
-        time.sleep(wait_time)
+def _call_api(kind, stock_code, rate_limiter=None):
+    """rate limiter로 허용받은 뒤 API를 호출 (API 호출은 sleep으로 대신함)"""
+    (rate_limiter or _worker_rate_limiter).acquire()
 
-        end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        self.logger.info(f"호출 완료: {stock_code} - {end_time}")
-        return f"stock_info:{stock_code}:{random.uniform(1, 100)}"
+    start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    logger.info(f"호출 시작: {stock_code} - {start_time}")
+
+    wait_time = random.uniform(1, 2)
+    time.sleep(wait_time)
+
+    end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    logger.info(f"호출 완료: {stock_code} - {end_time}")
+    return f"{kind}:{stock_code}:{random.uniform(1, 100)}"
+
+
+def fetch_stock_quote(stock_code, rate_limiter=None):
+    """주식 시세 조회 (rate_limiter가 None이면 init_worker로 설정한 limiter 사용)"""
+    return _call_api("quote", stock_code, rate_limiter)
+
+
+def fetch_stock_info(stock_code, rate_limiter=None):
+    """주식 정보 조회 (rate_limiter가 None이면 init_worker로 설정한 limiter 사용)"""
+    return _call_api("stock_info", stock_code, rate_limiter)
+
+
+class StockFetcher:
+    def __init__(self, rate_limiter=None, max_workers=20, use_processes=False):
+        """
+        Args:
+            rate_limiter: RateLimiterBase 구현 (기본값: 초당 5회 RateLimiter)
+                          - 여러 프로세스가 한도를 나눠 쓰려면 SharedRateLimiter를 사용
+            max_workers: 동시에 실행할 최대 요청 수
+            use_processes: True이면 스레드 대신 프로세스 풀에서 요청 (SharedRateLimiter 필요)
+        """
+        self.rate_limiter = rate_limiter or RateLimiter(max_calls=5, per_seconds=1)
+        self.use_processes = use_processes
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                                initargs=(self.rate_limiter,))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # 로깅 설정
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
     def _execute_concurrent_requests(self, method, stock_codes):
-        futures = [self.executor.submit(method, code) for code in stock_codes]
+        # 프로세스 풀에서는 워커마다 init_worker로 받은 limiter를 사용
+        args = () if self.use_processes else (self.rate_limiter,)
+        futures = [self.executor.submit(method, code, *args) for code in stock_codes]
         results = [future.result() for future in futures]
 
         return results[0] if len(results) == 1 else results
 
     def fetch_stock_quotes(self, stock_codes):
         """여러 주식 시세를 동시에 조회"""
-        return self._execute_concurrent_requests(self.__fetch_stock_quote, stock_codes)
+        return self._execute_concurrent_requests(fetch_stock_quote, stock_codes)
 
     def fetch_stock_infos(self, stock_codes):
         """여러 주식 정보를 동시에 조회"""
-        return self._execute_concurrent_requests(self.__fetch_stock_info, stock_codes)
+        return self._execute_concurrent_requests(fetch_stock_info, stock_codes)
 
     def print_stats(self):
         """호출 통계 출력"""
@@ -0,0 +1,180 @@
+import struct
+import sys
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+
+from queue_rate_limiting import RateLimiterBase, StockFetcher
+
+# 공유 메모리 머리말: 다음에 덮어쓸 슬롯 번호, 총 호출 수
+_HEADER = struct.Struct("qq")
+# 최근 max_calls번의 호출(예약) 시각
+_SLOT = struct.Struct("d")
+# 호출 통계: (초, 호출 수)
+_STAT = struct.Struct("qq")
+
+
+class SharedRateLimiter(RateLimiterBase):
+    """
+    여러 프로세스가 하나의 호출 한도(per_seconds 동안 max_calls번)를 나눠 쓰는 rate limiter.
+
+    최근 max_calls번의 호출 시각을 multiprocessing.shared_memory의 원형 버퍼에 저장하므로
+    RateLimiter(queue_rate_limiting)와 같은 sliding window 기준을 프로세스 수와 관계없이 지킨다.
+    새 호출은 가장 오래된 호출 시각 + per_seconds 이후로 예약하고, 프로세스 간 Lock은
+    버퍼를 읽고 쓰는 동안만 잡는다. (예약한 시각까지의 대기는 Lock 밖에서 함)
+    초당 호출 수 통계도 같은 공유 메모리에 예약한 시각 기준으로 기록한다.
+
+    시각은 time.monotonic을 사용한다. Linux(CLOCK_MONOTONIC)와 macOS(mach_absolute_time)에서는
+    시스템 전체에서 같은 시계이므로 프로세스 간에 비교할 수 있지만, 다른 플랫폼에서는 보장되지 않는다.
+
+    Lock은 프로세스를 만들 때만 전달할 수 있으므로 ProcessPoolExecutor의 initializer 인자로 넘기고
+    (StockFetcher(use_processes=True) 참고), spawn 방식 프로세스를 쓴다면 같은 mp_context를 지정한다.
+    """
+
+    def __init__(self, max_calls, per_seconds, stats_seconds=60, mp_context=None):
+        self.max_calls = max_calls
+        self.per_seconds = per_seconds
+        self.stats_seconds = stats_seconds
+        self.lock = (mp_context or multiprocessing).Lock()
+        # 0으로 초기화된 공유 메모리 - 슬롯 시각 0은 "호출 기록 없음"과 같다
+        self.shm = shared_memory.SharedMemory(create=True, size=self._stats_offset + _STAT.size * stats_seconds)
+        self.shm.buf[:] = bytes(self.shm.size)
+        self._owner = True
+        self._closed = False
+
+    @property
+    def _stats_offset(self):
+        return _HEADER.size + _SLOT.size * self.max_calls
+
+    def __getstate__(self):
+        return {"max_calls": self.max_calls, "per_seconds": self.per_seconds, "stats_seconds": self.stats_seconds,
+                "lock": self.lock, "name": self.shm.name}
+
+    def __setstate__(self, state):
+        # 워커 프로세스에서는 부모가 만든 공유 메모리에 연결만 한다
+        self.max_calls = state["max_calls"]
+        self.per_seconds = state["per_seconds"]
+        self.stats_seconds = state["stats_seconds"]
+        self.lock = state["lock"]
+        if sys.version_info >= (3, 13):
+            # 삭제는 만든 프로세스가 하므로 resource_tracker에 등록하지 않는다
+            self.shm = shared_memory.SharedMemory(name=state["name"], track=False)
+        else:
+            # 3.12 이하는 연결만 해도 등록되지만, multiprocessing으로 만든 워커는 부모와 같은
+            # resource_tracker를 쓰므로 중복 등록일 뿐 종료할 때 삭제하지 않는다.
+            # (워커에서 unregister하면 부모의 등록까지 지워져 부모가 unlink할 때 tracker에서 KeyError가 난다)
+            self.shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._closed = False
+
+    def _record(self, buf, second):
+        offset = self._stats_offset + _STAT.size * (second % self.stats_seconds)
+        recorded, count = _STAT.unpack_from(buf, offset)
+        _STAT.pack_into(buf, offset, second, count + 1 if recorded == second else 1)
+
+    def reserve(self, timeout=None):
+        """
+        호출 한 번을 예약하고, 호출할 수 있을 때까지 기다려야 하는 시간(초)을 반환
+
+        Returns:
+            float: 대기 시간 (timeout 안에 호출할 수 없으면 예약하지 않고 None)
+        """
+        buf = self.shm.buf
+        with self.lock:
+            now = time.monotonic()
+            head, total = _HEADER.unpack_from(buf, 0)
+            offset = _HEADER.size + _SLOT.size * head
+            oldest, = _SLOT.unpack_from(buf, offset)
+            # max_calls번 전 호출이 윈도우를 벗어나는 시각 이후로 예약
+            slot = max(now, oldest + self.per_seconds) if oldest else now
+            if timeout is not None and slot - now > timeout:
+                return None
+            _SLOT.pack_into(buf, offset, slot)
+            _HEADER.pack_into(buf, 0, (head + 1) % self.max_calls, total + 1)
+            self._record(buf, int(time.time() + slot - now))
+        return slot - now
+
+    def acquire(self, timeout=None):
+        """
+        호출 한 번을 허용받을 때까지 대기
+
+        Returns:
+            bool: 허용받으면 True, timeout 안에 호출할 수 없거나 close()된 경우 False
+        """
+        if self._closed:
+            return False
+        wait_time = self.reserve(timeout)
+        if wait_time is None:
+            return False
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return True
+
+    @property
+    def total_calls(self):
+        """모든 프로세스의 누적 호출 수"""
+        with self.lock:
+            return _HEADER.unpack_from(self.shm.buf, 0)[1]
+
+    @property
+    def calls_per_second(self):
+        """모든 프로세스의 최근 stats_seconds초 {초: 호출 수}"""
+        with self.lock:
+            # macOS에서는 공유 메모리 크기가 페이지 단위로 커지므로 통계 영역만 잘라서 읽는다
+            start = self._stats_offset
+            stats = list(_STAT.iter_unpack(self.shm.buf[start:start + _STAT.size * self.stats_seconds]))
+        oldest = int(time.time()) - self.stats_seconds
+        return {second: count for second, count in stats if count and second > oldest}
+
+    def close(self):
+        """공유 메모리 연결을 닫고, 만든 프로세스라면 공유 메모리를 삭제"""
+        if self._closed:
+            return
+        self._closed = True
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def measure_acquire_cost(limiter, count=10000):
+    """
+    한도에 걸리지 않는 limiter에서 acquire 1회의 평균 시간(μs)을 측정
+
+    Returns:
+        float: acquire 1회당 평균 시간 (μs)
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        limiter.acquire()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    stock_codes = [f"STOCK{i}" for i in range(20)]
+
+    # 워커 프로세스 4개가 초당 5회 한도를 나눠 씀
+    with SharedRateLimiter(max_calls=5, per_seconds=1) as limiter:
+        fetcher = StockFetcher(rate_limiter=limiter, max_workers=4, use_processes=True)
+        start_time = time.time()
+        quote_results = fetcher.fetch_stock_quotes(stock_codes)
+        elapsed_time = time.time() - start_time
+        fetcher.shutdown()
+
+        for result in quote_results:
+            print(result)
+        fetcher.print_stats()
+        print(f"총 실행 시간: {elapsed_time:.2f}초, 요청 수: {len(stock_codes)}")
+
+    # 한도에 걸리지 않도록 아주 짧은 윈도우로 측정
+    with SharedRateLimiter(max_calls=1000, per_seconds=1e-9) as limiter:
+        print(f"acquire 1회당 평균 시간: {measure_acquire_cost(limiter):.2f}μs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from queue_rate_limiting import RateLimiter
+
+
+class RecordingRateLimiter(RateLimiter):
+    """예약한 호출 시각을 기록하는 RateLimiter (스레드가 깨어나는 시점의 지연과 무관하게 검사하기 위함)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slots = []
+
+    def _reserve(self, timeout=None):
+        slot = super()._reserve(timeout)
+        if slot is not None:
+            self.slots.append(slot)
+        return slot
+
+
+class RateLimiterLoadTest(TestCase):
+    def test_throughput_with_200_threads(self):
+        max_calls, per_seconds, threads, calls_per_thread = 50, 0.5, 200, 2
+        limiter = RecordingRateLimiter(max_calls=max_calls, per_seconds=per_seconds)
+
+        def worker():
+            for _ in range(calls_per_thread):
+                self.assertTrue(limiter.acquire())
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(worker) for _ in range(threads)]
+        for future in futures:
+            future.result()
+
+        total = threads * calls_per_thread
+        slots = sorted(limiter.slots)
+        self.assertEqual(limiter.total_calls, total)
+        self.assertEqual(len(slots), total)
+        # 처음 max_calls번 이후에는 per_seconds마다 max_calls번씩 허용된다
+        throughput = (total - max_calls) / (slots[-1] - slots[0])
+        self.assertAlmostEqual(throughput, max_calls / per_seconds, delta=max_calls / per_seconds * 0.1)
+        # 어느 per_seconds 구간에서나 max_calls번 이하 (예약 시각 기준이므로 스케줄링 지연과 무관)
+        for earlier, later in zip(slots, slots[max_calls:]):
+            self.assertGreaterEqual(later - earlier, per_seconds - 1e-9)
+
+    def test_timeout_does_not_reserve(self):
+        limiter = RateLimiter(max_calls=1, per_seconds=10)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.05))
+        self.assertEqual(len(limiter.call_timestamps), 1)
+
+    def test_close_wakes_waiters(self):
+        limiter = RateLimiter(max_calls=1, per_seconds=10)
+        limiter.acquire()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        thread.start()
+        time.sleep(0.05)
+        limiter.close()
+        thread.join(timeout=1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [False])
+
+    def test_stats_ring_buffer(self):
+        limiter = RateLimiter(max_calls=100, per_seconds=1, stats_seconds=3)
+        for second in range(10):
+            limiter._record(second)
+        # 최근 3초 분량만 고정 크기 버퍼에 남는다
+        self.assertEqual(len(limiter._stat_counts), 3)
+        self.assertEqual(sorted(limiter._stat_seconds), [7, 8, 9])
+        self.assertEqual(limiter.total_calls, 10)
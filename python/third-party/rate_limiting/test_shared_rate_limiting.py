@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from unittest import TestCase
+
+from queue_rate_limiting import RateLimiter, RateLimiterBase, StockFetcher
+from shared_rate_limiting import SharedRateLimiter, measure_acquire_cost
+
+# 워커 프로세스가 공유 메모리에 연결했다가 끝나도 resource_tracker 경고가 없는지 확인하는 스크립트
+TRACKER_SCRIPT = textwrap.dedent("""
+    import multiprocessing
+    import sys
+    from concurrent.futures import ProcessPoolExecutor
+
+    from queue_rate_limiting import init_worker
+    from shared_rate_limiting import SharedRateLimiter
+    import queue_rate_limiting
+
+
+    def call(_):
+        return queue_rate_limiting._worker_rate_limiter.acquire()
+
+
+    if __name__ == "__main__":
+        context = multiprocessing.get_context(sys.argv[1])
+        with SharedRateLimiter(max_calls=100, per_seconds=0.1, mp_context=context) as limiter:
+            with ProcessPoolExecutor(max_workers=2, mp_context=context, initializer=init_worker,
+                                     initargs=(limiter,)) as executor:
+                assert all(executor.map(call, range(10)))
+            assert limiter.total_calls == 10
+""")
+
+
+class SharedRateLimiterTest(TestCase):
+    def test_same_interface_as_rate_limiter(self):
+        with SharedRateLimiter(max_calls=2, per_seconds=1) as limiter:
+            self.assertIsInstance(limiter, RateLimiterBase)
+            self.assertIsInstance(RateLimiter(max_calls=2, per_seconds=1), RateLimiterBase)
+            self.assertTrue(limiter.acquire())
+            self.assertEqual(limiter.get_stats()["total_calls"], 1)
+            self.assertEqual(sum(limiter.calls_per_second.values()), 1)
+
+    def test_fetcher_processes_share_one_budget(self):
+        max_calls, per_seconds, count = 5, 1, 10
+        with SharedRateLimiter(max_calls=max_calls, per_seconds=per_seconds) as limiter:
+            fetcher = StockFetcher(rate_limiter=limiter, max_workers=4, use_processes=True)
+            start = time.monotonic()
+            results = fetcher.fetch_stock_quotes([f"STOCK{i}" for i in range(count)])
+            elapsed = time.monotonic() - start
+            fetcher.shutdown()
+
+            self.assertEqual(len(results), count)
+            self.assertEqual(limiter.total_calls, count)
+            # 워커 4개의 호출을 합쳐도 초당 max_calls번 이하
+            calls_per_second = limiter.calls_per_second
+            self.assertEqual(sum(calls_per_second.values()), count)
+            self.assertLessEqual(max(calls_per_second.values()), max_calls)
+            # 처음 max_calls번 이후에는 per_seconds마다 max_calls번씩 허용된다
+            self.assertGreaterEqual(elapsed, (count - max_calls) / max_calls * per_seconds)
+
+    def test_acquire_cost(self):
+        with SharedRateLimiter(max_calls=1000, per_seconds=1e-9) as limiter:
+            cost = measure_acquire_cost(limiter, count=5000)
+        self.assertLess(cost, 1000)
+
+    def test_reserve_waits_for_oldest_call(self):
+        with SharedRateLimiter(max_calls=2, per_seconds=0.2) as limiter:
+            self.assertEqual(limiter.reserve(), 0)
+            self.assertEqual(limiter.reserve(), 0)
+            start = time.monotonic()
+            self.assertTrue(limiter.acquire())
+            self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_timeout_does_not_reserve(self):
+        with SharedRateLimiter(max_calls=1, per_seconds=10) as limiter:
+            self.assertTrue(limiter.acquire())
+            self.assertFalse(limiter.acquire(timeout=0.05))
+            self.assertEqual(limiter.total_calls, 1)
+
+    def test_workers_do_not_leak_shared_memory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            script = os.path.join(tmp_dir, "tracker_check.py")
+            with open(script, "w", encoding="utf-8") as f:
+                f.write(TRACKER_SCRIPT)
+            env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+            for method in ("fork", "spawn"):
+                with self.subTest(method=method):
+                    completed = subprocess.run([sys.executable, script, method], env=env, capture_output=True,
+                                               text=True, timeout=60)
+                    self.assertEqual(completed.returncode, 0, completed.stderr)
+                    self.assertNotIn("resource_tracker", completed.stderr)
+                    self.assertNotIn("leaked", completed.stderr)